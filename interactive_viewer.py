@@ -1,15 +1,19 @@
 import glob
 import os
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 
+import numpy as np
 import pandas as pd
-import yaml
-import re
 import altair as alt
+import pyarrow.parquet as pq
 import streamlit as st
 import logging
 
+from workflow.scripts.results_store import CURVE_KEYS, ResultsStore, curve_path_from_key
+from workflow.scripts.stats_reader import read_result
+
 # Set page config at the very beginning
 st.set_page_config(page_title="Interactive ESCE", layout="wide")
 
@@ -18,65 +22,174 @@ log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
 logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Configure YAML loader
-loader = yaml.SafeLoader
-loader.add_implicit_resolver(
-    u'tag:yaml.org,2002:float',
-    re.compile(r'''^(?:
-     [-+]?(?:[0-9][0-9_]*)\\.[0-9_]*(?:[eE][-+]?[0-9]+)?
-    |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
-    |\\.[0-9_]+(?:[eE][-+][0-9]+)?
-    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\\.[0-9_]*
-    |[-+]?\\.(?:inf|Inf|INF)
-    |\\.(?:nan|NaN|NAN))$''', re.X),
-    list(u'-+0123456789.')
-)
+# Results store written by the workflow if `results_store` is set in the config
+RESULTS_STORE = os.environ.get('ESCE_RESULTS_STORE', 'results/results.db')
+
+# Map results store keys to the viewer's column names
+STORE_COLUMNS = {
+    "targets": "target",
+    "confound_correction_method": "confound-correction-method",
+    "confound_correction_cni": "confound-correction-cni",
+    "quantile_transform": "quantile-transform",
+}
+
+# Map the viewer's column names back to the curve keys of the results store and curve indices
+INDEX_COLUMNS = {STORE_COLUMNS.get(k, k): k for k in CURVE_KEYS}
+
+# Curve indices written by the workflow's `index_curves` rule
+INDEX_PATTERN = os.environ.get('ESCE_CURVE_INDEX', 'results/*/index/*.parquet')
+
+# Above this number of selected curves, the chart only shows a summary of them
+MAX_DETAILED_CURVES = 50
+
+# Quantiles of the curve envelopes shown in the summarized chart
+ENVELOPE_QUANTILES = (0.1, 0.9)
+
+CATEGORY_COLUMNS = ['dataset', 'features', 'target', 'model', 'confound-correction-method', 'confound-correction-cni', 'balanced','quantile-transform', 'grid']
 
 def get_available_results(directory: str = 'results') -> List[str]:
-    return glob.glob(f"{directory}/**/*.stats.json", recursive=True)
+    # statistics files only live at results/{dataset}/statistics/{model}/, so the much larger
+    # splits and scores directories need not be walked
+    return glob.glob(f"{directory}/*/statistics/*/*.stats.json")
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Modification time and size of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
 def extract_metadata(path: str) -> pd.Series:
-    parts = [Path(path).parts[1], Path(path).parts[3]] + Path(path).parts[4].split('_')
+    parts = [Path(path).parts[1], Path(path).parts[3]] + Path(path).parts[4].removesuffix('.stats.json').split('_')
     columns = [
         "dataset", "model", "features", "target",
         "confound-correction-method", "confound-correction-cni",
         "balanced","quantile-transform", "grid",
     ]
-    return pd.Series(parts + [None] * (len(columns) - len(parts)), index=columns)
-
-def read_results_metadata(available_results: List[str]) -> pd.DataFrame:
-    logger.info(f"Processing {len(available_results)} result files")
-    df = pd.DataFrame(available_results, columns=["full_path"])
-    df = df.join(df["full_path"].apply(extract_metadata))
-    
-    non_empty_files = [
-        file_path for file_path in df["full_path"]
-        if yaml.load(open(file_path), Loader=yaml.SafeLoader)
-    ]
-    df = df[df["full_path"].isin(non_empty_files)]
-    df["cni"] = df.apply(lambda row: f"{row['confound-correction-method']}-{row['confound-correction-cni']}", axis=1)
-    
-    logger.info(f"Processed {len(df)} non-empty result files")
-    return df
+    metadata = pd.Series(parts + [None] * (len(columns) - len(parts)), index=columns)
+    metadata["cni"] = f"{metadata['confound-correction-method']}-{metadata['confound-correction-cni']}"
+    return metadata
+
+def add_metadata(df_: pd.DataFrame, metadata: pd.Series) -> pd.DataFrame:
+    for col in ['dataset', 'features', 'target', 'model', 'cni', 'confound-correction-method', 'confound-correction-cni', 'balanced','quantile-transform', 'grid']:
+        if col in metadata.index:
+            df_[col] = metadata[col]
+    return df_
+
+def score_to_frame(score: dict, metadata: pd.Series) -> pd.DataFrame:
+    df_ = pd.DataFrame({"n": score["x"], "y": score["y_mean"], "y_std": score["y_std"], "kind": "observed"})
+    return add_metadata(df_, metadata)
+
+def bands_to_frame(bands_path: str, metadata: pd.Series) -> Optional[pd.DataFrame]:
+    """Read the prediction bands precomputed by the workflow, if available."""
+    if not os.path.exists(bands_path) or os.path.getsize(bands_path) == 0:
+        return None
+    with np.load(bands_path) as bands:
+        df_ = pd.DataFrame({
+            "n": bands["n"].astype(float),
+            "y": bands["fit"].astype(float),
+            "y_lower": bands["lower"].astype(float),
+            "y_upper": bands["upper"].astype(float),
+        })
+    df_["kind"] = "extrapolated"
+    return add_metadata(df_.dropna(subset=["y"]), metadata)
+
+def load_result(stats_path: str) -> List[pd.DataFrame]:
+    """Read the observed and extrapolated learning curve of a statistics file."""
+    metadata = extract_metadata(stats_path)
+    try:
+        score = read_result(stats_path)
+        if not score:
+            logger.warning(f"{stats_path} is empty - skipping")
+            return []
+        bands = bands_to_frame(stats_path.replace(".stats.json", ".bands.npz"), metadata)
+        return [score_to_frame(score, metadata)] + ([] if bands is None else [bands])
+    except Exception as e:
+        logger.error(f"Error processing file {stats_path}: {str(e)}")
+        return []
+
+class ResultsIndex:
+    """
+    In-memory index of the result files, shared by all viewer sessions.
+
+    A refresh only lists and stats the result files. Files are parsed again only if
+    they are new or their modification time or size changed, and the combined data
+    is only rebuilt if any file was added, changed or removed.
+    """
+
+    def __init__(self, directory: str = 'results'):
+        self.directory = directory
+        # learning curves by statistics file, along with the versions of the statistics and bands files
+        self._entries: Dict[str, Tuple[Tuple, List[pd.DataFrame]]] = {}
+        self._data = pd.DataFrame()
+        self._lock = threading.Lock()
+
+    def refresh(self) -> pd.DataFrame:
+        """Update the index from the results directory and return the combined data."""
+        with self._lock:
+            entries = {}
+            parsed = 0
+            for path in get_available_results(self.directory):
+                version = (file_version(path), file_version(path.replace(".stats.json", ".bands.npz")))
+                cached = self._entries.get(path)
+                if cached is not None and cached[0] == version:
+                    entries[path] = cached
+                else:
+                    entries[path] = (version, load_result(path))
+                    parsed += 1
+
+            if parsed or entries.keys() != self._entries.keys():
+                logger.info(f"Parsed {parsed} of {len(entries)} result files")
+                self._entries = entries
+                self._data = finalize_data([frame for _, frames in entries.values() for frame in frames])
+            return self._data
+
+@st.cache_resource
+def get_results_index(directory: str = 'results') -> ResultsIndex:
+    return ResultsIndex(directory)
+
+def load_data_from_store(store_path: str) -> pd.DataFrame:
+    logger.info(f"Reading results from store {store_path}")
+    with ResultsStore(store_path) as store:
+        statistics = store.read_statistics()
 
-def load_data(results_metadata: pd.DataFrame) -> pd.DataFrame:
     data = []
-    for _, row in results_metadata.iterrows():
-        try:
-            with open(row.full_path) as f:
-                score = yaml.load(f, Loader=loader)
-            if not score:
-                logger.warning(f"{row.full_path} is empty - skipping")
-                continue
-            
-            df_ = pd.DataFrame({"n": score["x"], "y": score["y_mean"], "y_std": score["y_std"]})
-            for col in ['dataset', 'features', 'target', 'model', 'cni', 'confound-correction-method', 'confound-correction-cni', 'balanced','quantile-transform', 'grid']:
-                if col in row.index:
-                    df_[col] = row[col]
-            data.append(df_)
-        except Exception as e:
-            logger.error(f"Error processing file {row.full_path}: {str(e)}")
+    for key, score in statistics:
+        metadata = pd.Series({STORE_COLUMNS.get(k, k): v for k, v in key.items()})
+        metadata["cni"] = f"{metadata['confound-correction-method']}-{metadata['confound-correction-cni']}"
+        data.append(score_to_frame(score, metadata))
+        data.append(bands_to_frame(curve_path_from_key(key, "statistics", ".bands.npz"), metadata))
 
+    return finalize_data(data)
+
+@st.cache_data(show_spinner=False)
+def load_cached_data_from_store(store_path: str, version: Tuple) -> pd.DataFrame:
+    # `version` only serves as cache key, so that the store is read again once it changed
+    return load_data_from_store(store_path)
+
+def get_index_files(pattern: str = INDEX_PATTERN) -> List[str]:
+    return sorted(glob.glob(pattern))
+
+@st.cache_data(show_spinner=False)
+def load_index_categories(index_files: Tuple[str, ...], version: Tuple) -> pd.DataFrame:
+    """Read the distinct curve keys of the curve indices, without reading their points."""
+    keys = pq.read_table(list(index_files), columns=CURVE_KEYS).to_pandas().astype(str).drop_duplicates()
+    return keys.rename(columns=STORE_COLUMNS)
+
+@st.cache_data(show_spinner=False)
+def load_data_from_index(index_files: Tuple[str, ...], version: Tuple, selection: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> pd.DataFrame:
+    """Read the points of the selected curves, filtering the curve indices while reading them."""
+    filters = [(INDEX_COLUMNS[col], 'in', list(values)) for col, values in selection if values]
+    logger.info(f"Reading curve indices with filters {filters}")
+    df_ = pq.read_table(list(index_files), filters=filters or None).to_pandas()
+    df_[CURVE_KEYS] = df_[CURVE_KEYS].astype(str)
+    df_ = df_.rename(columns=STORE_COLUMNS)
+    df_["cni"] = df_["confound-correction-method"] + "-" + df_["confound-correction-cni"]
+    return finalize_data([df_])
+
+def finalize_data(data: List[Optional[pd.DataFrame]]) -> pd.DataFrame:
+    data = [df_ for df_ in data if df_ is not None]
     if not data:
         logger.warning("No data to plot.")
         return pd.DataFrame()
@@ -95,11 +208,31 @@ def load_data(results_metadata: pd.DataFrame) -> pd.DataFrame:
     logger.info("Data processed successfully")
     return data
 
-def create_chart(data: pd.DataFrame, selected_categories: Dict[str, List[str]]) -> alt.Chart:
+def filter_data(data: pd.DataFrame, selected_categories: Dict[str, List[str]]) -> pd.DataFrame:
     for col, values in selected_categories.items():
         if values:
             data = data[data[col].isin(values)]
-    
+    return data
+
+def top_curves(data: pd.DataFrame, k: int) -> pd.DataFrame:
+    """Keep the k curves with the best observed performance at their largest sample size."""
+    observed = data[data['kind'] == 'observed']
+    final = observed.sort_values('n').groupby('id')['y'].last()
+    return data[data['id'].isin(final.nlargest(k).index)]
+
+def summarize_curves(data: pd.DataFrame, group_by: str) -> pd.DataFrame:
+    """Summarize the curves of each group by their median and quantile envelope at every sample size."""
+    lower, upper = ENVELOPE_QUANTILES
+    grouped = data.groupby([group_by, 'kind', 'n'])['y']
+    summary = grouped.quantile([lower, 0.5, upper]).unstack()
+    summary.columns = ['y-lower', 'y', 'y-upper']
+    summary['curves'] = grouped.size()
+    summary = summary.reset_index()
+    summary['y-std'] = 0.0
+    summary['id'] = summary[group_by]
+    return summary
+
+def create_chart(data: pd.DataFrame, selected_categories: Dict[str, List[str]]) -> alt.Chart:
     color_scale = alt.Scale(scheme='tableau20')
 
     # Add a selection for highlighting on hover
@@ -115,25 +248,37 @@ def create_chart(data: pd.DataFrame, selected_categories: Dict[str, List[str]])
         y=alt.Y('y:Q', 
                 title='Performance Metric'),
         color=alt.Color('id:N', scale=color_scale, legend=None),
-        tooltip=list(selected_categories.keys()) + ['n', 'y', 'y-std'] 
+        tooltip=[col for col in list(selected_categories.keys()) + ['curves'] if col in data.columns] + ['n', 'y', 'y-std']
     )
 
+    observed = alt.datum.kind == 'observed'
+    extrapolated = alt.datum.kind == 'extrapolated'
+    # precomputed prediction intervals of extrapolations, or envelopes of summarized curves
+    has_interval = alt.expr.isValid(alt.datum['y-lower'])
+
     # Create lines with highlighting
     lines = base.mark_line(strokeWidth=2).encode(
         opacity=alt.condition(highlight, alt.value(1), alt.value(0.5)),
         size=alt.condition(highlight, alt.value(3), alt.value(2))
-    ).add_selection(highlight)
+    ).transform_filter(observed).add_selection(highlight)
 
     # Create error bars
     error_bars = base.mark_errorbar(thickness=2, ticks=True).encode(
         y='y_min:Q',
         y2='y_max:Q'
-    ).transform_calculate(
+    ).transform_filter(observed & (alt.datum['y-std'] > 0)).transform_calculate(
         y_min="datum.y - datum['y-std']",
         y_max="datum.y + datum['y-std']"
     )
 
-    chart = (error_bars + lines).properties(width=700, height=400)
+    # Create precomputed extrapolations and envelopes: interval and point fit
+    bands = base.mark_area(opacity=0.15).encode(
+        y='y-lower:Q',
+        y2='y-upper:Q'
+    ).transform_filter(has_interval)
+    fits = base.mark_line(strokeWidth=1, strokeDash=[4, 2]).transform_filter(extrapolated)
+
+    chart = (bands + fits + error_bars + lines).properties(width=700, height=400)
 
     legend_data = pd.DataFrame({'id': data['id'].unique()}).sort_values('id')
     legend = alt.Chart(legend_data).mark_square(size=100).encode(
@@ -164,23 +309,62 @@ def create_chart(data: pd.DataFrame, selected_categories: Dict[str, List[str]])
         titleFontSize=14
     )
 
+def select_categories(options: pd.DataFrame) -> Dict[str, List[str]]:
+    st.sidebar.header("Filters")
+    return {
+        col: st.sidebar.multiselect(f"Select [{col}]", options[col].unique().tolist(), default=options[col].unique().tolist())
+        for col in CATEGORY_COLUMNS
+    }
+
 def main():
     st.title("Interactive ESCE Viewer")
 
-    available_results = get_available_results()
-    results_metadata = read_results_metadata(available_results)
-    data = load_data(results_metadata)
+    index_files = get_index_files()
+    if index_files:
+        # only the curve keys are read to populate the filters, and the selected curves are
+        # filtered while reading the indices
+        version = tuple(file_version(f) for f in index_files)
+        categories = load_index_categories(tuple(index_files), version)
+        if categories.empty:
+            st.warning("No data available for plotting.")
+            return
+        selected_categories = select_categories(categories)
+        selection = tuple((col, tuple(values)) for col, values in selected_categories.items())
+        data = load_data_from_index(tuple(index_files), version, selection)
+    else:
+        if os.path.exists(RESULTS_STORE):
+            version = (file_version(RESULTS_STORE), file_version(f"{RESULTS_STORE}-wal"))
+            data = load_cached_data_from_store(RESULTS_STORE, version)
+        else:
+            data = get_results_index().refresh()
+        if data.empty:
+            st.warning("No data available for plotting.")
+            return
+        selected_categories = select_categories(data)
 
     if data.empty:
-        st.warning("No data available for plotting.")
+        st.warning("No data matches the selected filters.")
         return
 
-    st.sidebar.header("Filters")
-    category_columns = ['dataset', 'features', 'target', 'model', 'confound-correction-method', 'confound-correction-cni', 'balanced','quantile-transform', 'grid']
-    selected_categories = {
-        col: st.sidebar.multiselect(f"Select [{col}]", data[col].unique().tolist(), default=data[col].unique().tolist())
-        for col in category_columns
-    }
+    if not st.sidebar.checkbox("Show extrapolations", value=True):
+        data = data[data['kind'] != 'extrapolated']
+
+    # Bound the size of the chart sent to the browser: beyond a number of curves, only show the
+    # best curves or the envelopes of groups of curves, until the filters select fewer curves
+    data = filter_data(data, selected_categories)
+    st.sidebar.header("Level of detail")
+    max_curves = st.sidebar.number_input("Maximum number of detailed curves", min_value=1, value=MAX_DETAILED_CURVES)
+    n_curves = data['id'].nunique()
+    if n_curves > max_curves:
+        summary = st.sidebar.radio("Summary", ["Best curves", "Quantile envelopes"])
+        if summary == "Best curves":
+            data = top_curves(data, max_curves)
+            st.info(f"Showing the {max_curves} best of {n_curves} selected curves. Narrow the filters to see all curves.")
+        else:
+            group_by = st.sidebar.selectbox("Group curves by", CATEGORY_COLUMNS, index=CATEGORY_COLUMNS.index('model'))
+            data = summarize_curves(data, group_by)
+            low, high = ENVELOPE_QUANTILES
+            st.info(f"Showing the median and {low:.0%}-{high:.0%} envelope of {n_curves} selected curves per {group_by}. Narrow the filters to see all curves.")
 
     chart = create_chart(data, selected_categories)
     st.altair_chart(chart, use_container_width=True)
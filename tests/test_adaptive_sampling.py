@@ -0,0 +1,102 @@
+"""
+test_adaptive_sampling.py
+=========================
+
+This module contains unit tests for the adaptive choice of sample sizes.
+
+Test Summary:
+1. test_stop_when_converged: Tests that larger sample sizes are skipped once the extrapolated asymptote has converged.
+2. test_continue_until_enough_sizes: Tests that sample sizes are added while the power law cannot be fitted.
+3. test_stop_at_budget: Tests that larger sample sizes are skipped once they are predicted to exceed the budget.
+4. test_sequential_seeds: Tests that seeds are added until the standard error of the sample size is below the tolerance.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from workflow.scripts.adaptive_sampling import adapt_sample_sizes, adapt_seeds, decide_next_size, predict_cost, size_costs
+
+SAMPLE_SIZES = [100, 200, 400, 800, 1600, 3200]
+
+
+def curve_scores(sample_sizes: list, seeds: int = 5, noise: float = 0.0, wall: float = 0.0) -> pd.DataFrame:
+    """Score rows of two hyperparameter combinations following a power law with asymptote 0.8."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in sample_sizes:
+        for s in range(seeds):
+            score = 0.8 - 2 * n ** -0.5 + noise * rng.standard_normal()
+            for alpha, offset in ((1.0, 0.0), (10.0, -0.1)):
+                row = {"alpha": alpha, "r2_val": score + offset, "r2_test": score + offset, "n": n, "s": s}
+                if wall:
+                    row["time_fit_wall"] = wall * n / 100
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_stop_when_converged(tmp_path: Path):
+    """Test that larger sample sizes are skipped once the extrapolated asymptote has converged."""
+    df = curve_scores(SAMPLE_SIZES, noise=1e-4)
+    path = tmp_path / "scores.csv"
+    df.to_csv(path, index=False)
+
+    decision = adapt_sample_sizes([str(path)], str(tmp_path / "decision.json"), 3200, 6400, tolerance=0.01)
+    assert not decision["continue"] and decision["reason"] == "converged"
+    assert abs(decision["asymptote"] - 0.8) < 0.01
+    with open(tmp_path / "decision.json") as f:
+        assert json.load(f) == decision
+
+    decision = decide_next_size(df, 3200, 6400, tolerance=1e-9)
+    assert decision["continue"], "Changes of the asymptote above the tolerance should continue"
+
+
+def test_continue_until_enough_sizes():
+    """Test that sample sizes are added while the power law cannot be fitted."""
+    decision = decide_next_size(curve_scores(SAMPLE_SIZES[:3]), 400, 800, tolerance=0.01)
+    assert decision["continue"] and np.isnan(decision["asymptote"])
+
+    assert not decide_next_size(curve_scores(SAMPLE_SIZES[:3]), 800, 1600, tolerance=0.01)["continue"], (
+        "Sizes without scores (insufficient samples) should stop"
+    )
+    assert not decide_next_size(curve_scores(SAMPLE_SIZES), 3200, None, tolerance=0.01)["continue"]
+
+
+def test_stop_at_budget():
+    """Test that larger sample sizes are skipped once they are predicted to exceed the budget."""
+    df = curve_scores(SAMPLE_SIZES[:2], wall=1.0)
+    costs = pd.Series({100: 10.0, 200: 40.0})
+    assert np.isclose(predict_cost(costs, 400), 160.0), "Costs should be extrapolated with a power law in n"
+    assert np.isclose(predict_cost(costs.iloc[:1], 400), 40.0), "A single size should scale linearly"
+
+    # 10 rows at 1 s and 10 rows at 2 s were spent, 10 rows at 4 s are predicted for the next size
+    decision = decide_next_size(df, 200, 400, budget=80)
+    assert decision["continue"] and np.isclose(decision["cost"], 30) and np.isclose(decision["next_cost"], 40)
+    decision = decide_next_size(df, 200, 400, budget=60)
+    assert not decision["continue"] and decision["reason"] == "budget"
+    assert decide_next_size(curve_scores(SAMPLE_SIZES[:2]), 200, 400, budget=50)["continue"], (
+        "The budget should be ignored without profiled fits"
+    )
+    reused = pd.concat([df, df.assign(time_fit_wall=100.0, reused=True)], ignore_index=True)
+    assert size_costs(reused).equals(size_costs(df)), "Reused rows should not count towards the costs"
+
+
+def test_sequential_seeds(tmp_path: Path):
+    """Test that seeds are added until the standard error of the sample size is below the tolerance."""
+    noisy, stable = tmp_path / "noisy.csv", tmp_path / "stable.csv"
+    curve_scores([100], seeds=3, noise=0.1).to_csv(noisy, index=False)
+    curve_scores([100], seeds=3, noise=0.001).to_csv(stable, index=False)
+    decision_path = str(tmp_path / "decision.json")
+
+    decision = adapt_seeds([str(noisy)], decision_path, 100, 3, 10, tolerance=0.01)
+    assert decision["continue"] and decision["sem"] > 0.01
+    decision = adapt_seeds([str(stable)], decision_path, 100, 3, 10, tolerance=0.01)
+    assert not decision["continue"] and decision["reason"] == "converged"
+    with open(decision_path) as f:
+        assert json.load(f) == decision
+
+    assert not adapt_seeds([str(noisy)], decision_path, 100, 10, 10, tolerance=0.01)["continue"], (
+        "No seeds should be added beyond the configured seeds"
+    )
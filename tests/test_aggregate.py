@@ -14,6 +14,7 @@ The tests cover the following scenarios:
 5. Handling duplicate maximum scores
 6. Testing with varying numbers of input files
 7. Testing reproducibility
+8. Carrying the costs of profiled fits through
 """
 
 import pandas as pd
@@ -227,4 +228,40 @@ class TestAggregate:
         stats1 = pd.read_csv(stats_path1)
         stats2 = pd.read_csv(stats_path2)
 
-        pd.testing.assert_frame_equal(stats1, stats2, "Results are not reproducible")
\ No newline at end of file
+        pd.testing.assert_frame_equal(stats1, stats2, "Results are not reproducible")
+
+    def test_aggregate_profiled_costs(self, tmpdir: Path, write_data_to_file: Callable) -> None:
+        """
+        Test that the aggregate function carries the costs of profiled fits through.
+
+        This test verifies that:
+        1. The timings and peak RSS of the best rows are kept
+        2. The timings summed over the grid and the maximal peak RSS are added per sample size and seed
+        3. Rows reused from earlier jobs are not counted
+
+        Args:
+            tmpdir: Pytest fixture for temporary directory.
+            write_data_to_file: Fixture to write data to a file.
+        """
+        scores = {
+            "n": [100, 100, 200, 200, 200],
+            "s": [42, 42, 42, 42, 42],
+            "r2_val": [0.8, 0.7, 0.9, 0.95, 0.5],
+            "alpha": [1.0, 10.0, 1.0, 10.0, 100.0],
+            "time_fit_wall": [1.0, 2.0, 3.0, 4.0, 50.0],
+            "time_fit_cpu": [1.5, 2.5, 3.5, 4.5, 50.0],
+            "peak_rss_mb": [100.0, 120.0, 130.0, 125.0, 500.0],
+            "reused": [False, False, False, False, True],
+        }
+        scores_path = write_data_to_file(pd.DataFrame(scores), 'csv', tmpdir / "scores.csv")
+        stats_path = str(tmpdir / "stats.csv")
+
+        aggregate([str(scores_path)], stats_path)
+
+        stats = pd.read_csv(stats_path).set_index("n")
+        assert stats.loc[100, "time_fit_wall"] == 1.0, "Timings of the best row should be kept"
+        assert stats.loc[200, "peak_rss_mb"] == 125.0, "Peak RSS of the best row should be kept"
+        assert stats.loc[100, "grid_time_fit_wall"] == 3.0, "Timings should be summed over the grid"
+        assert stats.loc[200, "grid_time_fit_cpu"] == 8.0, "Timings should be summed over the grid"
+        assert stats.loc[200, "grid_peak_rss_mb"] == 130.0, "The maximal peak RSS of the grid should be added"
+        assert (stats["grid_size"] == 2).all(), "The number of profiled rows should be added"
@@ -0,0 +1,85 @@
+"""
+test_cost_model.py
+==================
+
+This module contains unit tests for the cost model of fit jobs.
+
+Test Summary:
+1. test_read_profiled_fits: Tests reading the profiled rows of fit score files, skipping unprofiled and empty files.
+2. test_fit_cost_model: Tests learning runtime and memory from profiled fits and predicting the costs of fit jobs.
+3. test_job_scheduling: Tests the priorities and memory requests derived from predicted costs.
+"""
+
+import itertools
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from workflow.scripts.cost_model import CostModel, fit_cost_model, job_mem_mb, job_priority, read_profiled_fits
+
+
+def profiled_fits() -> pd.DataFrame:
+    """Profiled fits with runtime 1e-4 * n^1.5 * C and memory 100 + n / 10 MiB."""
+    rows = []
+    for n, p, C in itertools.product([100, 1000, 10000], [10, 100], [0.1, 1.0, 10.0]):
+        rows.append({
+            "model": "svm", "dataset": "data", "features": f"f{p}", "n": n, "n_features": p,
+            "runtime": 1e-4 * n ** 1.5 * C, "peak_rss_mb": 100 * (n / 100) ** 0.2, "C": C,
+        })
+    rows.append({"model": "mean", "dataset": "data", "features": "f10", "n": 100, "n_features": 10,
+                 "runtime": 0.01, "peak_rss_mb": 90.0, "C": np.nan})
+    return pd.DataFrame(rows)
+
+
+def test_read_profiled_fits(tmp_path: Path):
+    """Test reading the profiled rows of fit score files, skipping unprofiled and empty files."""
+    fits_dir = tmp_path / "results" / "data" / "fits"
+    (fits_dir / "ridge-reg").mkdir(parents=True)
+    profiled = fits_dir / "ridge-reg" / "pixel_digits_none_none_False_False_100_0_default.csv"
+    pd.DataFrame({
+        "r2_val": [0.5, 0.6, 0.7], "alpha": [1.0, 10.0, 100.0], "n": [100, 100, 100], "s": [0, 0, 0],
+        "time_fit_wall": [1.0, 2.0, np.nan], "time_fit_cpu": [1.0, 2.0, np.nan], "time_load_wall": [0.5, 0.5, np.nan],
+        "time_load_cpu": [0.1, 0.1, np.nan], "peak_rss_mb": [100.0, 110.0, np.nan], "n_features": [784, 784, 784],
+        "hp_transferred_from": [50, 50, 50], "reused": [False, False, True],
+    }).to_csv(profiled, index=False)
+    unprofiled = fits_dir / "ridge-reg" / "pixel_digits_none_none_False_False_200_0_default.csv"
+    pd.DataFrame({"r2_val": [0.5], "alpha": [1.0], "n": [200], "s": [0]}).to_csv(unprofiled, index=False)
+    empty = fits_dir / "ridge-reg" / "pixel_digits_none_none_False_False_10_0_default.csv"
+    empty.touch()
+
+    fits = read_profiled_fits([str(profiled), str(unprofiled), str(empty)])
+
+    assert len(fits) == 2
+    assert set(fits.columns) == {"model", "dataset", "features", "n", "n_features", "runtime", "peak_rss_mb", "alpha"}
+    assert (fits["model"] == "ridge-reg").all() and (fits["dataset"] == "data").all() and (fits["features"] == "pixel").all()
+    assert fits["runtime"].tolist() == [1.5, 2.5]
+
+
+def test_fit_cost_model(tmp_path: Path):
+    """Test learning runtime and memory from profiled fits and predicting the costs of fit jobs."""
+    spec = fit_cost_model(profiled_fits())
+    path = tmp_path / "cost_model.json"
+    with open(path, "w") as f:
+        json.dump(spec, f)
+    model = CostModel.load(str(path))
+
+    runtime, memory = model.predict_job("svm", 32768, {"C": [1.0, 10.0]}, "data", "f10")
+    assert np.isclose(runtime, 1e-4 * 32768 ** 1.5 * 11.0, rtol=1e-6), "Runtimes of the grid points should be summed"
+    assert np.isclose(memory, 100 * 327.68 ** 0.2, rtol=1e-6), "Memory should be the maximum of the grid points"
+    # unknown feature sets and hyperparameters missing from the grid use their mean
+    assert model.predict_job("svm", 100, {}, "other", "features") is not None
+    assert np.allclose(model.predict_job("mean", 100, {}, "data", "f10"), (0.01, 90.0))
+    assert model.predict_job("unknown", 100, {}) is None
+    assert spec["n_features"] == {"data/f10": 10.0, "data/f100": 100.0}
+
+
+def test_job_scheduling(tmp_path: Path):
+    """Test the priorities and memory requests derived from predicted costs."""
+    assert job_priority(None) == 0
+    assert job_priority(0.1) == 0
+    assert job_priority(10.0) < job_priority(1000.0) < job_priority(100000.0)
+    assert job_mem_mb(1000.0) == 1250
+    assert job_mem_mb(1000.0, attempt=2) == 2500
+    assert CostModel.load(str(tmp_path / "missing.json")) is None
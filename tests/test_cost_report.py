@@ -0,0 +1,73 @@
+"""
+test_cost_report.py
+===================
+
+This module contains unit tests for the cost report of profiled fits.
+
+Test Summary:
+1. test_cost_report: Tests breaking down the costs of aggregated score files by model and sample size.
+2. test_cost_report_without_profiling: Tests that an empty report is written if no fits were profiled.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from workflow.scripts.cost_report import cost_report
+
+
+def write_scores(path: Path, scores: dict) -> str:
+    """Write an aggregated score file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(scores).to_csv(path, index=False)
+    return str(path)
+
+
+def test_cost_report(tmp_path: Path):
+    """Test breaking down the costs of aggregated score files by model and sample size."""
+    profiled = {
+        "n": [100, 100, 200],
+        "s": [0, 1, 0],
+        "r2_val": [0.5, 0.6, 0.7],
+        "grid_time_fit_wall": [1.0, 3.0, 10.0],
+        "grid_time_fit_cpu": [2.0, 4.0, 20.0],
+        "grid_time_load_wall": [0.5, 0.5, 1.0],
+        "grid_time_load_cpu": [0.5, 0.5, 1.0],
+        "grid_peak_rss_mb": [100.0, 150.0, 300.0],
+        "grid_size": [2, 2, 2],
+    }
+    paths = [
+        write_scores(tmp_path / "scores" / "ridge-reg" / "a.csv", profiled),
+        write_scores(tmp_path / "scores" / "ridge-reg" / "b.csv", {**profiled, "grid_time_fit_wall": [3.0, 5.0, 10.0]}),
+        write_scores(tmp_path / "scores" / "ols-reg" / "a.csv", profiled),
+        # split whose scores were all reused from earlier jobs
+        write_scores(tmp_path / "scores" / "ridge-reg" / "c.csv", {
+            "n": [100, 200], "s": [2, 2], "r2_val": [0.5, 0.7], "grid_time_fit_wall": [float("nan"), 10.0],
+            "grid_time_fit_cpu": [float("nan"), 20.0], "grid_time_load_wall": [float("nan"), 1.0],
+            "grid_time_load_cpu": [float("nan"), 1.0], "grid_peak_rss_mb": [float("nan"), 300.0],
+            "grid_size": [float("nan"), 2],
+        }),
+        write_scores(tmp_path / "scores" / "mean-reg" / "a.csv", {"n": [100], "s": [0], "r2_val": [0.0]}),
+    ]
+    (tmp_path / "scores" / "mean-reg" / "empty.csv").touch()
+    paths.append(str(tmp_path / "scores" / "mean-reg" / "empty.csv"))
+    report_path = tmp_path / "cost_report.csv"
+
+    cost_report(paths, str(report_path))
+
+    report = pd.read_csv(report_path).set_index(["model", "n"])
+    assert list(report.index) == [("ols-reg", 100), ("ols-reg", 200), ("ridge-reg", 100), ("ridge-reg", 200)]
+    assert report.loc[("ridge-reg", 100), "splits"] == 4, "Splits without costs should be skipped"
+    assert report.loc[("ridge-reg", 100), "grid_time_fit_wall"] == 3.0
+    assert report.loc[("ridge-reg", 100), "grid_wall"] == 3.5
+    assert report.loc[("ridge-reg", 200), "grid_cpu"] == 21.0
+    assert report.loc[("ols-reg", 100), "peak_rss_mb"] == 150.0
+
+
+def test_cost_report_without_profiling(tmp_path: Path):
+    """Test that an empty report is written if no fits were profiled."""
+    path = write_scores(tmp_path / "scores" / "ridge-reg" / "a.csv", {"n": [100], "s": [0], "r2_val": [0.5]})
+    report_path = tmp_path / "cost_report.csv"
+
+    assert cost_report([path], str(report_path)).empty
+    assert report_path.exists() and report_path.stat().st_size == 0
@@ -22,6 +22,12 @@ Test Summary:
 13. test_extrapolate_output_completeness: Tests that the extrapolate function output contains all required fields.
 14. test_extrapolate_reproducibility: Tests that the extrapolate function produces consistent results with a fixed random seed.
 15. test_extrapolate_bootstrap_file_contents: Tests that the extrapolate function writes bootstrap results to a file and verify the contents of the bootstrap file.
+16. test_bootstrap_means: Tests the vectorized bootstrap resampling against per-repetition reductions.
+17. test_fit_curve_batch: Tests that batched replicate fits match individual curve fits.
+18. test_solve_power_law: Tests the power law solver against generic non-linear least squares.
+19. test_extrapolate_adaptive_bootstrap: Tests that adaptive bootstrapping stops early and records the repetitions used.
+20. test_extrapolate_batch: Tests that batch extrapolation with a worker pool matches individual extrapolation.
+21. test_extrapolate_prediction_bands: Tests the prediction bands written next to the extrapolation results.
 
 The tests use pytest fixtures and mocking to create controlled test environments.
 """
@@ -35,7 +41,9 @@ from unittest.mock import patch
 import os
 from unittest.mock import mock_open, patch
 
-from workflow.scripts.extrapolate import extrapolate, MIN_DOF, fit_curve, power_law_model
+from workflow.scripts.extrapolate import (
+    extrapolate, extrapolate_batch, MIN_DOF, bootstrap_means, fit_curve, fit_curve_batch, power_law_model, solve_power_law
+)
 
 @pytest.fixture
 def stats_df():
@@ -219,15 +227,15 @@ def test_fit_curve_failure():
     assert np.isnan(result["p_mean"]).all(), "p_mean should be NaN when fitting fails"
     assert np.isnan(result["r2"]), "R² should be NaN when fitting fails"
 
-@patch('workflow.scripts.extrapolate.scipy.optimize.curve_fit')
-def test_fit_curve_exception(mock_curve_fit):
+@patch('workflow.scripts.extrapolate.solve_power_law')
+def test_fit_curve_exception(mock_solve_power_law):
     """
     Test the fit_curve function when an exception is raised.
     
     Args:
-        mock_curve_fit: Mocked curve_fit function.
+        mock_solve_power_law: Mocked power law solver.
     """
-    mock_curve_fit.side_effect = RuntimeError("Curve fitting failed")
+    mock_solve_power_law.side_effect = RuntimeError("Curve fitting failed")
     
     x = np.array([10, 20, 30, 40, 50])
     y = np.array([0.9, 0.85, 0.82, 0.8, 0.79])
@@ -252,12 +260,11 @@ def test_extrapolate_bootstrap_failure(tmpdir, stats_df):
     
     stats_df.to_csv(stats_path, index=False)
     
-    with patch('workflow.scripts.extrapolate.fit_curve') as mock_fit_curve:
-        # Make fit_curve fail 95% of the time during bootstrap
-        mock_fit_curve.side_effect = lambda *args, **kwargs: (
-            {"p_mean": np.array([np.nan, np.nan, np.nan])} if np.random.random() < 0.95
-            else {"p_mean": np.array([1.0, 1.0, 1.0])}
-        )
+    with patch('workflow.scripts.extrapolate.fit_curve_batch') as mock_fit_curve_batch:
+        # Make the bootstrap fits fail 95% of the time
+        mock_fit_curve_batch.side_effect = lambda x, y, *args, **kwargs: np.where(
+            np.random.random((len(y), 1)) < 0.95, np.nan, 1.0
+        ) * np.ones((len(y), 3))
         
         extrapolate(str(stats_path), str(extra_path), str(bootstrap_path), repeats=100)
     
@@ -411,4 +418,137 @@ def test_extrapolate_bootstrap_file_contents(tmpdir, stats_df):
         assert isinstance(extra_data[key], list), f"{key} should be a list"
         assert len(extra_data[key]) > 0, f"{key} should not be empty"
 
-    print("Bootstrap file contents verified successfully.")
\ No newline at end of file
+    print("Bootstrap file contents verified successfully.")
+
+
+def test_bootstrap_means():
+    """Test the vectorized bootstrap resampling against per-repetition reductions."""
+    samples = [np.array([0.1, 0.2, 0.3, 0.4]), np.array([0.5, 0.7, 0.9]), np.array([0.8])]
+    y_mean, y_sem = bootstrap_means(samples, 50, np.random.default_rng(0))
+
+    assert y_mean.shape == (50, 3) and y_sem.shape == (50, 3), "One mean and SEM per repetition and sample size expected"
+    assert np.all((y_mean[:, 0] >= 0.1) & (y_mean[:, 0] <= 0.4)), "Resampled means should lie within the sample range"
+    assert np.allclose(y_mean[:, 2], 0.8), "A single sample should always be resampled to itself"
+    assert np.isnan(y_sem[:, 2]).all(), "The SEM of a single sample should be NaN"
+
+    # The same generator state should draw the same resamples as a per-repetition loop
+    rng = np.random.default_rng(0)
+    for values, means, sems in zip(samples[:2], y_mean.T, y_sem.T):
+        resamples = values[rng.integers(0, len(values), size=(50, len(values)))]
+        np.testing.assert_allclose(means, resamples.mean(axis=1))
+        np.testing.assert_allclose(sems, [pd.Series(r).sem() for r in resamples])
+
+def test_fit_curve_batch():
+    """Test that batched replicate fits match individual curve fits."""
+    x = np.array([10, 20, 30, 40, 50])
+    rng = np.random.default_rng(0)
+    y = power_law_model(x, -0.5, 0.5, 0.9) + rng.normal(0, 0.005, size=(20, len(x)))
+    y_e = np.full_like(y, 0.01)
+
+    p = fit_curve_batch(x, y, y_e)
+
+    assert p.shape == (20, 3), "One parameter set per replicate expected"
+    for y_i, p_i in zip(y, p):
+        np.testing.assert_allclose(p_i, fit_curve(x, y_i, y_e[0])["p_mean"])
+    assert np.isnan(fit_curve_batch(x[:3], y[:, :3], y_e[:, :3])).all(), "Insufficient data should yield NaN parameters"
+
+def test_solve_power_law():
+    """Test the power law solver against generic non-linear least squares."""
+    from scipy.optimize import curve_fit
+
+    x = np.array([128, 256, 512, 1024, 2048, 4096])
+    rng = np.random.default_rng(1)
+    y = np.vstack([
+        power_law_model(x, -2.0, 0.4, 0.8) + rng.normal(0, 0.01, size=(50, len(x))),
+        np.linspace(0.5, 0.4, len(x)),  # decreasing scores, the amplitude bound is active
+        np.full(len(x), 0.7),  # constant scores
+    ])
+
+    p = solve_power_law(x, y)
+
+    assert np.isfinite(p).all(), "The solver should not fail on any replicate"
+    assert (p[:, 0] <= 0).all() and (p[:, 1] >= 0).all(), "Parameter bounds should be respected"
+    for y_i, p_i in zip(y, p):
+        cost = np.sum((power_law_model(x, *p_i) - y_i) ** 2)
+        try:
+            p_ref, _ = curve_fit(
+                power_law_model, x, y_i, maxfev=5000, p0=(-1, 0.1, 0.5), bounds=((-np.inf, 0, -np.inf), (0, np.inf, np.inf))
+            )
+        except RuntimeError:
+            continue
+        cost_ref = np.sum((power_law_model(x, *p_ref) - y_i) ** 2)
+        assert cost <= cost_ref + 1e-9, "The solver should fit at least as well as curve_fit"
+    np.testing.assert_allclose(p[-1], [0, p[-1, 1], 0.7], atol=1e-12)
+
+    # Decay rates beyond the coarse grid are found by extending it
+    x_steep = np.array([100, 150, 200, 300, 400, 600])
+    y_steep = 0.8 - 0.3 * (x_steep / 100.0) ** -30
+    p_steep = solve_power_law(x_steep, y_steep)[0]
+    assert np.isclose(p_steep[1], 30, rtol=1e-3), "Decay rates above the largest grid point should be fitted"
+    np.testing.assert_allclose(power_law_model(x_steep, *p_steep), y_steep, atol=1e-9)
+    p_step = solve_power_law(x_steep, np.array([0.5, 0.8, 0.8, 0.8, 0.8, 0.8]))[0]
+    assert np.isfinite(p_step).all(), "A step should be fitted by the steepest representable power law"
+
+def test_extrapolate_adaptive_bootstrap(tmpdir, stats_df):
+    """Test that adaptive bootstrapping stops early and records the repetitions used."""
+    stats_path = Path(tmpdir) / "stats.csv"
+    stats_df.to_csv(stats_path, index=False)
+
+    results = {}
+    for name, kwargs in [("fixed", {}), ("adaptive", {"tolerance": 0.1, "batch_size": 100}), ("capped", {"tolerance": 1e-9, "batch_size": 100})]:
+        extra_path = Path(tmpdir) / f"{name}.json"
+        bootstrap_path = Path(tmpdir) / f"{name}.bootstrap.json"
+        extrapolate(str(stats_path), str(extra_path), str(bootstrap_path), repeats=2000, **kwargs)
+        with open(extra_path) as f:
+            results[name] = json.load(f)
+        with open(bootstrap_path) as f:
+            assert len(json.load(f)) <= results[name]["bootstrap_repetitions"]
+
+    assert results["fixed"]["bootstrap_repetitions"] == 2000, "Without a tolerance all repetitions should be used"
+    assert 200 <= results["adaptive"]["bootstrap_repetitions"] < 2000, "Stable percentiles should stop the bootstrap early"
+    assert results["adaptive"]["bootstrap_repetitions"] % 100 == 0, "Repetitions should be added in batches"
+    assert results["capped"]["bootstrap_repetitions"] == 2000, "The number of repetitions should be capped"
+    for key in ["y_bootstrap_025", "y_bootstrap_975"]:
+        np.testing.assert_allclose(results["adaptive"][key], results["fixed"][key], atol=0.02)
+
+def test_extrapolate_batch(tmpdir, stats_df):
+    """Test that batch extrapolation with a worker pool matches individual extrapolation."""
+    stats_paths, extra_paths, bootstrap_paths = [], [], []
+    for i in range(3):
+        stats_path = Path(tmpdir) / f"stats{i}.csv"
+        stats_df.assign(r2_test=stats_df["r2_test"] - 0.01 * i).to_csv(stats_path, index=False)
+        stats_paths.append(str(stats_path))
+        extra_paths.append(str(Path(tmpdir) / f"extra{i}.json"))
+        bootstrap_paths.append(str(Path(tmpdir) / f"bootstrap{i}.json"))
+
+    extrapolate_batch(stats_paths, extra_paths, bootstrap_paths, workers=2, repeats=100)
+
+    for stats_path, extra_path in zip(stats_paths, extra_paths):
+        single_path = Path(tmpdir) / "single.json"
+        extrapolate(stats_path, str(single_path), str(Path(tmpdir) / "single.bootstrap.json"), repeats=100)
+        with open(extra_path) as f1, open(single_path) as f2:
+            assert json.load(f1) == json.load(f2), "Batch results should match individual results"
+
+def test_extrapolate_prediction_bands(tmpdir, stats_df):
+    """Test the prediction bands written next to the extrapolation results."""
+    stats_path = Path(tmpdir) / "stats.csv"
+    extra_path = Path(tmpdir) / "extra.json"
+    bootstrap_path = Path(tmpdir) / "bootstrap.json"
+    bands_path = Path(tmpdir) / "bands.npz"
+    stats_df.to_csv(stats_path, index=False)
+
+    extrapolate(str(stats_path), str(extra_path), str(bootstrap_path), repeats=100, bands_path=str(bands_path), extrapolate_to=100000)
+
+    with open(extra_path) as f:
+        result = json.load(f)
+    with np.load(bands_path) as bands:
+        assert set(bands.files) == {"n", "fit", "median", "lower", "upper"}
+        assert bands["n"][0] == pytest.approx(10) and bands["n"][-1] == pytest.approx(100000, rel=1e-6)
+        assert np.all(bands["lower"] <= bands["median"]) and np.all(bands["median"] <= bands["upper"])
+        np.testing.assert_allclose(bands["fit"], power_law_model(bands["n"].astype(float), *result["p_mean"]), rtol=1e-5)
+
+    # Without sufficient data, the bands are written with NaN values
+    stats_df[stats_df["n"] <= 20].to_csv(stats_path, index=False)
+    extrapolate(str(stats_path), str(extra_path), str(bootstrap_path), repeats=100, bands_path=str(bands_path), extrapolate_to=100000)
+    with np.load(bands_path) as bands:
+        assert np.isnan(bands["median"]).all() and np.isnan(bands["fit"]).all()
@@ -20,6 +20,11 @@ Test Summary:
 10. Test Existing Scores Reuse
 11. Test Fit with Confound Correction
 12. Test All Models with Minimal Grid
+13. Test Profiled Fit
+14. Test Successive Halving
+15. Test Hyperparameter Transfer
+16. Test Sampled Search
+17. Test Profiled Fit with Reused Scores
 """
 
 import json
@@ -39,7 +44,11 @@ from workflow.scripts.fit_model import (
     RegressionModel,
     fit,
     BaseModel,
-    MODELS
+    MODELS,
+    PROFILED_PHASES,
+    expand_windows,
+    halving_rungs,
+    transfer_windows,
 )
 
 # 1. Test Model Fitting
@@ -517,4 +526,262 @@ def test_all_models_minimal_grid(generate_synth_data, create_dataset, tmp_path,
         mse_range = max(mse_values) - min(mse_values)
         assert mse_range < 1e6, f"MSE values vary too much across sets for {model_name}: {dict(zip(mse_cols, mse_values))}"
 
-    print(f"Model {model_name} passed all checks.")
\ No newline at end of file
+    print(f"Model {model_name} passed all checks.")
+
+# 13. Test Profiled Fit
+
+def test_profiled_fit(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    """Test that profiled fits record the time of each phase and the peak RSS."""
+    X, y, confounds = generate_synth_data(n_samples=100, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 60)),
+            "idx_val": list(range(60, 80)),
+            "idx_test": list(range(80, 100)),
+            "samplesize": 100,
+            "seed": 42,
+        }, f)
+
+    def fit_scores(profile: bool) -> pd.DataFrame:
+        return fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(split_path),
+            str(tmp_path / f"scores_{profile}.csv"),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": [0.1, 10.0]}},
+            [],
+            "normal",
+            str(dataset['confounds']),
+            profile=profile,
+        )
+
+    timing_columns = [f"time_{phase}_{clock}" for phase in PROFILED_PHASES for clock in ("wall", "cpu")]
+    scores = fit_scores(profile=True)
+    assert set(timing_columns + ["peak_rss_mb"]) <= set(scores.columns)
+    assert (scores[timing_columns] >= 0).all().all()
+    assert (scores["peak_rss_mb"] > 0).all()
+    assert scores["peak_rss_mb"].nunique() == 1, "The peak RSS should be measured once per job"
+    assert (scores["n_features"] == 20).all()
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "scores_True.csv"), scores, check_dtype=False)
+
+    scores = fit_scores(profile=False)
+    assert not [c for c in scores.columns if c.startswith("time_") or c == "peak_rss_mb"]
+
+# 14. Test Successive Halving
+
+def test_successive_halving(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    """Test that successive halving scores only the promoted hyperparameter combinations on the full training set."""
+    assert halving_rungs(27, 900) == [(100, 9), (300, 3)]
+    assert halving_rungs(27, 900, min_train=200) == [(300, 9)], "Rungs below the smallest subset should be skipped"
+    assert halving_rungs(27, 100) == [], "Small training sets should be searched exhaustively"
+    assert halving_rungs(1, 900) == []
+
+    X, y, confounds = generate_synth_data(n_samples=1000, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 600)),
+            "idx_val": list(range(600, 800)),
+            "idx_test": list(range(800, 1000)),
+            "samplesize": 600,
+            "seed": 42,
+        }, f)
+
+    def fit_scores(search: str) -> pd.DataFrame:
+        return fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(split_path),
+            str(tmp_path / f"scores_{search}.csv"),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": [0.0001, 0.001, 0.01, 0.1, 1, 10, 100, 1000, 100000]}},
+            [],
+            "normal",
+            str(dataset['confounds']),
+            score_index_path=str(tmp_path / "index.db"),
+            search=search,
+        )
+
+    grid_scores = fit_scores("grid")
+    halving_scores = fit_scores("halving")
+    assert len(grid_scores) == 9
+    assert len(halving_scores) == 1, "9 combinations should be reduced to 3 on 66 and to 1 on 200 samples"
+    assert halving_scores["alpha"].iloc[0] != 100000, "The worst combination should not be promoted"
+    best = grid_scores.set_index("alpha").loc[halving_scores["alpha"].iloc[0]]
+    assert np.isclose(halving_scores["r2_test"].iloc[0], best["r2_test"]), "Promoted combinations should be scored as in a grid search"
+    assert (halving_scores[["n", "s"]].values == [[600, 42]]).all()
+
+    with pytest.raises(ValueError):
+        fit_scores("annealing")
+
+# 15. Test Hyperparameter Transfer
+
+def test_hp_transfer(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    """Test that only the neighbourhoods of the best hyperparameters at a smaller sample size are searched."""
+    grid = {"alpha": [0.0001, 0.001, 0.01, 0.1, 1, 10, 100, 1000, 10000], "beta": [1]}
+    assert transfer_windows(grid, {"alpha": 1.0, "beta": 1}, 1) == {"alpha": (3, 5), "beta": (0, 0)}
+    assert transfer_windows(grid, {"alpha": 10000, "beta": 1}, 2) == {"alpha": (6, 8), "beta": (0, 0)}
+    windows = {"alpha": (3, 5), "beta": (0, 0)}
+    assert expand_windows(grid, windows, {"alpha": 1, "beta": 1}, 1) == windows
+    assert expand_windows(grid, windows, {"alpha": 0.1, "beta": 1}, 1) == {"alpha": (2, 5), "beta": (0, 0)}
+    assert expand_windows(grid, windows, {"alpha": 0.01, "beta": 1}, 1) == windows, (
+        "Neighbourhoods not containing the best hyperparameters should not be expanded"
+    )
+
+    X, y, confounds = generate_synth_data(n_samples=200, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 120)),
+            "idx_val": list(range(120, 160)),
+            "idx_test": list(range(160, 200)),
+            "samplesize": 120,
+            "seed": 42,
+        }, f)
+    previous_path = tmp_path / "previous.csv"
+
+    def fit_scores(hp_transfer: int, previous_alpha: float, top: int = 1, previous_r2: tuple = (0.2, 0.1)) -> pd.DataFrame:
+        pd.DataFrame({"alpha": [previous_alpha, 10], "r2_val": list(previous_r2), "n": [60, 60], "s": [42, 42]}).to_csv(previous_path, index=False)
+        return fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(split_path),
+            str(tmp_path / f"scores_{hp_transfer}_{previous_alpha}_{top}.csv"),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": grid["alpha"]}},
+            [],
+            "normal",
+            str(dataset['confounds']),
+            hp_transfer=hp_transfer,
+            hp_transfer_path=str(previous_path),
+            hp_transfer_top=top,
+        )
+
+    grid_scores = fit_scores(0, 1000)
+    assert "hp_transferred_from" not in grid_scores.columns
+    best_alpha = grid_scores.loc[grid_scores["r2_val"].idxmax(), "alpha"]
+    assert best_alpha == 0.0001
+
+    transfer_scores = fit_scores(1, 0.001)
+    assert (transfer_scores["hp_transferred_from"] == 60).all()
+    assert sorted(transfer_scores["alpha"]) == [0.0001, 0.001, 0.01], "Only the neighbourhood should be searched"
+
+    transfer_scores = fit_scores(1, 1000)
+    assert transfer_scores["alpha"].is_unique
+    assert transfer_scores.loc[transfer_scores["r2_val"].idxmax(), "alpha"] == best_alpha, (
+        "The neighbourhood should be expanded towards the best hyperparameters"
+    )
+
+    transfer_scores = fit_scores(1, 0.001, top=2)
+    assert sorted(transfer_scores["alpha"]) == [0.0001, 0.001, 0.01, 1, 10, 100], (
+        "The neighbourhoods of the best hyperparameters should be searched together"
+    )
+
+    transfer_scores = fit_scores(1, 0.001, top=2, previous_r2=(np.nan, np.nan))
+    assert (transfer_scores["hp_transferred_from"] == 0).all()
+    assert sorted(transfer_scores["alpha"]) == grid["alpha"], "Fits without finite scores should not be transferred"
+
+# 16. Test Sampled Search
+
+@pytest.mark.parametrize("search", ["random", "bayesian"])
+def test_sampled_search(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path, search: str):
+    """Test that random and Bayesian search score the budget of trials in the format of a grid search."""
+    X, y, confounds = generate_synth_data(n_samples=200, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 120)),
+            "idx_val": list(range(120, 160)),
+            "idx_test": list(range(160, 200)),
+            "samplesize": 120,
+            "seed": 42,
+        }, f)
+    grid = {"ridge-reg": {"alpha": {"log-uniform": [0.0001, 10000]}, "trials": 8}}
+
+    def fit_scores(search: str, name: str) -> pd.DataFrame:
+        return fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(split_path),
+            str(tmp_path / f"scores_{name}.csv"),
+            "ridge-reg",
+            grid,
+            [],
+            "normal",
+            str(dataset['confounds']),
+            search=search,
+        )
+
+    scores = fit_scores(search, "first")
+    assert len(scores) == 8 and scores["alpha"].is_unique
+    assert scores["alpha"].between(0.0001, 10000).all()
+    grid_scores = fit(
+        str(dataset['features']),
+        str(dataset['targets']),
+        str(split_path),
+        str(tmp_path / "scores_grid.csv"),
+        "ridge-reg",
+        {"ridge-reg": {"alpha": [0.1]}},
+        [],
+        "normal",
+        str(dataset['confounds']),
+    )
+    assert list(scores.columns) == list(grid_scores.columns), "Sampled searches should write the same score rows"
+    pd.testing.assert_frame_equal(fit_scores(search, "second"), scores, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        fit_scores("grid", "grid")
+
+# 17. Test Profiled Fit with Reused Scores
+
+def test_profiled_fit_reused_scores(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    """Test that profiled fits flag reused score rows instead of reporting the costs of the job that computed them."""
+    X, y, confounds = generate_synth_data(n_samples=100, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 60)),
+            "idx_val": list(range(60, 80)),
+            "idx_test": list(range(80, 100)),
+            "samplesize": 100,
+            "seed": 42,
+        }, f)
+
+    def fit_scores(name: str, alphas: list, profile: bool) -> pd.DataFrame:
+        return fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(split_path),
+            str(tmp_path / f"{name}.csv"),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": alphas}},
+            [],
+            "normal",
+            str(dataset['confounds']),
+            score_index_path=str(tmp_path / "index.db"),
+            profile=profile,
+        )
+
+    timing_columns = [f"time_{phase}_{clock}" for phase in PROFILED_PHASES for clock in ("wall", "cpu")]
+    fit_scores("unprofiled", [0.1], profile=False)
+    scores = fit_scores("profiled", [0.1, 10.0], profile=True).set_index("alpha")
+    assert scores["reused"].tolist() == [True, False]
+    assert scores.loc[0.1, timing_columns + ["peak_rss_mb"]].isna().all(), "Reused rows should not report costs"
+    assert scores.loc[10.0, timing_columns + ["peak_rss_mb"]].notna().all(), "Computed rows should be profiled"
+
+    scores = fit_scores("reprofiled", [0.1, 10.0], profile=True)
+    assert scores["reused"].all()
+    assert not [c for c in scores.columns if c.startswith("time_") or c == "peak_rss_mb"], \
+        "Costs recorded by earlier jobs should be dropped"
+
+    scores = fit_scores("reused", [0.1, 10.0], profile=False)
+    assert not [c for c in scores.columns if c.startswith("time_") or c in ("peak_rss_mb", "reused")]
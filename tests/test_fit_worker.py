@@ -0,0 +1,110 @@
+"""
+test_fit_worker.py
+==================
+
+This module contains unit tests for the long-running fit worker.
+
+Test Summary:
+1. test_dataset_cache: Tests caching, reloading and eviction of dataset arrays.
+2. test_submit_fit: Tests fitting through a worker started on demand, compared to fitting in-process.
+3. test_fit_in_worker_fallback: Tests fitting in-process if no worker can be reached.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+
+from workflow.scripts import fit_worker
+from workflow.scripts.fit_model import fit
+from workflow.scripts.fit_worker import DatasetCache, fit_in_worker, shutdown_worker, submit_fit
+
+
+@pytest.fixture
+def fit_request(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    X, y, confounds = generate_synth_data(n_samples=100, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump({
+            "idx_train": list(range(0, 60)),
+            "idx_val": list(range(60, 80)),
+            "idx_test": list(range(80, 100)),
+            "samplesize": 100,
+            "seed": 42,
+        }, f)
+
+    return {
+        "features_path": str(dataset['features']),
+        "targets_path": str(dataset['targets']),
+        "split_path": str(split_path),
+        "scores_path": str(tmp_path / "scores.csv"),
+        "model_name": "ridge-reg",
+        "grid": {"ridge-reg": {"alpha": [0.1, 1.0, 10.0]}},
+        "existing_scores_path_list": [],
+        "confound_correction_method": "normal",
+        "cni_path": str(dataset['confounds']),
+    }
+
+
+def test_dataset_cache(tmp_path: Path):
+    """Test caching, reloading and eviction of dataset arrays."""
+    paths = [tmp_path / f"data{i}.h5" for i in range(3)]
+    for i, path in enumerate(paths):
+        with h5py.File(path, "w") as f:
+            f.create_dataset("data", data=np.full((10, 10), i, dtype=np.float64))
+
+    cache = DatasetCache(max_bytes=2 * 800)
+    first = cache(str(paths[0]))
+    assert cache(str(paths[0])) is first, "Unchanged files should not be read again"
+    assert not first.flags.writeable
+
+    with h5py.File(paths[0], "w") as f:
+        f.create_dataset("data", data=np.full((10, 10), 5, dtype=np.float64))
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert (cache(str(paths[0])) == 5).all(), "Changed files should be read again"
+
+    cache(str(paths[1]))
+    cache(str(paths[2]))
+    assert list(cache._arrays) == [str(paths[1]), str(paths[2])], "The least recently used array should be evicted"
+
+
+def test_submit_fit(fit_request, tmp_path: Path):
+    """Test fitting through a worker started on demand, compared to fitting in-process."""
+    address = str(tmp_path / "worker.sock")
+    try:
+        records = submit_fit(fit_request, address=address, processes=1)
+        assert os.path.exists(address)
+        # the second job is served by the running worker from its dataset cache
+        records = submit_fit(fit_request, address=address, processes=1)
+    finally:
+        shutdown_worker(address)
+
+    expected = fit(**{**fit_request, "scores_path": str(tmp_path / "expected.csv")})
+    pd.testing.assert_frame_equal(pd.DataFrame(records), expected)
+    pd.testing.assert_frame_equal(pd.read_csv(fit_request["scores_path"]), pd.read_csv(tmp_path / "expected.csv"))
+
+    with pytest.raises(RuntimeError, match="Invalid model type"):
+        try:
+            submit_fit({**fit_request, "model_name": "unknown-model"}, address=address, processes=1)
+        finally:
+            shutdown_worker(address)
+
+
+def test_fit_in_worker_fallback(fit_request, monkeypatch):
+    """Test fitting in-process if no worker can be reached."""
+    def unavailable(*args, **kwargs):
+        raise TimeoutError("No fit worker")
+
+    monkeypatch.setattr(fit_worker, "submit_fit", unavailable)
+    records = fit_in_worker(fit_request)
+
+    assert len(records) == 3
+    assert Path(fit_request["scores_path"]).stat().st_size > 0
@@ -0,0 +1,86 @@
+"""
+test_index_curves.py
+====================
+
+This module contains unit tests for the columnar index of learning curves.
+
+Test Summary:
+1. test_index_curves: Tests indexing observed and extrapolated points with their curve keys.
+2. test_index_curves_filters: Tests reading the index with column projection and filters on the curve keys.
+3. test_index_curves_empty: Tests that empty statistics files are skipped.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from workflow.scripts.extrapolate import save_bands
+from workflow.scripts.index_curves import index_curves
+
+
+def write_curve(directory: Path, model: str, features: str, bands: bool = True) -> str:
+    """Write the statistics (and optionally the prediction bands) of a learning curve."""
+    stats_path = directory / f"results/dataset1/statistics/{model}/{features}_targets1_none_none_False_False_default.stats.json"
+    stats_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(stats_path, "w") as f:
+        json.dump({"x": [128, 256, 512], "y_mean": [0.5, 0.6, 0.65], "y_std": [0.05, 0.04, np.nan]}, f)
+    if bands:
+        n = np.array([128.0, 1e4, 1e6])
+        save_bands(str(stats_path).replace(".stats.json", ".bands.npz"), {
+            "n": n, "fit": np.array([0.5, 0.7, np.nan]), "lower": n * 0, "median": n * 0, "upper": n * 0 + 1,
+        })
+    return str(stats_path)
+
+
+@pytest.fixture
+def stats_paths(tmp_path: Path):
+    return [
+        write_curve(tmp_path, "ridge-reg", "features-a"),
+        write_curve(tmp_path, "ridge-reg", "features-b", bands=False),
+    ]
+
+
+def test_index_curves(tmp_path: Path, stats_paths):
+    """Test indexing observed and extrapolated points with their curve keys."""
+    index_path = tmp_path / "index.parquet"
+    index_curves(stats_paths, str(index_path))
+
+    df = pq.read_table(index_path).to_pandas()
+    assert len(df) == 3 + 2 + 3, "Extrapolated points without a fit should be dropped"
+    assert set(df["features"]) == {"features-a", "features-b"}
+    assert (df["model"] == "ridge-reg").all() and (df["grid"] == "default").all()
+
+    extrapolated = df[df["kind"] == "extrapolated"]
+    assert (extrapolated["features"] == "features-a").all()
+    np.testing.assert_allclose(extrapolated["y"], [0.5, 0.7])
+    np.testing.assert_allclose(extrapolated["y_upper"], [1, 1])
+    assert df.loc[df["kind"] == "observed", "y_lower"].isna().all()
+
+
+def test_index_curves_filters(tmp_path: Path, stats_paths):
+    """Test reading the index with column projection and filters on the curve keys."""
+    index_path = tmp_path / "index.parquet"
+    index_curves(stats_paths, str(index_path))
+
+    keys = pq.read_table(index_path, columns=["features", "model"]).to_pandas().drop_duplicates()
+    assert len(keys) == 2 and list(keys.columns) == ["features", "model"]
+
+    df = pq.read_table(index_path, filters=[("features", "in", ["features-b"])]).to_pandas()
+    assert len(df) == 3 and (df["features"] == "features-b").all()
+
+
+def test_index_curves_empty(tmp_path: Path):
+    """Test that empty statistics files are skipped."""
+    stats_path = tmp_path / "results/dataset1/statistics/ridge-reg/features-a_targets1_none_none_False_False_default.stats.json"
+    stats_path.parent.mkdir(parents=True)
+    stats_path.touch()
+    index_path = tmp_path / "index.parquet"
+
+    index_curves([str(stats_path)], str(index_path))
+
+    table = pq.read_table(index_path)
+    assert table.num_rows == 0
+    assert "features" in table.column_names and "y_upper" in table.column_names
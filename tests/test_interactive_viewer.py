@@ -0,0 +1,42 @@
+"""
+test_interactive_viewer.py
+==========================
+
+This module contains unit tests for the interactive viewer.
+
+Test Summary:
+1. test_summarized_chart: Tests that the chart of curves summarized by quantile envelopes can be created.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+
+from interactive_viewer import CATEGORY_COLUMNS, create_chart, summarize_curves
+
+
+def test_summarized_chart():
+    """Test that the chart of curves summarized by quantile envelopes can be created."""
+    rows = []
+    for model in ["ridge-reg", "lasso-reg"]:
+        for features in ["features-a", "features-b", "features-c"]:
+            key = {col: "value" for col in CATEGORY_COLUMNS}
+            key.update({"model": model, "features": features})
+            curve_id = f"{model}-{features}"
+            for n in [100, 200, 400]:
+                rows.append({**key, "kind": "observed", "n": n, "y": 0.8 - n ** -0.5, "y-std": 0.01, "id": curve_id})
+            for n in np.logspace(2, 4, 5):
+                rows.append({**key, "kind": "extrapolated", "n": n, "y": 0.8 - n ** -0.5, "y-std": 0.0, "id": curve_id})
+    data = pd.DataFrame(rows)
+    selected_categories = {col: data[col].unique().tolist() for col in CATEGORY_COLUMNS}
+
+    summary = summarize_curves(data, "model")
+    assert set(summary["id"]) == {"ridge-reg", "lasso-reg"}
+    assert (summary["curves"] == 3).all(), "Every envelope should summarize the curves of its group"
+    assert (summary["y-lower"] <= summary["y"]).all() and (summary["y"] <= summary["y-upper"]).all()
+
+    spec = create_chart(summary, selected_categories).to_dict()
+    assert len(spec["vconcat"]) == 2, "The summarized chart and its legend should be created"
+    assert len(create_chart(data, selected_categories).to_dict()["vconcat"]) == 2
@@ -14,6 +14,8 @@ Test Summary:
 5. test_empty_result_files: Tests handling of empty result files.
 6. test_missing_bootstrap_files: Tests behavior when bootstrap files are missing.
 7. test_invalid_bootstrap_data: Tests error handling for invalid bootstrap data.
+8. test_plot_prediction_bands: Tests that precomputed prediction bands replace the bootstrap lines.
+9. test_plot_bootstrap_lines_single_layer: Tests that bootstrap lines are drawn as a single, thinned layer.
 
 These tests ensure that the plotting functionality works correctly, results are processed as expected,
 and edge cases are handled properly.
@@ -25,6 +27,7 @@ import numpy as np
 from pathlib import Path
 import json
 
+from workflow.scripts.extrapolate import prediction_bands, save_bands
 from workflow.scripts.plot import plot, process_results
 
 def test_plot(generate_stats_data, write_stats_data, construct_filename, tmp_path):
@@ -295,4 +298,86 @@ def test_invalid_bootstrap_data(generate_stats_data, write_stats_data, construct
     )
     
     # Check if the output file was created despite invalid bootstrap data
-    assert output_file.exists(), "Output file should be created even with invalid bootstrap data"
\ No newline at end of file
+    assert output_file.exists(), "Output file should be created even with invalid bootstrap data"
+
+def test_plot_prediction_bands(generate_stats_data, write_stats_data, construct_filename, tmp_path):
+    """
+    Test that precomputed prediction bands replace the bootstrap lines.
+    """
+    x, y, y_err, bootstrap_params = generate_stats_data("dataset1", random_state=42, n_bootstrap=20)
+
+    base_path = tmp_path / "results" / "dataset1" / "statistics" / "model1"
+    base_path.mkdir(parents=True, exist_ok=True)
+    filename = construct_filename({
+        'features': "features1",
+        'target': "target1",
+        'confound_correction_method': "correct-x",
+        'confound_correction_cni': "cni1",
+        'balanced': "balanced",
+        'grid': "grid1"
+    })
+    stats_file, _ = write_stats_data(str(base_path / filename), x, y, y_err, bootstrap_params)
+    bands = prediction_bands(x[x > 0].min(), 1e6, bootstrap_params.mean(axis=0), bootstrap_params)
+    for key in ["fit", "lower", "median", "upper"]:
+        assert np.isfinite(bands[key]).all(), f"The {key} band should be finite"
+    assert (bands["lower"] <= bands["median"]).all() and (bands["median"] <= bands["upper"]).all()
+    assert (bands["lower"] <= bands["fit"]).all() and (bands["fit"] <= bands["upper"]).all(), (
+        "The point fit should lie within the prediction band"
+    )
+    save_bands(stats_file.replace("stats.json", "bands.npz"), bands)
+
+    output_file = tmp_path / "test_plot.json"
+    plot(
+        stats_file_list=[stats_file],
+        output_filename=str(output_file),
+        color_variable="dataset",
+        linestyle_variable=None,
+        title="Test Plot",
+        max_x=6
+    )
+
+    with open(output_file) as f:
+        spec = json.load(f)
+    marks = [layer["mark"]["type"] if isinstance(layer["mark"], dict) else layer["mark"] for layer in spec["layer"]]
+    assert marks.count("area") == 1, "The prediction bands should be drawn as a single area layer"
+    assert len(spec["layer"]) == 4, "No bootstrap lines should be layered when bands are available"
+    assert spec["layer"][0]["encoding"]["x"]["scale"]["domain"][1] >= 1e6, "The x axis should extend to the extrapolation"
+
+def test_plot_bootstrap_lines_single_layer(generate_stats_data, write_stats_data, construct_filename, tmp_path):
+    """
+    Test that bootstrap lines are drawn as a single, thinned layer.
+    """
+    sample_results = []
+    for i in range(2):
+        x, y, y_err, bootstrap_params = generate_stats_data(f"dataset{i+1}", random_state=i, n_bootstrap=50)
+        base_path = tmp_path / "results" / f"dataset{i+1}" / "statistics" / "model1"
+        base_path.mkdir(parents=True, exist_ok=True)
+        filename = construct_filename({
+            'features': "features1",
+            'target': "target1",
+            'confound_correction_method': "correct-x",
+            'confound_correction_cni': "cni1",
+            'balanced': "balanced",
+            'grid': "grid1"
+        })
+        stats_file, _ = write_stats_data(str(base_path / filename), x, y, y_err, bootstrap_params)
+        sample_results.append(stats_file)
+
+    output_file = tmp_path / "test_plot.json"
+    plot(
+        stats_file_list=sample_results,
+        output_filename=str(output_file),
+        color_variable="dataset",
+        linestyle_variable=None,
+        title="Test Plot",
+        max_x=6,
+        max_bootstrap_lines=10
+    )
+
+    with open(output_file) as f:
+        spec = json.load(f)
+    assert len(spec["layer"]) == 3, "All bootstrap lines should be drawn in a single layer"
+    exp_layer = spec["layer"][2]
+    assert exp_layer["encoding"]["detail"]["field"] == "curve"
+    curves = {row["curve"] for row in spec["datasets"][exp_layer["data"]["name"]]}
+    assert len(curves) == 2 * 10, "Bootstrap lines should be thinned to the configured number per file"
@@ -0,0 +1,115 @@
+"""
+test_plot_batch.py
+==================
+
+This module contains unit tests for the batch plotting entry point.
+
+Test Summary:
+1. test_parse_plot_path: Tests deriving the kind of figure and its wildcards from output paths.
+2. test_select_stats: Tests selecting the statistics files drawn in each kind of figure.
+3. test_plot_batch: Tests rendering all figures of a dataset with a pool of workers.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from workflow.scripts.plot_batch import parse_plot_path, plot_batch, select_stats
+
+CURVES = [
+    ("ridge-reg", "features-a", "none", "none"),
+    ("ridge-reg", "features-b", "none", "none"),
+    ("ridge-reg", "features-a", "correct-x", "cni-a"),
+    ("ridge-reg", "features-a", "correct-x", "cni-b"),
+    ("lasso-reg", "features-a", "none", "none"),
+]
+
+
+def stats_path(model: str, features: str, method: str, cni: str) -> str:
+    """Build the statistics file path of a learning curve in the test dataset."""
+    return f"results/dataset1/statistics/{model}/{features}_targets1_{method}_{cni}_False_False_default.stats.json"
+
+
+def test_parse_plot_path():
+    """Test deriving the kind of figure and its wildcards from output paths."""
+    kind, wildcards = parse_plot_path(
+        "results/dataset1/plots/features/all-features_targets1_none_none_False_False_ridge-reg_default.png"
+    )
+    assert kind == "features"
+    assert wildcards == {
+        "dataset": "dataset1",
+        "targets": "targets1",
+        "confound_correction_method": "none",
+        "confound_correction_cni": "none",
+        "balanced": "False",
+        "quantile_transform": "False",
+        "model": "ridge-reg",
+        "grid": "default",
+    }
+
+    kind, wildcards = parse_plot_path(
+        "results/dataset1/plots/hps/ridge-reg/features-a_targets1_none_none_False_False_default.png"
+    )
+    assert kind == "hps" and wildcards["features"] == "features-a"
+
+    with pytest.raises(ValueError, match="Invalid filename structure"):
+        parse_plot_path("results/dataset1/plots/unknown/figure.png")
+
+
+def test_select_stats():
+    """Test selecting the statistics files drawn in each kind of figure."""
+    stats = [stats_path(*curve) for curve in CURVES]
+
+    _, wildcards = parse_plot_path("results/dataset1/plots/features/all-features_targets1_none_none_False_False_ridge-reg_default.png")
+    assert select_stats("features", wildcards, stats) == sorted([stats[0], stats[1]])
+
+    _, wildcards = parse_plot_path("results/dataset1/plots/models/features-a_targets1_none_none_False_False_all-models_default.png")
+    assert select_stats("models", wildcards, stats) == sorted([stats[0], stats[4]])
+
+    _, wildcards = parse_plot_path("results/dataset1/plots/cni/features-a_targets1_correct-x_all-cni_False_False_ridge-reg_default.png")
+    assert select_stats("cni", wildcards, stats) == sorted([stats[0], stats[2], stats[3]]), \
+        "Confound correction figures should include the uncorrected curve"
+
+    _, wildcards = parse_plot_path("results/dataset1/plots/individual/features-a_targets1_correct-x_cni-a_False_False_ridge-reg_default.png")
+    assert select_stats("individual", wildcards, stats) == [stats[2]]
+
+
+def test_plot_batch(tmp_path: Path, monkeypatch):
+    """Test rendering all figures of a dataset with a pool of workers."""
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    x = [128, 256, 512, 1024]
+    for model, features, method, cni in CURVES[:2]:
+        path = Path(stats_path(model, features, method, cni))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"x": x, "y_mean": [0.5, 0.6, 0.65, 0.7], "y_std": [0.05] * 4, "metric": "r2_test"}, f)
+        with open(str(path).replace("stats.json", "bootstrap.json"), "w") as f:
+            json.dump([[-2.0, 0.5, 0.75], [-2.5, 0.5, 0.8]], f)
+        scores_path = Path(str(path).replace("/statistics/", "/scores/").replace(".stats.json", ".csv"))
+        scores_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"n": x, "s": 0, "alpha": rng.uniform(0.1, 10, 4), "r2_val": rng.uniform(0, 1, 4)}).to_csv(scores_path, index=False)
+
+    plots = [
+        "results/dataset1/plots/individual/features-a_targets1_none_none_False_False_ridge-reg_default.png",
+        "results/dataset1/plots/features/all-features_targets1_none_none_False_False_ridge-reg_default.png",
+        "results/dataset1/plots/hps/ridge-reg/features-b_targets1_none_none_False_False_default.png",
+    ]
+    for plot in plots:
+        Path(plot).parent.mkdir(parents=True, exist_ok=True)
+
+    plot_batch(
+        plots,
+        [stats_path(*curve) for curve in CURVES[:2]],
+        workers=2,
+        figure_titles={"individual": "{features}", "features": "{targets}", "hyperparameters": "{model}"},
+        grids={"default": {"ridge-reg": {"alpha": [0.1, 10]}}},
+        hyperparameter_scales={"alpha": "log"},
+        max_x=5,
+    )
+
+    for plot in plots:
+        assert Path(plot).stat().st_size > 0, f"{plot} should be rendered"
@@ -15,6 +15,7 @@ Test Summary:
 7. test_plot_hps_scale_handling: Tests correct application of linear and logarithmic scales.
 8. test_plot_hps_reference_lines: Tests the presence of reference lines for hyperparameter ranges.
 9. test_plot_hps_error_handling: Tests error handling for invalid input data.
+10. test_plot_hps_transfer_trajectories: Tests that transferred hyperparameters are connected per seed across sample sizes.
 
 These tests ensure that the hyperparameter plotting functionality works correctly
 under various conditions and handles edge cases appropriately.
@@ -234,4 +235,33 @@ def test_plot_hps_error_handling(sample_grid, sample_hyperparameter_scales, gene
                 hyperparameter_scales=sample_hyperparameter_scales,
                 model_name="TestModel",
                 title="Test Error Handling Plot"
-            )
\ No newline at end of file
+            )
+
+def test_plot_hps_transfer_trajectories(sample_grid, sample_hyperparameter_scales, generate_scores_data):
+    """Test that transferred hyperparameters are connected per seed across sample sizes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir_path = Path(tmpdir)
+        stats_file = generate_scores_data(tmpdir_path)
+        output_file = tmpdir_path / "test_plot_hps_transfer.html"
+
+        def line_marks():
+            plot(
+                stats_filename=stats_file,
+                output_filename=str(output_file),
+                grid={"TestModel": sample_grid},
+                hyperparameter_scales=sample_hyperparameter_scales,
+                model_name="TestModel",
+                title="Test Transfer Plot"
+            )
+            with open(output_file.with_suffix('.json'), 'r') as f:
+                content = json.load(f)
+            return [layer for chart in content['hconcat'] for layer in chart['layer'] if layer['mark']['type'] == 'line']
+
+        assert not line_marks(), "Hyperparameters searched independently should not be connected"
+
+        scores = pd.read_csv(stats_file)
+        scores["hp_transferred_from"] = scores["n"].shift(fill_value=0)
+        scores.to_csv(stats_file, index=False)
+        lines = line_marks()
+        assert len(lines) == len(sample_grid), "Each hyperparameter should show the trajectories"
+        assert all(layer['encoding']['detail']['field'] == 's' for layer in lines)
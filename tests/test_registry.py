@@ -0,0 +1,81 @@
+"""
+test_registry.py
+================
+
+This module contains unit tests for the registry of models and predefined datasets.
+
+Test Summary:
+1. test_registry_without_sklearn: Tests that the registry and config validation do not import scikit-learn.
+2. test_registry_matches_loaders: Tests that the registry matches the models and dataset loaders of the workflow.
+3. test_validate_details_with_registry: Tests validating experiments against the registry.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from sklearn.pipeline import Pipeline
+
+from workflow.scripts.fit_model import MODELS, RegressionModel
+from workflow.scripts.prepare_data import predefined_datasets
+from workflow.scripts.registry import MODELS as MODEL_REGISTRY
+from workflow.scripts.registry import PREDEFINED_DATASETS
+from workflow.scripts.validate_config import validate_details
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "workflow" / "scripts"
+
+
+def test_registry_without_sklearn():
+    """Test that the registry and config validation do not import scikit-learn."""
+    code = "import sys, registry, validate_config; assert 'sklearn' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True)
+
+
+def test_registry_matches_loaders():
+    """Test that the registry matches the models and dataset loaders of the workflow."""
+    assert set(MODELS) == set(MODEL_REGISTRY)
+    for name, spec in MODEL_REGISTRY.items():
+        assert isinstance(MODELS[name], RegressionModel) == (spec["task"] == "regression")
+
+    assert isinstance(MODELS["pca-ridge-reg"].model_generator(pca__n_components=2, ridge__alpha=1.0), Pipeline)
+    assert MODELS["rbf-kernel-svm-cls"].model_generator(C=2.0).get_params()["kernel"] == "rbf"
+
+    for dataset, variants in PREDEFINED_DATASETS.items():
+        for kind, names in variants.items():
+            assert sorted(predefined_datasets[dataset][kind]) == sorted(names)
+
+
+def test_validate_details_with_registry(tmp_path: Path):
+    """Test validating experiments against the registry."""
+    config = {
+        "grids": {"default": {"ridge-reg": {"alpha": [1.0]}, "ridge-cls": {"alpha": [1.0]}}},
+        "custom_datasets": {},
+        "experiments": {
+            "valid": {
+                "dataset": "mnist",
+                "features": ["pixel"],
+                "targets": ["odd-even"],
+                "models": ["ridge-reg"],
+                "confound_correction_method": "correct-y",
+                "confound_correction_cni": ["none"],
+            },
+            "invalid": {
+                "dataset": "mnist",
+                "features": ["pixel"],
+                "targets": ["odd-even"],
+                "models": ["ridge-cls", "unknown-model"],
+                "confound_correction_method": "correct-y",
+                "confound_correction_cni": ["none"],
+            },
+        },
+    }
+
+    errors = validate_details(config)
+
+    assert not [e for e in errors if "'valid'" in e]
+    assert any("'unknown-model' is not defined" in e for e in errors)
+    assert any("'ridge-cls' must be a regression model" in e for e in errors)
+    assert not [e for e in errors if "profile_fits" in e]
+
+    errors = validate_details({**config, "profile_fits": True, "fit_worker": True})
+    assert any("cannot be profiled with fit_worker" in e for e in errors)
@@ -0,0 +1,184 @@
+"""
+test_results_store.py
+=====================
+
+This module contains unit tests for the single-file results store and its use
+by the aggregate and extrapolate steps.
+
+Test Summary:
+1. test_scores_roundtrip: Tests writing and reading score rows.
+2. test_scores_replace: Tests that rewriting a fit job replaces its rows.
+3. test_scores_filters: Tests filtering score rows by wildcards and lists of values.
+4. test_statistics_roundtrip: Tests writing and reading extrapolation statistics.
+5. test_concurrent_writers: Tests that concurrent processes can append to the store.
+6. test_curve_key_from_path: Tests parsing curve keys from result file paths and building paths from keys.
+7. test_aggregate_and_extrapolate_with_store: Tests the aggregate and extrapolate steps using the store.
+8. test_aggregate_seeds_per_sample_size: Tests that aggregating from the store only reads the seeds of each sample size.
+"""
+
+import json
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from workflow.scripts.aggregate import aggregate
+from workflow.scripts.extrapolate import extrapolate
+from workflow.scripts.results_store import ResultsStore, curve_key_from_path, curve_path_from_key
+
+CURVE = {
+    "dataset": "dataset1",
+    "model": "ridge-reg",
+    "features": "features1",
+    "targets": "target1",
+    "confound_correction_method": "none",
+    "confound_correction_cni": "none",
+    "balanced": "False",
+    "quantile_transform": "False",
+    "grid": "default",
+}
+
+
+def _write_fit(store_path: str, samplesize: int, seed: int, r2_test: float) -> None:
+    """Write the scores of a single fit job with two hyperparameter combinations."""
+    scores = pd.DataFrame({
+        "alpha": [0.1, 1.0],
+        "r2_val": [0.5, 0.6],
+        "r2_test": [r2_test - 0.1, r2_test],
+        "n": [samplesize, samplesize],
+        "s": [seed, seed],
+    })
+    with ResultsStore(store_path) as store:
+        store.write_scores({**CURVE, "samplesize": samplesize, "seed": seed}, scores)
+
+
+def test_scores_roundtrip(tmp_path: Path):
+    """Test writing and reading score rows."""
+    store_path = str(tmp_path / "results.db")
+    _write_fit(store_path, 128, 0, 0.7)
+
+    with ResultsStore(store_path) as store:
+        df = store.read_scores(**CURVE, samplesize=128, seed=0)
+
+    assert len(df) == 2, "Both hyperparameter combinations should be stored"
+    assert set(df.columns) == {"alpha", "r2_val", "r2_test", "n", "s"}, "Score columns should be preserved"
+    np.testing.assert_allclose(df["r2_test"], [0.6, 0.7])
+
+
+def test_scores_replace(tmp_path: Path):
+    """Test that rewriting a fit job replaces its rows."""
+    store_path = str(tmp_path / "results.db")
+    _write_fit(store_path, 128, 0, 0.7)
+    _write_fit(store_path, 128, 0, 0.8)
+
+    with ResultsStore(store_path) as store:
+        df = store.read_scores(**CURVE)
+        assert len(df) == 2, "Rerunning a fit job should replace its rows"
+        assert df["r2_test"].max() == pytest.approx(0.8)
+
+        store.write_scores({**CURVE, "samplesize": 128, "seed": 0}, pd.DataFrame())
+        assert store.read_scores(**CURVE).empty, "Writing empty scores should remove the rows of the fit job"
+
+
+def test_scores_filters(tmp_path: Path):
+    """Test filtering score rows by wildcards and lists of values."""
+    store_path = str(tmp_path / "results.db")
+    for samplesize in [128, 256, 512]:
+        for seed in [0, 1]:
+            _write_fit(store_path, samplesize, seed, 0.7)
+
+    with ResultsStore(store_path) as store:
+        assert len(store.read_scores(**CURVE)) == 12
+        assert len(store.read_scores(**CURVE, samplesize=[128, 512])) == 8
+        assert len(store.read_scores(**CURVE, samplesize=256, seed=[1])) == 2
+        assert store.read_scores(**{**CURVE, "model": "other-model"}).empty
+
+
+def test_statistics_roundtrip(tmp_path: Path):
+    """Test writing and reading extrapolation statistics."""
+    store_path = str(tmp_path / "results.db")
+    stats = {"x": [128, 256], "y_mean": [0.5, 0.6], "y_std": [np.nan, 0.1], "p_mean": np.array([-1.0, 0.5, 0.8])}
+
+    with ResultsStore(store_path) as store:
+        store.write_statistics(CURVE, stats, [[-1.0, 0.5, 0.8]])
+        store.write_statistics(CURVE, stats, [[-1.0, 0.5, 0.8]])
+        results = store.read_statistics(dataset="dataset1")
+
+    assert len(results) == 1, "Statistics should be stored once per curve"
+    key, result = results[0]
+    assert key == CURVE
+    assert np.isnan(result["y_std"][0]), "NaN values should survive the roundtrip"
+    assert result["p_mean"] == [-1.0, 0.5, 0.8]
+
+
+def test_concurrent_writers(tmp_path: Path):
+    """Test that concurrent processes can append to the store."""
+    store_path = str(tmp_path / "results.db")
+    ResultsStore(store_path).close()
+
+    args = [(store_path, samplesize, seed, 0.7) for samplesize in [128, 256, 512, 1024] for seed in range(4)]
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.starmap(_write_fit, args)
+
+    with ResultsStore(store_path) as store:
+        assert len(store.read_scores(**CURVE)) == 2 * len(args), "No rows should be lost with concurrent writers"
+
+
+def test_curve_key_from_path():
+    """Test parsing curve keys from result file paths and building paths from keys."""
+    path = "results/dataset1/statistics/ridge-reg/features1_target1_none_none_False_False_default.stats.json"
+    assert curve_key_from_path(path) == CURVE
+    assert curve_path_from_key(CURVE, "statistics", ".stats.json") == path
+
+    with pytest.raises(ValueError, match="Invalid filename structure"):
+        curve_key_from_path("results/dataset1/statistics/ridge-reg/invalid_filename.stats.json")
+
+
+def test_aggregate_and_extrapolate_with_store(tmp_path: Path):
+    """Test the aggregate and extrapolate steps using the store."""
+    store_path = str(tmp_path / "results.db")
+    sample_sizes, seeds = [128, 256, 512, 1024, 2048, 4096], [0, 1, 2]
+    for samplesize in sample_sizes:
+        for seed in seeds:
+            _write_fit(store_path, samplesize, seed, 0.8 - samplesize ** -0.5 + 0.01 * seed)
+    # scores of a sample size that is not part of the configuration
+    _write_fit(store_path, 64, 0, 0.1)
+
+    scores_path = tmp_path / "scores.csv"
+    aggregate([], str(scores_path), results_store_path=store_path, results_key=CURVE, sample_sizes=sample_sizes, seeds=seeds)
+
+    df_best = pd.read_csv(scores_path)
+    assert len(df_best) == len(sample_sizes) * len(seeds), "One best row per sample size and seed expected"
+    assert (df_best["alpha"] == 1.0).all(), "The hyperparameters with the best validation score should be selected"
+
+    extra_path, bootstrap_path = tmp_path / "extra.json", tmp_path / "bootstrap.json"
+    extrapolate(str(scores_path), str(extra_path), str(bootstrap_path), repeats=10, results_store_path=store_path, results_key=CURVE)
+
+    with open(extra_path) as f:
+        result = json.load(f)
+    with ResultsStore(store_path) as store:
+        assert len(store.read_best_scores(**CURVE)) == len(df_best)
+        (key, stored), = store.read_statistics(**CURVE)
+
+    assert result["x"] == sample_sizes
+    assert stored["x"] == result["x"], "Stored statistics should match the stats file"
+    assert stored["n_seeds"] == len(seeds)
+
+
+def test_aggregate_seeds_per_sample_size(tmp_path: Path):
+    """Test that aggregating from the store only reads the seeds of each sample size."""
+    store_path = str(tmp_path / "results.db")
+    for samplesize in [128, 256]:
+        for seed in range(4):
+            _write_fit(store_path, samplesize, seed, 0.8)
+
+    # e.g. sequential seeding stopped after two seeds at 128, while an earlier run fitted four
+    scores_path = tmp_path / "scores.csv"
+    seeds = {128: [0, 1], 256: [0, 1, 2, 3]}
+    aggregate([], str(scores_path), results_store_path=store_path, results_key=CURVE, sample_sizes=[128, 256], seeds=seeds)
+
+    df_best = pd.read_csv(scores_path)
+    assert sorted(df_best.loc[df_best["n"] == 128, "s"]) == [0, 1]
+    assert sorted(df_best.loc[df_best["n"] == 256, "s"]) == [0, 1, 2, 3]
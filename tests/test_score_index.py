@@ -0,0 +1,97 @@
+"""
+test_score_index.py
+===================
+
+This module contains unit tests for the persistent index of fit scores.
+
+Test Summary:
+1. test_canonical_params: Tests that hyperparameters are encoded independently of their order and numeric type.
+2. test_job_key: Tests that job keys depend on the contents of the inputs rather than on their paths.
+3. test_fit_with_score_index: Tests that fit jobs reuse scores of identical inputs under a different name through the index.
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from workflow.scripts.fit_model import fit
+from workflow.scripts.score_index import ScoreIndex, canonical_params
+
+SPLIT = {
+    "idx_train": list(range(0, 60)),
+    "idx_val": list(range(60, 80)),
+    "idx_test": list(range(80, 100)),
+    "samplesize": 100,
+    "seed": 42,
+}
+
+
+def test_canonical_params():
+    """Test that hyperparameters are encoded independently of their order and numeric type."""
+    assert canonical_params({"b": 1.0, "a": 0.5}) == canonical_params({"a": np.float64(0.5), "b": 1})
+    assert canonical_params({"a": 1.5}) != canonical_params({"a": 1})
+    assert canonical_params({}) == "{}"
+
+
+def test_job_key(write_data_to_file: Callable, tmp_path: Path):
+    """Test that job keys depend on the contents of the inputs rather than on their paths."""
+    x = str(write_data_to_file(np.arange(300, dtype=np.float64).reshape(100, 3), 'h5', tmp_path / "x.h5"))
+    renamed_x = str(write_data_to_file(np.arange(300, dtype=np.float64).reshape(100, 3), 'h5', tmp_path / "renamed_x.h5"))
+    y = str(write_data_to_file(np.arange(100, dtype=np.float64), 'h5', tmp_path / "y.h5"))
+    cni = str(write_data_to_file(np.zeros((100, 1)), 'h5', tmp_path / "cni.h5"))
+    other_cni = str(write_data_to_file(np.ones((100, 1)), 'h5', tmp_path / "other_cni.h5"))
+
+    with ScoreIndex(str(tmp_path / "index.db")) as index:
+        key = index.job_key(x, y, cni, SPLIT, "ridge-reg", "normal", "v1")
+        assert index.job_key(renamed_x, y, other_cni, SPLIT, "ridge-reg", "normal", "v1") == key
+        assert index.job_key(x, y, cni, SPLIT, "ridge-reg", "normal", "v2") != key
+        assert index.job_key(x, y, cni, SPLIT, "ridge-cls", "normal", "v1") != key
+        assert index.job_key(x, y, cni, {**SPLIT, "idx_test": SPLIT["idx_test"][::-1]}, "ridge-reg", "normal", "v1") != key
+        assert index.job_key(x, y, cni, SPLIT, "ridge-reg", "with-cni", "v1") != index.job_key(
+            x, y, other_cni, SPLIT, "ridge-reg", "with-cni", "v1"
+        )
+
+        write_data_to_file(np.ones((100, 3)), 'h5', tmp_path / "x.h5")
+        assert index.job_key(x, y, cni, SPLIT, "ridge-reg", "normal", "v1") != key, "Changed files should be hashed again"
+
+
+def test_fit_with_score_index(generate_synth_data: Callable, create_dataset: Callable, tmp_path: Path):
+    """Test that fit jobs reuse scores of identical inputs under a different name through the index."""
+    X, y, confounds = generate_synth_data(n_samples=100, n_features=20, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+    data_dir = Path(dataset['features']).parent
+    renamed = tmp_path / "renamed_data"
+    shutil.copytree(data_dir, renamed)
+    split_path = tmp_path / "split.json"
+    with open(split_path, "w") as f:
+        json.dump(SPLIT, f)
+    index_path = str(tmp_path / "index.db")
+
+    def fit_grid(name: str, alphas: list, directory: Path):
+        return fit(
+            str(directory / Path(dataset['features']).name),
+            str(directory / Path(dataset['targets']).name),
+            str(split_path),
+            str(tmp_path / f"{name}.csv"),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": alphas}},
+            [],
+            "normal",
+            str(directory / Path(dataset['confounds']).name),
+            score_index_path=index_path,
+        )
+
+    first = fit_grid("first", [0.1, 1.0], data_dir)
+    with ScoreIndex(index_path) as index:
+        (job,), = index.connection.execute("SELECT DISTINCT job FROM fit_scores").fetchall()
+        # mark the indexed scores to detect whether they are reused
+        index.add(job, ["alpha"], [{**row, "r2_test": -1.0} for row in first.to_dict(orient="records")])
+
+    second = fit_grid("second", [1, 10.0], renamed)
+    assert second["r2_test"].iloc[0] == -1.0, "Indexed scores of identical inputs should be reused"
+    assert second["r2_test"].iloc[1] != -1.0, "Missing scores should be computed"
+    with ScoreIndex(index_path) as index:
+        assert len(index.lookup(job)) == 3
@@ -0,0 +1,67 @@
+"""
+test_search_space.py
+====================
+
+This module contains unit tests for the sampled search spaces of hyperparameter grids.
+
+Test Summary:
+1. test_search_space: Tests that distributions are validated and mapped to and from the unit hypercube.
+2. test_random_candidates: Tests that random search draws distinct combinations reproducibly.
+3. test_propose_candidate: Tests that Bayesian search proposes new combinations near the best scores.
+"""
+
+import numpy as np
+import pytest
+
+from workflow.scripts.search_space import SearchSpace, is_sampled, propose_candidate, random_candidates, value_range
+
+
+def test_search_space():
+    """Test that distributions are validated and mapped to and from the unit hypercube."""
+    space = SearchSpace({"C": {"log-uniform": [0.001, 1000]}, "degree": {"int-uniform": [1, 5]}, "kernel": [1, 2], "trials": 7})
+    assert space.trials == 7 and list(space.specs) == ["C", "degree", "kernel"]
+    assert space.size() == np.inf
+    assert np.isclose(space.decode(np.array([0.5, 0.5, 0.5]))["C"], 1.0)
+    assert space.decode(np.array([0.0, 0.0, 0.0])) == {"C": 0.001, "degree": 1, "kernel": 1}
+    assert space.decode(np.array([1.0, 1.0, 1.0])) == {"C": 1000, "degree": 5, "kernel": 2}
+    params = {"C": 10.0, "degree": 3, "kernel": 2}
+    assert space.decode(space.encode(params)) == params
+
+    assert SearchSpace({"degree": {"int-uniform": [1, 5]}, "kernel": [1, 2]}).size() == 10
+    assert is_sampled({"alpha": [1, 2], "trials": 3}) and not is_sampled({"alpha": [1, 2]})
+    assert value_range({"uniform": [0.1, 0.9]}) == (0.1, 0.9) and value_range([3, 1, 2]) == (1, 3)
+    with pytest.raises(ValueError):
+        SearchSpace({"C": {"log-uniform": [0, 1]}})
+    with pytest.raises(ValueError):
+        SearchSpace({"C": {"normal": [0, 1]}})
+
+
+def test_random_candidates():
+    """Test that random search draws distinct combinations reproducibly."""
+    space = SearchSpace({"alpha": {"log-uniform": [0.0001, 10000]}, "trials": 10})
+    candidates = random_candidates(space, 0)
+    assert len(candidates) == 10 and len({c["alpha"] for c in candidates}) == 10
+    assert candidates == random_candidates(space, 0)
+    assert candidates != random_candidates(space, 1)
+
+    small = SearchSpace({"alpha": [1, 10, 100], "trials": 10})
+    assert sorted(c["alpha"] for c in random_candidates(small, 0)) == [1, 10, 100], "Small spaces should be drawn completely"
+
+
+def test_propose_candidate():
+    """Test that Bayesian search proposes new combinations near the best scores."""
+    space = SearchSpace({"x": {"uniform": [0, 1]}})
+    rng = np.random.default_rng(0)
+    observed, values = [], []
+    for _ in range(15):
+        params = propose_candidate(space, observed, values, rng)
+        assert params not in observed
+        observed.append(params)
+        values.append(-(params["x"] - 0.3) ** 2)
+    assert abs(observed[int(np.argmax(values))]["x"] - 0.3) < 0.05
+    assert np.mean([abs(p["x"] - 0.3) for p in observed[10:]]) < np.mean([abs(p["x"] - 0.3) for p in observed[:5]]), (
+        "Later proposals should concentrate near the optimum"
+    )
+
+    small = SearchSpace({"x": [1, 2]})
+    assert propose_candidate(small, [{"x": 1}, {"x": 2}], [0.1, 0.2], rng) is None
@@ -0,0 +1,131 @@
+"""
+test_shared_data.py
+===================
+
+This module contains unit tests for the node-local cache of shared datasets.
+
+Test Summary:
+1. test_shared_data_cache: Tests attaching read-only arrays shared between caches, and reading changed files again.
+2. test_shared_data_release: Tests deleting arrays once no live process references them.
+3. test_shared_data_jobs: Tests that fit and split jobs give the same results with shared arrays.
+4. test_shared_data_failed_save: Tests that arrays which cannot be written completely are not left behind.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from workflow.scripts.fit_model import fit
+from workflow.scripts.generate_splits import write_splitfile
+from workflow.scripts.shared_data import SharedDataCache
+
+
+def test_shared_data_cache(write_data_to_file: Callable, tmp_path: Path):
+    """Test attaching read-only arrays shared between caches, and reading changed files again."""
+    data = np.arange(20, dtype=np.float64).reshape(10, 2)
+    path = str(write_data_to_file(data, 'h5', tmp_path / "features.h5"))
+    directory = tmp_path / "shared"
+
+    first, second = SharedDataCache(str(directory)), SharedDataCache(str(directory))
+    x = first(path)
+    np.testing.assert_array_equal(x, data)
+    np.testing.assert_array_equal(first(path, "mask"), np.ones(10, dtype=bool))
+    assert isinstance(x, np.memmap) and not x.flags.writeable
+    np.testing.assert_array_equal(second(path)[[1, 3]], data[[1, 3]])
+    assert len(list(directory.glob("*.npy"))) == 2, "Caches should share one array per dataset"
+
+    write_data_to_file(data + 1, 'h5', tmp_path / "features.h5")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    np.testing.assert_array_equal(second(path), data + 1)
+
+    first.release()
+    second.release()
+
+
+def test_shared_data_release(write_data_to_file: Callable, tmp_path: Path):
+    """Test deleting arrays once no live process references them."""
+    path = str(write_data_to_file(np.ones((5, 3)), 'h5', tmp_path / "features.h5"))
+    directory = tmp_path / "shared"
+
+    first, second = SharedDataCache(str(directory)), SharedDataCache(str(directory))
+    first(path)
+    second(path)
+    name = next(directory.glob("*.npy")).stem
+    # reference of a process that was killed
+    (directory / f"{name}.999999999.deadbeef.ref").touch()
+    # array left partially written by a process that was killed
+    (directory / f".{name}.999999999.deadbeef.npy").touch()
+
+    first.release()
+    assert len(list(directory.glob("*.npy"))) == 1, "Arrays referenced by another cache should be kept"
+    assert not (directory / f"{name}.999999999.deadbeef.ref").exists(), "References of dead processes should be removed"
+    assert not (directory / f".{name}.999999999.deadbeef.npy").exists(), "Partial arrays of dead processes should be removed"
+
+    second.release()
+    assert not list(directory.glob("*.npy")) and not list(directory.glob("*.ref"))
+
+
+def test_shared_data_jobs(generate_synth_data, create_dataset, tmp_path: Path):
+    """Test that fit and split jobs give the same results with shared arrays."""
+    X, y, confounds = generate_synth_data(n_samples=200, n_features=10, classification=False)
+    dataset = create_dataset(X, y, confounds, 'h5', tmp_path / "test_data")
+    cache = SharedDataCache(str(tmp_path / "shared"))
+
+    splits = []
+    for name, load_data in [("split.json", None), ("shared_split.json", cache)]:
+        write_splitfile(
+            features_path=str(dataset['features']),
+            targets_path=str(dataset['targets']),
+            split_path=str(tmp_path / name),
+            confounds_path=str(dataset['confounds']),
+            confound_correction_method="none",
+            n_train=100,
+            n_val=20,
+            n_test=20,
+            seed=0,
+            load_data=load_data,
+        )
+        with open(tmp_path / name) as f:
+            splits.append(json.load(f))
+    assert splits[0] == splits[1]
+
+    scores = [
+        fit(
+            str(dataset['features']),
+            str(dataset['targets']),
+            str(tmp_path / "split.json"),
+            str(tmp_path / name),
+            "ridge-reg",
+            {"ridge-reg": {"alpha": [0.1, 10.0]}},
+            [],
+            "none",
+            str(dataset['confounds']),
+            load_data=load_data,
+        )
+        for name, load_data in [("scores.csv", None), ("shared_scores.csv", cache)]
+    ]
+    pd.testing.assert_frame_equal(scores[0], scores[1])
+    cache.release()
+
+
+def test_shared_data_failed_save(write_data_to_file: Callable, tmp_path: Path, monkeypatch):
+    """Test that arrays which cannot be written completely are not left behind."""
+    data = np.ones((5, 3))
+    path = str(write_data_to_file(data, 'h5', tmp_path / "features.h5"))
+    directory = tmp_path / "shared"
+
+    def save_partially(file, array):
+        with open(file, "wb") as f:
+            f.write(b"partial")
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(np, "save", save_partially)
+    cache = SharedDataCache(str(directory))
+    np.testing.assert_array_equal(cache(path), data)
+    assert not any(file.name.endswith(".npy") for file in directory.iterdir()), "Partial arrays should be removed"
+    cache.release()
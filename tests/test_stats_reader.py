@@ -0,0 +1,70 @@
+"""
+test_stats_reader.py
+====================
+
+This module contains unit tests for the shared reader of JSON result files.
+
+Test Summary:
+1. test_read_result_nan: Tests parsing of NaN values written by the extrapolate step.
+2. test_read_result_empty: Tests that empty files are read as None.
+3. test_read_result_cache: Tests that results are cached until the file changes.
+4. test_read_result_invalid: Tests error handling for invalid files.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workflow.scripts.stats_reader import clear_cache, read_result
+
+
+def test_read_result_nan(tmp_path: Path):
+    """Test parsing of NaN values written by the extrapolate step."""
+    path = tmp_path / "curve.stats.json"
+    with open(path, "w") as f:
+        json.dump({"x": [128, 256], "y_std": [np.nan, 0.1], "p_mean": [np.nan] * 3}, f, indent=0)
+
+    result = read_result(str(path))
+
+    assert result["x"] == [128, 256]
+    assert np.isnan(result["y_std"][0]) and result["y_std"][1] == 0.1
+    assert np.isnan(result["p_mean"]).all()
+
+
+def test_read_result_empty(tmp_path: Path):
+    """Test that empty files are read as None."""
+    path = tmp_path / "curve.stats.json"
+    path.touch()
+    assert read_result(str(path)) is None
+
+
+def test_read_result_cache(tmp_path: Path):
+    """Test that results are cached until the file changes."""
+    clear_cache()
+    path = tmp_path / "curve.bootstrap.json"
+    with open(path, "w") as f:
+        json.dump([[-1.0, 0.5, 0.8]], f)
+
+    first = read_result(str(path))
+    assert read_result(str(path)) is first, "Unchanged files should not be parsed again"
+
+    with open(path, "w") as f:
+        json.dump([[-2.0, 0.5, 0.8]], f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert read_result(str(path)) == [[-2.0, 0.5, 0.8]], "Changed files should be parsed again"
+
+
+def test_read_result_invalid(tmp_path: Path):
+    """Test error handling for invalid files."""
+    path = tmp_path / "curve.stats.json"
+    path.write_text("not json")
+    with pytest.raises(json.JSONDecodeError):
+        read_result(str(path))
+
+    with pytest.raises(FileNotFoundError):
+        read_result(str(tmp_path / "missing.stats.json"))
@@ -0,0 +1,294 @@
+"""
+adaptive_sampling.py
+====================================
+This module decides which sample sizes and seeds of a learning curve are worth fitting.
+
+With `adaptive_tolerance` or `adaptive_budget` set in the config, the sample
+sizes of a curve are fitted in increasing order. After all seeds of a sample
+size have been fitted, the power law of `extrapolate.py` is fitted to the best
+scores of the sizes so far, and once more without the largest size. If the
+asymptote moved by less than the tolerance, the curve has converged and larger
+(more expensive) sizes would not change the extrapolation, so they are skipped.
+With a compute budget, larger sizes are also skipped once fitting them is
+predicted to exceed it. The budget is measured in seconds of fitting, which
+requires the fits to be profiled (see `profile_fits`).
+
+With `seed_sem_tolerance` set, the seeds of each sample size are fitted
+sequentially as well: starting with `min_seeds` seeds, one more seed is added
+until the standard error of the mean score of the size (as computed by
+`extrapolate.py`) is below the tolerance, or all configured seeds are fitted.
+Small, noisy sample sizes thus get more seeds than large, stable ones.
+
+Skipped sizes and seeds are only deferred: each decision is stored in a file,
+and the workflow fits them again once the tolerance or budget is changed.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .aggregate import read_score_files
+    from .extrapolate import MIN_DOF, fit_curve
+except ImportError:
+    from aggregate import read_score_files
+    from extrapolate import MIN_DOF, fit_curve
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def best_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Select the best hyperparameter combination of each sample size and seed, as `aggregate` does.
+
+    Args:
+        df (pd.DataFrame): Score rows of all hyperparameter combinations.
+
+    Returns:
+        pd.DataFrame: One row per sample size and seed.
+    """
+    metric = "r2_val" if "r2_val" in df.columns else "acc_val"
+    return df.loc[df.groupby(["n", "s"])[metric].idxmax()]
+
+
+def fit_asymptote(df_best: pd.DataFrame) -> float:
+    """
+    Fit the power law of `extrapolate` to the best scores and return its asymptote.
+
+    Args:
+        df_best (pd.DataFrame): Best score rows, see `best_scores`.
+
+    Returns:
+        float: The asymptote (parameter c), NaN if the power law cannot be fitted.
+    """
+    metric = "r2_test" if "r2_test" in df_best.columns else "acc_test"
+    grouped = df_best.groupby("n")[metric]
+    x, y_mean, y_sem = grouped.mean().index.values, grouped.mean().values, grouped.sem().values
+    mask = (y_mean - y_sem) > 0
+    if mask.sum() - 3 < MIN_DOF:
+        return np.nan
+    return float(fit_curve(x[mask], y_mean[mask], y_sem[mask])["p_mean"][2])
+
+
+def size_sem(df_best: pd.DataFrame, samplesize: int) -> float:
+    """
+    Standard error of the mean test score of a sample size over the seeds, as in `extrapolate`.
+
+    Args:
+        df_best (pd.DataFrame): Best score rows, see `best_scores`.
+        samplesize (int): The sample size.
+
+    Returns:
+        float: The standard error, NaN for fewer than two seeds.
+    """
+    metric = "r2_test" if "r2_test" in df_best.columns else "acc_test"
+    return float(df_best.loc[df_best["n"] == samplesize, metric].sem())
+
+
+def size_costs(df: pd.DataFrame) -> pd.Series:
+    """
+    Wall time of fitting all seeds and hyperparameter combinations of each sample size.
+
+    Args:
+        df (pd.DataFrame): Score rows, with `time_*_wall` columns if the fits were profiled.
+            Rows flagged as `reused` were computed by an earlier job and are not counted.
+
+    Returns:
+        pd.Series: Seconds per sample size, empty if the fits were not profiled.
+    """
+    wall_columns = [c for c in df.columns if c.startswith("time_") and c.endswith("_wall")]
+    if not wall_columns:
+        return pd.Series(dtype=float)
+    if "reused" in df.columns:
+        df = df[~df["reused"].eq(True)]
+    return df[wall_columns].sum(axis=1).groupby(df["n"]).sum()
+
+
+def predict_cost(costs: pd.Series, samplesize: int) -> float:
+    """
+    Extrapolate the cost of a larger sample size with a power law in n fitted to the observed costs.
+
+    Args:
+        costs (pd.Series): Seconds per observed sample size, see `size_costs`.
+        samplesize (int): Sample size to predict.
+
+    Returns:
+        float: Predicted seconds, assuming linear scaling if only one size was observed.
+    """
+    costs = costs[costs > 0]
+    if len(costs) == 1:
+        return float(costs.iloc[0] * samplesize / costs.index[0])
+    slope, intercept = np.polyfit(np.log(costs.index.values.astype(float)), np.log(costs.values), 1)
+    return float(np.exp(intercept + slope * np.log(samplesize)))
+
+
+def decide_next_size(
+    df: pd.DataFrame,
+    samplesize: int,
+    next_samplesize: Optional[int],
+    tolerance: Optional[float] = None,
+    budget: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Decide whether the next larger sample size of a curve should be fitted.
+
+    Args:
+        df (pd.DataFrame): Score rows of all fitted sample sizes up to `samplesize`.
+        samplesize (int): The largest fitted sample size.
+        next_samplesize (Optional[int]): The next larger configured sample size, None if there is none.
+        tolerance (Optional[float]): Largest change of the asymptote (in units of the metric) regarded as
+            converged, None to only stop at the budget.
+        budget (Optional[float]): Seconds of fitting the curve may take, requires profiled fits.
+
+    Returns:
+        Dict[str, Any]: The decision, with `continue` set to False if larger sizes should be skipped,
+            the `reason`, and the fitted asymptotes and costs it is based on.
+    """
+    decision: Dict[str, Any] = {"samplesize": samplesize, "next_samplesize": next_samplesize, "continue": True}
+    if next_samplesize is None:
+        return {**decision, "continue": False, "reason": "largest sample size"}
+    if df.empty or samplesize not in set(df["n"]):
+        return {**decision, "continue": False, "reason": "insufficient samples"}
+
+    df_best = best_scores(df)
+    asymptote = fit_asymptote(df_best)
+    previous = fit_asymptote(df_best[df_best["n"] < samplesize])
+    decision.update({"asymptote": asymptote, "previous_asymptote": previous})
+    if tolerance and np.isfinite(asymptote) and np.isfinite(previous) and abs(asymptote - previous) <= tolerance:
+        return {**decision, "continue": False, "reason": "converged"}
+
+    if budget:
+        costs = size_costs(df)
+        if costs.empty or not (costs > 0).any():
+            logging.warning("The compute budget requires profiled fits (profile_fits), ignoring it")
+        else:
+            decision.update({"cost": float(costs.sum()), "next_cost": predict_cost(costs, next_samplesize)})
+            if decision["cost"] + decision["next_cost"] > budget:
+                return {**decision, "continue": False, "reason": "budget"}
+
+    return {**decision, "reason": "not converged"}
+
+
+def decide_more_seeds(df: pd.DataFrame, samplesize: int, n_seeds: int, max_seeds: int, tolerance: float) -> Dict[str, Any]:
+    """
+    Decide whether another seed of a sample size should be fitted.
+
+    Args:
+        df (pd.DataFrame): Score rows of the fitted seeds of the sample size.
+        samplesize (int): The sample size.
+        n_seeds (int): Number of fitted seeds.
+        max_seeds (int): Number of configured seeds.
+        tolerance (float): Standard error of the mean test score below which no more seeds are added.
+
+    Returns:
+        Dict[str, Any]: The decision, with `continue` set to False if no more seeds should be fitted,
+            the `reason` and the standard error it is based on.
+    """
+    decision: Dict[str, Any] = {"samplesize": samplesize, "seeds": n_seeds, "continue": True}
+    if n_seeds >= max_seeds:
+        return {**decision, "continue": False, "reason": "all seeds"}
+    if df.empty or samplesize not in set(df["n"]):
+        return {**decision, "continue": False, "reason": "insufficient samples"}
+
+    sem = size_sem(best_scores(df), samplesize)
+    decision["sem"] = sem
+    if np.isfinite(sem) and sem <= tolerance:
+        return {**decision, "continue": False, "reason": "converged"}
+    return {**decision, "reason": "not converged"}
+
+
+def read_scores(score_path_list: List[str]) -> pd.DataFrame:
+    """Concatenate the rows of the non-empty score files."""
+    df_list = read_score_files(score_path_list)
+    return pd.concat(df_list, axis=0, ignore_index=True) if df_list else pd.DataFrame()
+
+
+def save_decision(decision: Dict[str, Any], decision_path: str) -> None:
+    """Save a decision as a JSON file."""
+    with open(decision_path, "w") as f:
+        json.dump(decision, f, indent=2)
+
+
+def adapt_seeds(
+    score_path_list: List[str],
+    decision_path: str,
+    samplesize: int,
+    n_seeds: int,
+    max_seeds: int,
+    tolerance: float,
+) -> Dict[str, Any]:
+    """
+    Decide whether to fit another seed of a sample size and save the decision.
+
+    Args:
+        score_path_list (List[str]): Score files of the fitted seeds of the sample size.
+        decision_path (str): Path to save the decision as a JSON file.
+        samplesize (int): The sample size.
+        n_seeds (int): Number of fitted seeds.
+        max_seeds (int): Number of configured seeds.
+        tolerance (float): Standard error of the mean test score below which no more seeds are added.
+
+    Returns:
+        Dict[str, Any]: The decision, see `decide_more_seeds`.
+    """
+    decision = decide_more_seeds(read_scores(score_path_list), samplesize, n_seeds, max_seeds, tolerance)
+    logging.info(f"Sample size {samplesize} with {n_seeds} seeds: {'continue' if decision['continue'] else 'stop'} ({decision['reason']})")
+    save_decision(decision, decision_path)
+    return decision
+
+
+def adapt_sample_sizes(
+    score_path_list: List[str],
+    decision_path: str,
+    samplesize: int,
+    next_samplesize: Optional[int],
+    tolerance: Optional[float] = None,
+    budget: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Decide whether to fit the next larger sample size of a curve and save the decision.
+
+    Args:
+        score_path_list (List[str]): Score files of all seeds of the sample sizes up to `samplesize`.
+        decision_path (str): Path to save the decision as a JSON file.
+        samplesize (int): The largest fitted sample size.
+        next_samplesize (Optional[int]): The next larger configured sample size.
+        tolerance (Optional[float]): Largest change of the asymptote regarded as converged.
+        budget (Optional[float]): Seconds of fitting the curve may take.
+
+    Returns:
+        Dict[str, Any]: The decision, see `decide_next_size`.
+    """
+    decision = decide_next_size(read_scores(score_path_list), samplesize, next_samplesize, tolerance, budget)
+    logging.info(f"Sample size {samplesize}: {'continue' if decision['continue'] else 'stop'} ({decision['reason']})")
+    save_decision(decision, decision_path)
+    return decision
+
+
+if __name__ == "__main__":
+    logging.info("Starting adaptive_sampling.py script")
+    if snakemake.rule == "adapt_seeds":
+        adapt_seeds(
+            score_path_list=snakemake.input.scores,
+            decision_path=snakemake.output.decision,
+            samplesize=int(snakemake.wildcards.samplesize),
+            n_seeds=int(snakemake.wildcards.nseeds),
+            max_seeds=snakemake.params.max_seeds,
+            tolerance=snakemake.params.tolerance,
+        )
+    else:
+        adapt_sample_sizes(
+            score_path_list=snakemake.input.scores,
+            decision_path=snakemake.output.decision,
+            samplesize=int(snakemake.wildcards.samplesize),
+            next_samplesize=snakemake.params.next_samplesize,
+            tolerance=snakemake.params.tolerance or None,
+            budget=snakemake.params.budget or None,
+        )
+    logging.info("Finished adaptive_sampling.py script")
@@ -13,35 +13,30 @@ into a single statistics CSV file.
 
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Union
 import logging
 
 import pandas as pd
 
+try:
+    from .results_store import ResultsStore
+except ImportError:
+    from results_store import ResultsStore
+
 # Set up logging
 log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
 logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
 
-def aggregate(
-    score_path_list: List[str],
-    stats_path: str,
-) -> None:
+def read_score_files(score_path_list: List[str]) -> List[pd.DataFrame]:
     """
-    Aggregate scores from multiple files and identify the best hyperparameter combinations.
-
-    For each score file in `score_path_list`, the function identifies the hyperparameter
-    combination with the highest validation metric (R² or accuracy) for each group defined
-    by sample size (`n`) and seed (`s`). It then compiles these best scores into a single
-    CSV file at `stats_path`.
+    Read the non-empty score files.
 
     Args:
         score_path_list (List[str]): List of file paths to the input score CSV files.
-        stats_path (str): Path to save the aggregated statistics CSV file.
 
     Returns:
-        None: The function saves the results to a CSV file but doesn't return any value.
+        List[pd.DataFrame]: DataFrames of all non-empty score files.
     """
-    logging.info(f"Starting aggregation process with {len(score_path_list)} input files.")
     df_list = []
     for filename in score_path_list:
         # Ignore empty files (indicating insufficient samples in the dataset)
@@ -59,11 +54,90 @@ def aggregate(
                 logging.error(f"Error reading file {filename}: {str(e)}")
         else:
             logging.warning(f"Skipping empty file: {filename}")
+    return df_list
+
+
+def grid_costs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum the recorded costs of all hyperparameter combinations of each sample size and seed.
+
+    Args:
+        df (pd.DataFrame): Score rows, with `time_*` and `peak_rss_mb` columns if the fits were profiled.
+            Rows flagged as `reused` were computed by an earlier job and are not counted.
+
+    Returns:
+        pd.DataFrame: The summed `grid_time_*` columns, the maximal `grid_peak_rss_mb` and the number of
+            profiled rows as `grid_size`, indexed by `n` and `s`. Empty if no costs were recorded.
+    """
+    time_columns = [c for c in df.columns if c.startswith("time_")]
+    if not time_columns:
+        return pd.DataFrame()
+    if "reused" in df.columns:
+        df = df[~df["reused"].eq(True)]
+    grouped = df.dropna(subset=time_columns).groupby(["n", "s"])
+    costs = grouped[time_columns].sum().add_prefix("grid_")
+    if "peak_rss_mb" in df.columns:
+        costs["grid_peak_rss_mb"] = grouped["peak_rss_mb"].max()
+    costs["grid_size"] = grouped.size()
+    return costs
+
+
+def aggregate(
+    score_path_list: List[str],
+    stats_path: str,
+    results_store_path: Optional[str] = None,
+    results_key: Optional[Dict[str, str]] = None,
+    sample_sizes: Optional[List[int]] = None,
+    seeds: Optional[Union[List[int], Dict[int, List[int]]]] = None,
+) -> None:
+    """
+    Aggregate scores from multiple files and identify the best hyperparameter combinations.
+
+    For each score file in `score_path_list`, the function identifies the hyperparameter
+    combination with the highest validation metric (R² or accuracy) for each group defined
+    by sample size (`n`) and seed (`s`). It then compiles these best scores into a single
+    CSV file at `stats_path`.
+
+    If a results store is given, the scores are queried from the store instead of
+    being read from the score files, and the best scores are written back to it.
+
+    If the fits were profiled, the per-phase timings and peak RSS of the best rows are
+    kept, and the costs summed over the whole grid are added, see `grid_costs`.
+
+    Args:
+        score_path_list (List[str]): List of file paths to the input score CSV files.
+        stats_path (str): Path to save the aggregated statistics CSV file.
+        results_store_path (Optional[str]): Path to the results store.
+        results_key (Optional[Dict[str, str]]): Curve wildcards, required if a results store is given.
+        sample_sizes (Optional[List[int]]): Sample sizes to query from the results store.
+        seeds (Optional[Union[List[int], Dict[int, List[int]]]]): Seeds to query from the results store,
+            or the seeds of each sample size if sequential seeding fitted different seeds per sample size.
+
+    Returns:
+        None: The function saves the results to a CSV file but doesn't return any value.
+    """
+    logging.info(f"Starting aggregation process with {len(score_path_list)} input files.")
+    if results_store_path:
+        seeds_of_size = seeds if isinstance(seeds, dict) else None
+        if seeds_of_size is not None:
+            seeds = sorted({seed for size_seeds in seeds_of_size.values() for seed in size_seeds})
+        with ResultsStore(results_store_path) as store:
+            df = store.read_scores(**results_key, samplesize=sample_sizes, seed=seeds)
+        if seeds_of_size is not None and not df.empty:
+            # the store may hold seeds of earlier runs that were not fitted at this sample size in this one
+            df = df[[seed in seeds_of_size.get(n, []) for n, seed in zip(df["n"], df["s"])]]
+        logging.info(f"Read {len(df)} score rows from results store {results_store_path}")
+        df_list = [df] if not df.empty else []
+    else:
+        df_list = read_score_files(score_path_list)
 
     # If no valid score files are found, create an empty output file and exit
     if not df_list:
         Path(stats_path).touch()
         logging.warning("No valid score files found. Created an empty output file.")
+        if results_store_path:
+            with ResultsStore(results_store_path) as store:
+                store.write_best_scores(results_key, pd.DataFrame())
         return
 
     # Concatenate all score DataFrames into a single DataFrame
@@ -96,10 +170,20 @@ def aggregate(
     columns_to_keep = df_best.columns[df_best.notna().all()].tolist()
     df_best = df_best[columns_to_keep]
 
+    # Carry the costs of the whole grid through along with the best row, if the fits were profiled
+    costs = grid_costs(df)
+    if not costs.empty:
+        df_best = df_best.merge(costs, left_on=["n", "s"], right_index=True, how="left")
+
     # Save the aggregated best scores to the specified statistics CSV file
     df_best.to_csv(stats_path, index=False)
     logging.info(f"Aggregated results saved to {stats_path}")
 
+    if results_store_path:
+        with ResultsStore(results_store_path) as store:
+            store.write_best_scores(results_key, df_best)
+        logging.info(f"Aggregated results saved to results store {results_store_path}")
+
 if __name__ == "__main__":
     """
     Entry point for the script when executed as a standalone program.
@@ -108,6 +192,10 @@ if __name__ == "__main__":
     logging.info("Starting aggregate.py script")
     aggregate(
         score_path_list=snakemake.input.scores,
-        stats_path=snakemake.output.scores
+        stats_path=snakemake.output.scores,
+        results_store_path=snakemake.params.results_store,
+        results_key=dict(snakemake.wildcards.items()),
+        sample_sizes=snakemake.params.sample_sizes,
+        seeds=snakemake.params.seeds,
     )
     logging.info("Finished aggregate.py script")
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+cost_model.py
+====================================
+This module learns the runtime and memory of fit jobs from profiled fits.
+
+With `profile_fits` enabled, every score row records the time of each phase of
+the fit, the peak RSS of the fit job and the number of features (see
+`fit_model.fit`). From these rows, a log-linear model is fitted per model:
+
+    log(cost) = b0 + b1 * log(n) + b2 * log(n_features) + sum_j c_j * log(param_j)
+
+for the runtime of a single hyperparameter combination and the peak RSS of a job
+scoring it. A fit job scores a whole grid, so its runtime is the sum and its
+memory the maximum of the predictions over the grid points.
+
+The Snakefile loads the model saved by a previous run (see `cost_model` in the
+config) to set the `priority` of fit jobs, so that expensive jobs start first
+and do not stretch the end of the run, and their `mem_mb` resource, so that
+memory-heavy jobs are not co-scheduled beyond the memory given to Snakemake with
+`--resources mem_mb=...`.
+
+Only NumPy is imported at module level, so that the Snakefile can load the
+model quickly.
+"""
+
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Columns of profiled score rows that are neither metrics nor hyperparameters
+NON_PARAM_COLUMNS = {"n", "s", "n_features", "peak_rss_mb", "hp_transferred_from", "reused"}
+
+# Columns of profiled fits besides the hyperparameters, see `read_profiled_fits`
+FIT_COLUMNS = ["model", "dataset", "features", "n", "n_features", "runtime", "peak_rss_mb"]
+
+# Factor applied to the predicted peak RSS when requesting memory
+MEMORY_MARGIN = 1.25
+
+
+def _is_param_column(column: str) -> bool:
+    """Check whether a column of a score row holds a hyperparameter."""
+    return not (
+        column in NON_PARAM_COLUMNS
+        or column.startswith("time_")
+        or column.endswith(("_train", "_val", "_test"))
+    )
+
+
+def _log(values: np.ndarray) -> np.ndarray:
+    """Logarithm of positive values, with zero for non-positive values."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.log(np.where(values > 0, values, 1.0))
+
+
+def read_profiled_fits(score_path_list: List[str]) -> "pd.DataFrame":
+    """
+    Read the profiled score rows of fit jobs.
+
+    Args:
+        score_path_list (List[str]): Score files of fit jobs, at `results/{dataset}/fits/{model}/...csv`.
+
+    Returns:
+        pd.DataFrame: One row per profiled hyperparameter combination, with the columns in `FIT_COLUMNS`
+            (`runtime` is the wall time of all phases in seconds) and the hyperparameters. Rows flagged as
+            `reused` were not computed by the job and are skipped.
+    """
+    import pandas as pd
+
+    df_list = []
+    for path in score_path_list:
+        if os.path.getsize(path) == 0:
+            continue
+        df = pd.read_csv(path)
+        wall_columns = [c for c in df.columns if c.startswith("time_") and c.endswith("_wall")]
+        if not wall_columns or "n_features" not in df.columns or "peak_rss_mb" not in df.columns:
+            continue
+        if "reused" in df.columns:
+            df = df[~df["reused"].eq(True)]
+        parts = Path(path).parts
+        df = df.assign(
+            model=parts[-2],
+            dataset=parts[-4],
+            features=Path(path).stem.split("_")[0],
+            runtime=df[wall_columns].sum(axis=1, min_count=len(wall_columns)),
+        )
+        df_list.append(df[FIT_COLUMNS + [c for c in df.columns if _is_param_column(c) and c not in FIT_COLUMNS]])
+    if not df_list:
+        return pd.DataFrame(columns=FIT_COLUMNS)
+    return pd.concat(df_list, axis=0, ignore_index=True).dropna(subset=["runtime", "peak_rss_mb", "n_features"])
+
+
+def fit_cost_model(fits: "pd.DataFrame") -> Dict[str, Any]:
+    """
+    Fit the log-linear runtime and memory models of each model.
+
+    Terms without variation in the profiled fits (e.g. the number of features if only one feature set was
+    fitted) get a coefficient of zero, and are set to their mean when predicting jobs that lack them.
+
+    Args:
+        fits (pd.DataFrame): Profiled fits, see `read_profiled_fits`.
+
+    Returns:
+        Dict[str, Any]: The cost model, with the coefficients and term means per model and the number of
+            features per dataset and feature set.
+    """
+    from pandas.api.types import is_numeric_dtype
+
+    models = {}
+    for model_name, df in fits.groupby("model"):
+        params = [c for c in df.columns if c not in FIT_COLUMNS and df[c].notna().all() and is_numeric_dtype(df[c])]
+        terms = ["n", "n_features", *params]
+        x = np.column_stack([_log(df[t].to_numpy(dtype=np.float64)) for t in terms])
+        means = x.mean(axis=0)
+        varying = x.std(axis=0) > 1e-9
+        design = np.column_stack([np.ones(len(df)), x[:, varying] - means[varying]])
+
+        coefficients = {}
+        for target, column in (("runtime", "runtime"), ("memory", "peak_rss_mb")):
+            y = np.log(np.maximum(df[column].to_numpy(dtype=np.float64), 1e-6))
+            beta, *_ = np.linalg.lstsq(design, y, rcond=None)
+            coef = np.zeros(len(terms))
+            coef[varying] = beta[1:]
+            coefficients[target] = {"intercept": float(beta[0]), "coef": coef.tolist()}
+        models[model_name] = {"terms": terms, "means": means.tolist(), "fits": len(df), **coefficients}
+        logging.info(f"Fitted cost model of {model_name} on {len(df)} profiled fits")
+
+    n_features = {
+        f"{dataset}/{features}": float(p)
+        for (dataset, features), p in fits.groupby(["dataset", "features"])["n_features"].median().items()
+    }
+    return {"models": models, "n_features": n_features}
+
+
+def _grid_points(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """All combinations of a hyperparameter grid, as in `sklearn.model_selection.ParameterGrid`."""
+    points = [{}]
+    for name, values in sorted(grid.items()):
+        points = [{**point, name: value} for point in points for value in values]
+    return points
+
+
+class CostModel:
+    """
+    Predicts the runtime and memory of fit jobs, see `fit_cost_model`.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Initialize the cost model.
+
+        Args:
+            spec (Dict[str, Any]): The fitted cost model, see `fit_cost_model`.
+        """
+        self.models = spec["models"]
+        self.n_features = spec["n_features"]
+        self._grid_terms: Dict[Tuple[str, str, str], float] = {}
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CostModel"]:
+        """
+        Load a saved cost model.
+
+        Args:
+            path (str): Path to the JSON file.
+
+        Returns:
+            Optional[CostModel]: The cost model, or None if the file does not exist or is invalid.
+        """
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Could not load cost model {path}: {e}")
+            return None
+
+    def _grid_term(self, model_name: str, grid: Dict[str, List[Any]], target: str) -> float:
+        """Combined contribution of the grid points to the log cost: log-sum-exp for runtime, max for memory."""
+        key = (model_name, json.dumps(grid, sort_keys=True), target)
+        if key not in self._grid_terms:
+            spec = self.models[model_name]
+            contributions = []
+            for point in _grid_points(grid):
+                contribution = 0.0
+                for term, coef, mean in zip(spec["terms"][2:], spec[target]["coef"][2:], spec["means"][2:]):
+                    value = _log(np.array([point[term]]))[0] if term in point else mean
+                    contribution += coef * (value - mean)
+                contributions.append(contribution)
+            contributions = np.array(contributions)
+            if target == "runtime":
+                top = contributions.max()
+                self._grid_terms[key] = float(top + np.log(np.exp(contributions - top).sum()))
+            else:
+                self._grid_terms[key] = float(contributions.max())
+        return self._grid_terms[key]
+
+    def predict_job(
+        self,
+        model_name: str,
+        n: int,
+        grid: Dict[str, List[Any]],
+        dataset: Optional[str] = None,
+        features: Optional[str] = None,
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Predict the runtime and memory of a fit job.
+
+        Args:
+            model_name (str): Name of the model.
+            n (int): Training sample size.
+            grid (Dict[str, List[Any]]): Hyperparameter grid of the model.
+            dataset (Optional[str]): Name of the dataset, used to look up the number of features.
+            features (Optional[str]): Name of the feature set, used to look up the number of features.
+
+        Returns:
+            Optional[Tuple[float, float]]: Runtime in seconds and peak RSS in MiB, or None if the model
+                was never profiled.
+        """
+        if model_name not in self.models:
+            return None
+        spec = self.models[model_name]
+        p = self.n_features.get(f"{dataset}/{features}")
+        size_terms = [_log(np.array([n]))[0], _log(np.array([p]))[0] if p is not None else spec["means"][1]]
+
+        costs = []
+        for target in ("runtime", "memory"):
+            log_cost = spec[target]["intercept"] + self._grid_term(model_name, grid, target)
+            for value, coef, mean in zip(size_terms, spec[target]["coef"][:2], spec["means"][:2]):
+                log_cost += coef * (value - mean)
+            costs.append(math.exp(log_cost))
+        return costs[0], costs[1]
+
+
+def job_priority(runtime: Optional[float]) -> int:
+    """
+    Priority of a fit job, increasing with its predicted runtime.
+
+    Args:
+        runtime (Optional[float]): Predicted runtime in seconds, None if unknown.
+
+    Returns:
+        int: 0 for unknown or sub-second runtimes, about 10 per order of magnitude above.
+    """
+    return 0 if runtime is None else max(int(10 * math.log10(1 + runtime)), 0)
+
+
+def job_mem_mb(memory: float, attempt: int = 1) -> int:
+    """
+    Memory to request for a fit job.
+
+    Args:
+        memory (float): Predicted peak RSS in MiB.
+        attempt (int): Attempt of the job, retries request proportionally more memory.
+
+    Returns:
+        int: Memory in MB, with a margin of `MEMORY_MARGIN`.
+    """
+    return int(math.ceil(memory * MEMORY_MARGIN * attempt))
+
+
+if __name__ == "__main__":
+    logging.info("Starting cost_model.py script")
+    spec = fit_cost_model(read_profiled_fits(snakemake.input.scores))
+    with open(snakemake.output.model, "w") as f:
+        json.dump(spec, f, indent=2)
+    logging.info("Finished cost_model.py script")
@@ -0,0 +1,80 @@
+"""
+cost_report.py
+====================================
+This module summarizes the cost of the profiled fits of a dataset.
+
+It reads the aggregated score files of all learning curves of a dataset, which
+carry the timings of the profiled fits (see `fit_model.fit` and
+`aggregate.grid_costs`), and breaks the cost down by model and sample size. The
+report helps decide which models are worth fitting at large sample sizes.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+try:
+    from .aggregate import read_score_files
+except ImportError:
+    from aggregate import read_score_files
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def cost_report(score_path_list: List[str], report_path: str) -> pd.DataFrame:
+    """
+    Break down the cost of the fits by model and sample size.
+
+    The report has one row per model and sample size, with the number of splits,
+    the mean number of profiled hyperparameter combinations per split, the mean
+    wall and CPU time of fitting the whole grid of a split (in total and per phase)
+    and the maximal peak RSS in MiB.
+
+    Args:
+        score_path_list (List[str]): Aggregated score files, at `results/{dataset}/scores/{model}/...csv`.
+        report_path (str): Path to save the report CSV file, left empty if no fits were profiled.
+
+    Returns:
+        pd.DataFrame: The report.
+    """
+    df_list = []
+    for path in score_path_list:
+        for df in read_score_files([path]):
+            if "grid_size" in df.columns:
+                df_list.append(df.assign(model=Path(path).parent.name))
+
+    if not df_list:
+        Path(report_path).touch()
+        logging.warning(f"No profiled fits found. Created an empty report {report_path}")
+        return pd.DataFrame()
+
+    # splits whose scores were all reused from earlier jobs have no costs
+    df = pd.concat(df_list, axis=0, ignore_index=True).dropna(subset=["grid_size"])
+    phase_columns = [c for c in df.columns if c.startswith("grid_time_")]
+    df["grid_wall"] = df[[c for c in phase_columns if c.endswith("_wall")]].sum(axis=1)
+    df["grid_cpu"] = df[[c for c in phase_columns if c.endswith("_cpu")]].sum(axis=1)
+
+    grouped = df.groupby(["model", "n"])
+    report = grouped[["grid_size", "grid_wall", "grid_cpu", *phase_columns]].mean()
+    report.insert(0, "splits", grouped.size())
+    if "grid_peak_rss_mb" in df.columns:
+        report["peak_rss_mb"] = grouped["grid_peak_rss_mb"].max()
+    report = report.reset_index().sort_values(["model", "n"])
+
+    report.to_csv(report_path, index=False)
+    logging.info(f"Cost report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.info("Starting cost_report.py script")
+    cost_report(
+        score_path_list=snakemake.input.scores,
+        report_path=snakemake.output.report,
+    )
+    logging.info("Finished cost_report.py script")
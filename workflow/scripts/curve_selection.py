@@ -0,0 +1,48 @@
+"""
+curve_selection.py
+====================================
+This module selects the learning curves drawn in a figure.
+
+The selection is shared by the workflow, which gives every plotting rule exactly
+the statistics files of its figure, and by batch plotting (see `plot_batch.py`),
+which renders all figures of a dataset in one job. The module has no
+dependencies, so that the workflow can import it while building the DAG.
+"""
+
+from typing import Any, List, Mapping, Sequence
+
+
+def select_curves(
+    curve_keys: Mapping[str, Mapping[str, str]],
+    wildcards: Any,
+    aggregated: Sequence[str] = (),
+    include_uncorrected: bool = False,
+) -> List[str]:
+    """
+    Select the statistics files of the curves drawn in a figure.
+
+    The curves match all wildcards of the figure, except for the `aggregated`
+    wildcards that vary between them. With `include_uncorrected`, the curve
+    without confound correction is added as well.
+
+    Args:
+        curve_keys (Mapping[str, Mapping[str, str]]): Wildcards of each curve, by its statistics file.
+        wildcards (Any): Wildcards of the figure, a dict or Snakemake's wildcards.
+        aggregated (Sequence[str]): Wildcards that vary between the curves of the figure.
+        include_uncorrected (bool): Whether to add the curve without confound correction.
+
+    Returns:
+        List[str]: Statistics files of the curves in the figure, sorted.
+    """
+    selected = []
+    for path, key in curve_keys.items():
+        fixed = [k for k in key if k not in aggregated]
+        if all(key[k] == wildcards[k] for k in fixed):
+            selected.append(path)
+        elif (
+            include_uncorrected
+            and key["confound_correction_method"] == key["confound_correction_cni"] == "none"
+            and all(key[k] == wildcards[k] for k in fixed if k != "confound_correction_method")
+        ):
+            selected.append(path)
+    return sorted(selected)
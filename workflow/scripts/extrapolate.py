@@ -6,15 +6,30 @@ It includes utilities for fitting power law models to data and handling JSON ser
 import json
 import os
 import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Union, Optional
+from typing import Any, Dict, List, Sequence, Tuple, Union, Optional
 
 import numpy as np
 import pandas as pd
-import scipy.optimize
 from sklearn.metrics import r2_score
 
+try:
+    from .results_store import ResultsStore, curve_key_from_path
+except ImportError:
+    from results_store import ResultsStore, curve_key_from_path
+
 MIN_DOF = 2  # Minimum degrees of freedom required for curve fitting
+BOOTSTRAP_SEED = 42  # Seed of the bootstrap random number generator
+BOOTSTRAP_BATCH_SIZE = 200  # Replicates added per batch in adaptive bootstrap mode
+BAND_POINTS = 100  # Number of sample sizes of the precomputed prediction bands
+# Candidate decay rates b of the coarse search, refined around the best candidate
+# and extended beyond the largest candidate while the fit keeps improving there
+B_GRID = np.concatenate([[0.0], np.logspace(-3, np.log10(20), 96)])
+MAX_AMPLITUDE_LOG = 700  # Largest log(x_min^b) for which the amplitude of the unnormalized fit is finite
+GOLDEN_SECTION_ITERATIONS = 60  # Iterations of the golden-section refinement of b
+MIN_VARIANCE = 1e-20  # Below this variance of t^(-b), the amplitude is not identifiable and set to 0
 
 # Set up logging
 log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
@@ -61,6 +76,112 @@ def power_law_model(t: Union[float, np.ndarray], a: float, b: float, c: float) -
     return a * t ** (-b) + c
 
 
+def _project_amplitude(
+    u: np.ndarray, y: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Solve the linear least-squares problem y = a * u + c for a <= 0.
+
+    Args:
+        u: Values of t**(-b) of shape (replicates, points).
+        y: Dependent variable data of shape (replicates, points).
+
+    Returns:
+        Amplitudes a, offsets c and residual sums of squares, each of shape (replicates,).
+    """
+    u_mean, y_mean = u.mean(axis=1), y.mean(axis=1)
+    u_c, y_c = u - u_mean[:, None], y - y_mean[:, None]
+    var = np.sum(u_c**2, axis=1)
+    cov = np.sum(u_c * y_c, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.where(var > MIN_VARIANCE, np.minimum(cov / var, 0), 0.0)
+    c = y_mean - a * u_mean
+    cost = np.sum((a[:, None] * u + c[:, None] - y) ** 2, axis=1)
+    return a, c, cost
+
+
+def solve_power_law(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Least-squares fit of y = a * x^(-b) + c with a <= 0 and b >= 0 for many replicates.
+
+    For a fixed b the model is linear in a and c, so both are projected out in
+    closed form and only a one-dimensional search over b remains (variable
+    projection). The profiled cost is evaluated on `B_GRID` for all replicates at
+    once and refined by golden-section search around the best grid point. If the
+    best grid point is the largest one, b is doubled while the cost keeps
+    decreasing, so b is only bounded by `MAX_AMPLITUDE_LOG`, beyond which the
+    amplitude a overflows. x is normalized by its minimum to keep t^(-b) within (0, 1].
+
+    Args:
+        x: Independent variable data of shape (points,).
+        y: Dependent variable data of shape (replicates, points).
+
+    Returns:
+        Fitted parameters (a, b, c) of shape (replicates, 3), NaN for replicates with non-finite data.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    log_t = np.log(x / x.min())
+
+    # Coarse search: the profiled cost only depends on the grid through t^(-b)
+    u_grid = np.exp(-B_GRID[:, None] * log_t)
+    u_c = u_grid - u_grid.mean(axis=1, keepdims=True)
+    y_c = y - y.mean(axis=1, keepdims=True)
+    var = np.sum(u_c**2, axis=1)
+    cov = y_c @ u_c.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_grid = np.where(var > MIN_VARIANCE, np.minimum(cov / var, 0), 0.0)
+    cost_grid = np.sum(y_c**2, axis=1, keepdims=True) - 2 * a_grid * cov + a_grid**2 * var
+    best = np.argmin(cost_grid, axis=1)
+    b_best, cost_best = B_GRID[best], cost_grid[np.arange(len(y)), best]
+    lo = B_GRID[np.maximum(best - 1, 0)]
+    hi = B_GRID[np.minimum(best + 1, len(B_GRID) - 1)]
+
+    # Extend the search beyond the largest grid point while the cost keeps decreasing
+    b_limit = MAX_AMPLITUDE_LOG / np.log(x.min()) if x.min() > 1 else np.inf
+    growing = best == len(B_GRID) - 1
+    if growing.any():
+        cost_best = np.where(growing, _project_amplitude(np.exp(-b_best[:, None] * log_t), y)[2], cost_best)
+    while growing.any():
+        b_next = np.minimum(2 * b_best, b_limit)
+        cost_next = _project_amplitude(np.exp(-b_next[:, None] * log_t), y)[2]
+        improved = growing & (b_next > b_best) & (cost_next < cost_best)
+        lo = np.where(improved, b_best, lo)
+        hi = np.where(growing, b_next, hi)
+        b_best = np.where(improved, b_next, b_best)
+        cost_best = np.where(improved, cost_next, cost_best)
+        growing = improved
+
+    # Golden-section refinement within the neighbouring grid points
+    ratio = (np.sqrt(5) - 1) / 2
+    b1, b2 = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    cost1 = _project_amplitude(np.exp(-b1[:, None] * log_t), y)[2]
+    cost2 = _project_amplitude(np.exp(-b2[:, None] * log_t), y)[2]
+    for _ in range(GOLDEN_SECTION_ITERATIONS):
+        left = cost1 <= cost2
+        hi = np.where(left, b2, hi)
+        lo = np.where(left, lo, b1)
+        b_new = np.where(left, hi - ratio * (hi - lo), lo + ratio * (hi - lo))
+        cost_new = _project_amplitude(np.exp(-b_new[:, None] * log_t), y)[2]
+        b1, b2, cost1, cost2 = (
+            np.where(left, b_new, b2),
+            np.where(left, b1, b_new),
+            np.where(left, cost_new, cost2),
+            np.where(left, cost1, cost_new),
+        )
+
+    # Keep the grid point if the refinement did not improve on it (e.g. at b = 0)
+    b = np.where(cost1 <= cost2, b1, b2)
+    refined = _project_amplitude(np.exp(-b[:, None] * log_t), y)
+    b = np.where(refined[2] <= cost_best, b, b_best)
+    a, c, _ = _project_amplitude(np.exp(-b[:, None] * log_t), y)
+
+    # Undo the normalization: a * (x / x_min)^(-b) = a * x_min^b * x^(-b)
+    p = np.stack([a * x.min() ** b, b, c], axis=1)
+    p[~np.isfinite(p).all(axis=1)] = np.nan
+    return p
+
+
 def fit_curve(x: np.ndarray, y: np.ndarray, y_e: np.ndarray) -> Dict[str, Union[np.ndarray, float]]:
     """
     Fit a power law curve to the data.
@@ -87,16 +208,10 @@ def fit_curve(x: np.ndarray, y: np.ndarray, y_e: np.ndarray) -> Dict[str, Union[
         return result
 
     try:
-        # Fit the power law model using non-linear least squares
-        p_mean, _ = scipy.optimize.curve_fit(
-            power_law_model,
-            x,
-            y,
-            # sigma=y_e,  # Uncomment if y_e represents standard errors
-            maxfev=5000,  # Maximum number of function evaluations
-            p0=(-1, 0.1, 0.5),  # Initial guess for parameters
-            bounds=((-np.inf, 0, -np.inf), (0, np.inf, np.inf)),  # Parameter bounds
-        )
+        # Fit the power law model using least squares with a closed-form amplitude and offset
+        p_mean = solve_power_law(x, y)[0]
+        if not np.isfinite(p_mean).all():
+            raise ValueError("Non-finite power law parameters")
         result["p_mean"] = p_mean
 
         # Calculate R² score for goodness of fit
@@ -117,34 +232,197 @@ def fit_curve(x: np.ndarray, y: np.ndarray, y_e: np.ndarray) -> Dict[str, Union[
         return result
 
 
+def bootstrap_means(
+    samples: Sequence[np.ndarray], repeats: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resample the scores of every sample size and reduce the resamples to means and SEMs.
+
+    The resample indices of all repetitions are drawn as a single integer array
+    per sample size, so no intermediate pandas objects are created.
+
+    Args:
+        samples: Scores of each sample size.
+        repeats: Number of bootstrap repetitions.
+        rng: Random number generator used to draw the resamples.
+
+    Returns:
+        Means and standard errors of the resamples, both of shape (repeats, len(samples)).
+    """
+    y_mean = np.empty((repeats, len(samples)))
+    y_sem = np.full((repeats, len(samples)), np.nan)
+    for j, values in enumerate(samples):
+        resamples = values[rng.integers(0, len(values), size=(repeats, len(values)))]
+        y_mean[:, j] = resamples.mean(axis=1)
+        if len(values) > 1:
+            y_sem[:, j] = resamples.std(axis=1, ddof=1) / np.sqrt(len(values))
+    return y_mean, y_sem
+
+
+def fit_curve_batch(x: np.ndarray, y: np.ndarray, y_e: np.ndarray) -> np.ndarray:
+    """
+    Fit power law curves to many replicates of the same sample sizes at once.
+
+    Only the parameters are estimated, goodness-of-fit metrics are skipped.
+
+    Args:
+        x: Independent variable data.
+        y: Dependent variable data of shape (replicates, len(x)).
+        y_e: Standard error of y, same shape as y (unused, as in `fit_curve`).
+
+    Returns:
+        Fitted parameters of shape (replicates, 3), rows of failed fits are NaN.
+    """
+    if len(x) - 3 < MIN_DOF:
+        return np.full((len(y), 3), np.nan)
+    return solve_power_law(x, y)
+
+
+def bootstrap(
+    x: np.ndarray,
+    mask: np.ndarray,
+    samples: Sequence[np.ndarray],
+    repeats: int,
+    rng: np.random.Generator,
+    tolerance: Optional[float] = None,
+    batch_size: int = BOOTSTRAP_BATCH_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw bootstrap replicates of the mean scores and fit a power law to each of them.
+
+    Without a tolerance, exactly `repeats` replicates are drawn. Otherwise replicates
+    are added in batches until the 2.5 and 97.5 percentiles of the parameters and
+    of the mean scores change by at most `tolerance` times the width of their
+    interval between consecutive batches, or until `repeats` replicates are reached.
+
+    Args:
+        x: Sample sizes.
+        mask: Sample sizes used for curve fitting.
+        samples: Scores of each sample size.
+        repeats: Number of bootstrap repetitions, the maximum in adaptive mode.
+        rng: Random number generator used to draw the resamples.
+        tolerance: Relative tolerance of the percentile estimates, or None to disable adaptive mode.
+        batch_size: Number of replicates added per batch in adaptive mode.
+
+    Returns:
+        Mean scores of shape (replicates, len(x)) and fitted parameters of shape (replicates, 3).
+    """
+    y_bootstrap: List[np.ndarray] = []
+    p_bootstrap: List[np.ndarray] = []
+    previous = None
+    while sum(len(y) for y in y_bootstrap) < repeats:
+        n_batch = min(batch_size if tolerance else repeats, repeats - sum(len(y) for y in y_bootstrap))
+        y_bs_mean, y_bs_sem = bootstrap_means(samples, n_batch, rng)
+        y_bootstrap.append(y_bs_mean)
+        p_bootstrap.append(fit_curve_batch(x[mask], y_bs_mean[:, mask], y_bs_sem[:, mask]))
+        if not tolerance:
+            break
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all replicates of a parameter may have failed
+            current = np.hstack([
+                np.nanpercentile(np.vstack(p_bootstrap), [2.5, 97.5], axis=0),
+                np.percentile(np.vstack(y_bootstrap), [2.5, 97.5], axis=0),
+            ])
+        if previous is not None and np.all(np.abs(current - previous) <= tolerance * (current[1] - current[0])):
+            logging.info(f"Bootstrap percentiles converged after {sum(len(y) for y in y_bootstrap)} repetitions")
+            break
+        previous = current
+
+    return np.vstack(y_bootstrap), np.vstack(p_bootstrap)
+
+
+def prediction_bands(
+    x_min: float, x_max: float, p_mean: np.ndarray, p_bootstrap: Sequence[Sequence[float]]
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the point fit and bootstrap prediction quantiles on a log-spaced grid.
+
+    Args:
+        x_min: Smallest sample size of the grid.
+        x_max: Largest sample size of the grid, e.g. the `extrapolate_to` style setting.
+        p_mean: Parameters of the point fit.
+        p_bootstrap: Parameters of the successful bootstrap fits.
+
+    Returns:
+        Dictionary with the grid `n`, the point fit `fit` and the bootstrap `median`,
+        `lower` (2.5%) and `upper` (97.5%) predictions, NaN where not available.
+    """
+    n = np.logspace(np.log10(x_min), np.log10(max(x_max, x_min)), BAND_POINTS)
+    bands = {"n": n, "fit": power_law_model(n, *np.asarray(p_mean, dtype=float))}
+    p = np.asarray(p_bootstrap, dtype=float).reshape(-1, 3)
+    if len(p) > 0:
+        y = power_law_model(n, p[:, 0:1], p[:, 1:2], p[:, 2:3])
+        bands["lower"], bands["median"], bands["upper"] = np.percentile(y, [2.5, 50, 97.5], axis=0)
+    else:
+        bands["lower"] = bands["median"] = bands["upper"] = np.full(BAND_POINTS, np.nan)
+    return bands
+
+
+def save_bands(bands_path: str, bands: Dict[str, np.ndarray]) -> None:
+    """
+    Save prediction bands as a compressed NumPy archive.
+
+    Args:
+        bands_path: Path to the `.bands.npz` file.
+        bands: Prediction bands as returned by `prediction_bands`.
+    """
+    with open(bands_path, "wb") as f:
+        np.savez_compressed(f, **{k: v.astype(np.float32) for k, v in bands.items()})
+
+
 def extrapolate(
     stats_path: str,
     extra_path: str,
     bootstrap_path: str,
     repeats: int,
+    results_store_path: Optional[str] = None,
+    results_key: Optional[Dict[str, str]] = None,
+    tolerance: Optional[float] = None,
+    batch_size: int = BOOTSTRAP_BATCH_SIZE,
+    bands_path: Optional[str] = None,
+    extrapolate_to: Optional[int] = None,
 ) -> None:
     """
     Fit a power law model to the scores and perform bootstrap analysis for uncertainties.
 
+    If a results store is given, the best scores are queried from the store instead
+    of the stats CSV file, and the results are written to the store as well.
+
     Args:
         stats_path: Path to the input stats CSV file.
         extra_path: Path to save the extrapolation results as a JSON file.
         bootstrap_path: Path to save the bootstrap results as a JSON file.
-        repeats: Number of bootstrap repetitions.
+        repeats: Number of bootstrap repetitions, the maximum if a tolerance is given.
+        results_store_path: Path to the results store.
+        results_key: Curve wildcards, required if a results store is given.
+        tolerance: Relative tolerance of the bootstrap percentiles for adaptive bootstrapping.
+        batch_size: Number of bootstrap repetitions added per batch in adaptive mode.
+        bands_path: Path to save the prediction bands as a compressed NumPy archive.
+        extrapolate_to: Largest sample size of the prediction bands, defaults to the largest observed one.
     """
     logging.info(f"Starting extrapolation process with {repeats} bootstrap repetitions")
 
-    # Check if the stats file is empty
-    if os.stat(stats_path).st_size == 0:
+    if results_store_path:
+        with ResultsStore(results_store_path) as store:
+            df = store.read_best_scores(**results_key)
+        logging.info(f"Loaded data from results store {results_store_path}. Shape: {df.shape}")
+    elif os.stat(stats_path).st_size > 0:
+        # Load the scores into a DataFrame
+        df = pd.read_csv(stats_path, index_col=False)
+        logging.info(f"Loaded data from {stats_path}. Shape: {df.shape}")
+    else:
+        df = pd.DataFrame()
+
+    # Check if there are any scores
+    if df.empty:
         logging.warning(f"Input stats file {stats_path} is empty. Creating empty output files.")
         Path(extra_path).touch()
         Path(bootstrap_path).touch()
+        if bands_path:
+            Path(bands_path).touch()
         return
 
-    # Load the scores into a DataFrame
-    df = pd.read_csv(stats_path, index_col=False)
-    logging.info(f"Loaded data from {stats_path}. Shape: {df.shape}")
-
     # Determine the metric to use based on available columns
     metric = "r2_test" if "r2_test" in df.columns else "acc_test"
     logging.info(f"Using metric: {metric}")
@@ -178,9 +456,6 @@ def extrapolate(
     fit_result = fit_curve(x[mask], y_mean[mask], y_sem[mask])
     result.update(fit_result)
 
-    # Set a fixed random seed for reproducibility
-    np.random.seed(42)
-
     # Modify the bootstrap section
     if result["dof"] < MIN_DOF:
         logging.warning(f"Insufficient degrees of freedom (dof = {result['dof']} < {MIN_DOF}). Skipping bootstrap.")
@@ -194,35 +469,25 @@ def extrapolate(
             "y_bootstrap_std": [np.nan] * len(x),
             "y_bootstrap_975": [np.nan] * len(x),
             "y_bootstrap_025": [np.nan] * len(x),
+            "bootstrap_repetitions": 0,
         })
         # Create a bootstrap file with an empty list
+        p_bootstrap = []
         with open(bootstrap_path, "w") as f:
-            json.dump([], f)
+            json.dump(p_bootstrap, f)
     else:
-        # Perform bootstrap repetitions
+        # Perform bootstrap repetitions, using a fixed seed for reproducibility
         logging.info(f"Starting bootstrap analysis with {repeats} repetitions")
-        p_bootstrap: List[List[float]] = []
-        y_bootstrap: List[List[float]] = [[] for _ in x]
+        rng = np.random.default_rng(BOOTSTRAP_SEED)
+        samples = [df.loc[df["n"] == n, metric].to_numpy() for n in x]
+        y_bs_mean, p_bs = bootstrap(x, mask, samples, repeats, rng, tolerance, batch_size)
+        p_bootstrap: List[List[float]] = p_bs[np.isfinite(p_bs).all(axis=1)].tolist()
+        result["bootstrap_repetitions"] = len(p_bs)
 
-        for i in range(repeats):
-            y_bs_sample = df.groupby("n")[metric].apply(lambda g: g.sample(n=len(g), replace=True))
-            y_bs_sample_mean = y_bs_sample.groupby("n").mean()
-            y_bs_sample_sem = y_bs_sample.groupby("n").sem()
-
-            for j, n in enumerate(x):
-                y_bootstrap[j].append(y_bs_sample_mean[n])
-
-            p_ = fit_curve(x[mask], y_bs_sample_mean[mask], y_bs_sample_sem[mask])["p_mean"]
-            if np.isfinite(p_).all():
-                p_bootstrap.append(p_.tolist())
-            
-            if (i + 1) % 100 == 0:
-                logging.info(f"Completed {i + 1} bootstrap repetitions")
-
-        logging.info(f"Bootstrap completed: {len(p_bootstrap)} successful out of {repeats} repetitions")
+        logging.info(f"Bootstrap completed: {len(p_bootstrap)} successful out of {len(p_bs)} repetitions")
 
         # Calculate and store bootstrap statistics
-        if len(p_bootstrap) > 0.9 * repeats:
+        if len(p_bootstrap) > 0.9 * len(p_bs):
             p_bootstrap_array = np.array(p_bootstrap)
             result.update({
                 "p_bootstrap_mean": np.mean(p_bootstrap_array, axis=0).tolist(),
@@ -241,7 +506,7 @@ def extrapolate(
             })
 
         # Add bootstrap mean and standard deviation to the result
-        y_bootstrap_array = np.array(y_bootstrap)
+        y_bootstrap_array = y_bs_mean.T
         result.update({
             "y_bootstrap_mean": np.mean(y_bootstrap_array, axis=1).tolist(),
             "y_bootstrap_std": np.std(y_bootstrap_array, axis=1).tolist(),
@@ -253,6 +518,15 @@ def extrapolate(
         with open(bootstrap_path, "w") as f:
             json.dump(p_bootstrap, f, cls=NpEncoder, indent=0)
 
+    if bands_path:
+        save_bands(bands_path, prediction_bands(x.min(), extrapolate_to or x.max(), result["p_mean"], p_bootstrap))
+        logging.info(f"Prediction bands saved to {bands_path}")
+
+    if results_store_path:
+        with ResultsStore(results_store_path) as store:
+            store.write_statistics(results_key, result, p_bootstrap)
+        logging.info(f"Extrapolation results saved to results store {results_store_path}")
+
     # Save the extrapolation results to the specified JSON file
     with open(extra_path, "w") as f:
         json.dump(result, f, cls=NpEncoder, indent=0)
@@ -261,10 +535,76 @@ def extrapolate(
     logging.info("Extrapolation process completed successfully")
 
 
+def extrapolate_batch(
+    stats_paths: Sequence[str],
+    extra_paths: Sequence[str],
+    bootstrap_paths: Sequence[str],
+    bands_paths: Optional[Sequence[str]] = None,
+    workers: int = 1,
+    **kwargs: Any,
+) -> None:
+    """
+    Extrapolate many learning curves within a single process.
+
+    This avoids the interpreter startup and import overhead of one process per
+    curve. With more than one worker, the curves are distributed over a process pool.
+
+    Args:
+        stats_paths: Paths to the input stats CSV files.
+        extra_paths: Paths to save the extrapolation results, in the same order.
+        bootstrap_paths: Paths to save the bootstrap results, in the same order.
+        bands_paths: Paths to save the prediction bands, in the same order.
+        workers: Number of worker processes.
+        **kwargs: Further arguments passed to `extrapolate`. Curve keys for the
+            results store are derived from the output paths.
+    """
+    jobs = [
+        {
+            "stats_path": stats_path,
+            "extra_path": extra_path,
+            "bootstrap_path": bootstrap_path,
+            "bands_path": bands_path,
+            "results_key": curve_key_from_path(extra_path) if kwargs.get("results_store_path") else None,
+            **kwargs,
+        }
+        for stats_path, extra_path, bootstrap_path, bands_path in zip(
+            stats_paths, extra_paths, bootstrap_paths, bands_paths or [None] * len(stats_paths)
+        )
+    ]
+    logging.info(f"Extrapolating {len(jobs)} learning curves with {workers} workers")
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            for future in [executor.submit(extrapolate, **job) for job in jobs]:
+                future.result()
+    else:
+        for job in jobs:
+            extrapolate(**job)
+
+
 if __name__ == "__main__":
-    extrapolate(
-        stats_path=snakemake.input.scores,
-        extra_path=snakemake.output.stats,
-        bootstrap_path=snakemake.output.bootstraps,
+    kwargs = dict(
         repeats=snakemake.params.bootstrap_repetitions,
-    )
\ No newline at end of file
+        results_store_path=snakemake.params.results_store,
+        tolerance=snakemake.params.bootstrap_tolerance or None,
+        batch_size=snakemake.params.bootstrap_batch_size,
+        extrapolate_to=snakemake.params.extrapolate_to,
+    )
+    if snakemake.rule == "extrapolate":
+        extrapolate(
+            stats_path=snakemake.input.scores,
+            extra_path=snakemake.output.stats,
+            bootstrap_path=snakemake.output.bootstraps,
+            bands_path=snakemake.output.bands,
+            results_key=dict(snakemake.wildcards.items()),
+            **kwargs,
+        )
+    else:
+        extrapolate_batch(
+            stats_paths=snakemake.input.scores,
+            extra_paths=snakemake.output.stats,
+            bootstrap_paths=snakemake.output.bootstraps,
+            bands_paths=snakemake.output.bands,
+            workers=snakemake.threads,
+            **kwargs,
+        )
@@ -0,0 +1,46 @@
+"""
+fit_client.py
+====================================
+This module is the `fit` rule's entry point if `fit_worker` is enabled in the config.
+
+Instead of importing scikit-learn and fitting the model itself, the job submits
+its split, model and grid to the long-running fit worker (see `fit_worker.py`)
+and waits for the scores.
+"""
+
+import logging
+import os
+
+try:
+    from .fit_worker import fit_in_worker
+except ImportError:
+    from fit_worker import fit_in_worker
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+if __name__ == "__main__":
+    fit_in_worker(
+        {
+            "features_path": snakemake.input.features,
+            "targets_path": snakemake.input.targets,
+            "split_path": snakemake.input.split,
+            "scores_path": snakemake.output.scores,
+            "model_name": snakemake.wildcards.model,
+            "grid": snakemake.params.grid,
+            "existing_scores_path_list": snakemake.params.existing_scores,
+            "confound_correction_method": snakemake.wildcards.confound_correction_method,
+            "cni_path": snakemake.input.covariates,
+            "results_store_path": snakemake.params.results_store,
+            "results_key": dict(snakemake.wildcards.items()),
+            "score_index_path": snakemake.params.score_index,
+            "profile": snakemake.params.profile,
+            "search": snakemake.params.search,
+            "hp_transfer": snakemake.params.hp_transfer or 0,
+            "hp_transfer_path": snakemake.input.previous[0] if snakemake.input.previous else None,
+            "hp_transfer_top": snakemake.params.hp_transfer_top,
+        },
+        processes=snakemake.params.fit_worker_processes,
+    )
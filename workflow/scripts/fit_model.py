@@ -6,12 +6,19 @@ It includes abstract base classes for classifiers and regressors, specific model
 implementations, and functions to fit models and record their performance metrics.
 """
 
+import importlib
 import json
+import math
 import os
 import logging
+import resource
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from functools import partial
 from pathlib import Path
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Literal, Union, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Literal, Union, Optional, Tuple
 
 import numpy as np
 import h5py
@@ -26,20 +33,82 @@ from sklearn.metrics import (
 )
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import ParameterGrid
-from sklearn.dummy import DummyClassifier, DummyRegressor
-from sklearn.linear_model import LinearRegression, LogisticRegression, Ridge, RidgeCV, RidgeClassifier, RidgeClassifierCV
 from sklearn.base import BaseEstimator
-from sklearn.ensemble import GradientBoostingClassifier, GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
-from sklearn.decomposition import PCA
-from sklearn.feature_selection import RFE
-from sklearn.pipeline import make_pipeline
-from sklearn.kernel_ridge import KernelRidge
-from sklearn.svm import SVC, SVR
+
+try:
+    from .registry import MODELS as MODEL_REGISTRY
+    from .results_store import ResultsStore
+    from .score_index import ScoreIndex, canonical_params, code_version
+    from .search_space import SearchSpace, is_sampled, propose_candidate, random_candidates
+    from .shared_data import SharedDataCache
+except ImportError:
+    from registry import MODELS as MODEL_REGISTRY
+    from results_store import ResultsStore
+    from score_index import ScoreIndex, canonical_params, code_version
+    from search_space import SearchSpace, is_sampled, propose_candidate, random_candidates
+    from shared_data import SharedDataCache
 
 # Set up logging
 log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
 logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Version of the scoring code, the score index does not reuse scores computed by other versions
+CODE_VERSION = code_version([__file__, str(Path(__file__).with_name("registry.py"))])
+
+# Phases of scoring a hyperparameter combination that are timed when profiling
+PROFILED_PHASES = ["load", "scaling", "fit", "predict", "metrics"]
+
+# Strategies of searching a hyperparameter grid, see `fit`
+SEARCH_STRATEGIES = ["grid", "halving", "random", "bayesian"]
+
+# Strategies that draw combinations from the grid's search space, see `search_space.py`
+SAMPLED_SEARCHES = ["random", "bayesian"]
+
+# Factor by which successive halving reduces the candidates and grows the training subset per rung
+HALVING_FACTOR = 3
+
+# Smallest training subset that successive halving evaluates candidates on
+HALVING_MIN_TRAIN = 50
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], phase: str) -> Iterator[None]:
+    """
+    Record the wall and CPU time of the enclosed block as `time_<phase>_wall` and `time_<phase>_cpu`.
+
+    CPU time includes all threads of the process, but not child processes.
+
+    Args:
+        timings (Optional[Dict[str, float]]): Timings in seconds to add to, nothing is recorded if None.
+        phase (str): Name of the phase.
+    """
+    if timings is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        timings[f"time_{phase}_wall"] = timings.get(f"time_{phase}_wall", 0.0) + time.perf_counter() - wall
+        timings[f"time_{phase}_cpu"] = timings.get(f"time_{phase}_cpu", 0.0) + time.process_time() - cpu
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process in MiB.
+
+    This is the peak of the whole process, so it is only the peak of a fit job if the job runs in a fresh
+    process, see `fit`.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def is_profile_column(column: str) -> bool:
+    """Check whether a column of a score row holds a cost recorded by a profiled fit, see `score_candidates`."""
+    return column.startswith("time_") or column in ("peak_rss_mb", "reused")
+
 
 class BaseModel(ABC):
     """
@@ -86,6 +155,7 @@ class BaseModel(ABC):
         idx_val: List[int],
         idx_test: List[int],
         mode: Literal["normal", "with-cni", "only-cni"] = "normal",
+        timings: Optional[Dict[str, float]] = None,
         **kwargs: Any,
     ) -> Dict[str, float]:
         """
@@ -99,33 +169,40 @@ class BaseModel(ABC):
             idx_val (List[int]): Indices for the validation set.
             idx_test (List[int]): Indices for the test set.
             mode (Literal["normal", "with-cni", "only-cni"]): Mode of feature inclusion.
+            timings (Optional[Dict[str, float]]): If given, the wall and CPU time of each phase in
+                `PROFILED_PHASES` is added to it, see `timed`.
             **kwargs: Additional keyword arguments for the model generator.
 
         Returns:
             Dict[str, float]: Dictionary of computed performance metrics.
         """
         # Select features and targets based on the specified mode
-        x_train, x_val, x_test, y_train, y_val, y_test = self._select_features_and_targets(
-            x, y, cni, idx_train, idx_val, idx_test, mode
-        )
+        with timed(timings, "load"):
+            x_train, x_val, x_test, y_train, y_val, y_test = self._select_features_and_targets(
+                x, y, cni, idx_train, idx_val, idx_test, mode
+            )
 
         # Check for NaN or infinite values
         self._check_data_validity(x_train, x_val, x_test, y_train, y_val, y_test)
 
         # Initialize and fit the model
         model = self.model_generator(**kwargs)
-        x_train_scaled, x_val_scaled, x_test_scaled = self._scale_features(x_train, x_val, x_test)
-        y_train_scaled = self._scale_targets(y_train)
-        model.fit(x_train_scaled, y_train_scaled)
+        with timed(timings, "scaling"):
+            x_train_scaled, x_val_scaled, x_test_scaled = self._scale_features(x_train, x_val, x_test)
+            y_train_scaled = self._scale_targets(y_train)
+        with timed(timings, "fit"):
+            model.fit(x_train_scaled, y_train_scaled)
 
         # Predict and evaluate
-        y_hat_train = self._predict(model, x_train_scaled)
-        y_hat_val = self._predict(model, x_val_scaled)
-        y_hat_test = self._predict(model, x_test_scaled)
+        with timed(timings, "predict"):
+            y_hat_train = self._predict(model, x_train_scaled)
+            y_hat_val = self._predict(model, x_val_scaled)
+            y_hat_test = self._predict(model, x_test_scaled)
 
-        return self.compute_metrics(
-            y_hat_train, y_hat_val, y_hat_test, y_train, y_val, y_test
-        )
+        with timed(timings, "metrics"):
+            return self.compute_metrics(
+                y_hat_train, y_hat_val, y_hat_test, y_train, y_val, y_test
+            )
 
     def _select_features_and_targets(
         self,
@@ -336,94 +413,290 @@ class RegressionModel(BaseModel):
         }
 
 
+def build_estimator(spec: Dict[str, Any], **args: Any) -> BaseEstimator:
+    """
+    Create the estimator of a model specification in the registry (see `registry.py`).
+
+    The module of an estimator is only imported when the estimator is created.
+
+    Args:
+        spec (Dict[str, Any]): Specification of an estimator or pipeline.
+        **args: Hyperparameters of the estimator. Hyperparameters of pipeline steps are prefixed
+            with the name of the step and two underscores, e.g. `pca__n_components`.
+
+    Returns:
+        BaseEstimator: The estimator.
+    """
+    if "pipeline" in spec:
+        from sklearn.pipeline import make_pipeline
+
+        return make_pipeline(*(
+            build_estimator(step, **{k.split(f"{prefix}__")[1]: v for k, v in args.items() if k.startswith(f"{prefix}__")})
+            for prefix, step in spec["pipeline"].items()
+        ))
+
+    module_name, estimator_name = spec["estimator"].split(":")
+    estimator = getattr(importlib.import_module(module_name), estimator_name)
+    params = {
+        k: build_estimator(v) if isinstance(v, dict) and "estimator" in v else v
+        for k, v in spec.get("params", {}).items()
+    }
+    return estimator(**params, **args)
+
+
 # Define available models with their corresponding generators and names
 MODELS: Dict[str, Union[ClassifierModel, RegressionModel]] = {
-    "majority-cls": ClassifierModel(
-        lambda **args: DummyClassifier(strategy="most_frequent", **args),
-        "majority classifier",
-    ),
-    "logistic-regression-cls": ClassifierModel(
-        lambda **args: LogisticRegression(**args), "logistic regression classifier"
-    ),
-    "ridge-cls": ClassifierModel(
-        lambda **args: RidgeClassifier(**args), "ridge classifier"
-    ),
-    "poly-kernel-svm-cls": ClassifierModel(
-        lambda **args: SVC(kernel="poly", **args), "polynomial kernel svm classifier"
-    ),
-    "rbf-kernel-svm-cls": ClassifierModel(
-        lambda **args: SVC(kernel="rbf", **args), "rbf kernel svm classifier"
-    ),
-    "random-forest-cls": ClassifierModel(
-        lambda **args: RandomForestClassifier(**args), "random forest classifier"
-    ),
-    
-    "pca-ridge-cls": ClassifierModel(
-        lambda **args: make_pipeline(
-            PCA(**{k.split('pca__')[1]: v for k, v in args.items() if k.startswith('pca__')}),
-            RidgeClassifier(**{k.split('ridge__')[1]: v for k, v in args.items() if k.startswith('ridge__')})
-        ), "pca ridge classifier"
-    ),
-    "rfe-ridge-cls": ClassifierModel(
-        lambda **args: make_pipeline(
-            RFE(estimator=RidgeClassifierCV(), **{k.split('rfe__')[1]: v for k, v in args.items() if k.startswith('rfe__')}),
-            RidgeClassifier(**{k.split('ridge__')[1]: v for k, v in args.items() if k.startswith('ridge__')})
-        ), "rfe ridge classifier"
-    ),
-    "xgb-cls": ClassifierModel(
-        lambda **args: GradientBoostingClassifier(random_state=42, n_iter_no_change=10, **args), "xgboost classifier"
-    ),
-
-    "mean-reg": RegressionModel(
-        lambda **args: DummyRegressor(strategy="mean", **args), "mean regressor"
-    ),
-    "ols-reg": RegressionModel(
-        lambda **args: LinearRegression(**args), "ordinary least squares regressor"
-    ),
-    "ridge-reg": RegressionModel(lambda **args: Ridge(**args), "ridge regressor"),
-    "poly-kernel-svm-reg": RegressionModel(
-        lambda **args: SVR(kernel="poly", **args), "polynomial kernel svm regressor"
-    ),
-    "rbf-kernel-svm-reg": RegressionModel(
-        lambda **args: SVR(kernel="rbf", **args), "rbf kernel svm regressor"
-    ),
-    "random-forest-reg": RegressionModel(
-        lambda **args: RandomForestRegressor(**args), "random forest regressor"
-    ),
-
-    "pca-ridge-reg": RegressionModel(
-        lambda **args: make_pipeline(
-            PCA(**{k.split('pca__')[1]: v for k, v in args.items() if k.startswith('pca__')}),
-            Ridge(**{k.split('ridge__')[1]: v for k, v in args.items() if k.startswith('ridge__')})
-        ), "pca ridge regressor"
-    ),
-    "rfe-ridge-reg": RegressionModel(
-        lambda **args: make_pipeline(
-            RFE(estimator=RidgeCV(), **{k.split('rfe__')[1]: v for k, v in args.items() if k.startswith('rfe__')}),
-            Ridge(**{k.split('ridge__')[1]: v for k, v in args.items() if k.startswith('ridge__')})
-        ), "rfe ridge regressor"
-    ),
-    "xgb-reg": RegressionModel(
-        lambda **args: GradientBoostingRegressor(random_state=42, n_iter_no_change=10, **args), "xgboost regressor"
-    ),
-
+    name: (ClassifierModel if spec["task"] == "classification" else RegressionModel)(
+        partial(build_estimator, spec), spec["description"]
+    )
+    for name, spec in MODEL_REGISTRY.items()
 }
 
 
-def get_existing_scores(scores_path_list: List[str]) -> pd.DataFrame:
+def get_existing_scores(
+    scores_path_list: List[str],
+    results_store_path: Optional[str] = None,
+    results_key: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
     """
     Aggregate existing scores from multiple score files into a single DataFrame.
 
+    If a results store is given, the scores of the same split from all grids are
+    read from the store as well.
+
     Args:
         scores_path_list (List[str]): List of file paths containing existing scores.
+        results_store_path (Optional[str]): Path to the results store to query for existing scores.
+        results_key (Optional[Dict[str, str]]): Wildcards of the current fit job.
 
     Returns:
         pd.DataFrame: Concatenated DataFrame of all existing scores.
     """
     df_list: List[pd.DataFrame] = [pd.read_csv(f) for f in scores_path_list if os.path.getsize(f) > 0]
+    if results_store_path:
+        with ResultsStore(results_store_path) as store:
+            df_stored = store.read_scores(**{k: v for k, v in results_key.items() if k != "grid"})
+        if not df_stored.empty:
+            df_list.append(df_stored)
     return pd.concat(df_list, axis=0, ignore_index=True) if df_list else pd.DataFrame()
 
 
+def index_existing_scores(df_existing_scores: pd.DataFrame, param_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Index existing scores by their canonicalized hyperparameters.
+
+    Args:
+        df_existing_scores (pd.DataFrame): Existing scores read from score files or the results store.
+        param_names (List[str]): Names of the hyperparameters of the grid.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Existing score rows by their canonicalized hyperparameters.
+    """
+    existing: Dict[str, Dict[str, Any]] = {}
+    if not df_existing_scores.empty and set(param_names) <= set(df_existing_scores.columns):
+        for row in df_existing_scores.to_dict(orient="records"):
+            existing.setdefault(canonical_params({k: row[k] for k in param_names}), row)
+    return existing
+
+
+def validation_scores(scores: List[Dict[str, Any]]) -> np.ndarray:
+    """Validation metric of score rows, the metric `aggregate` selects the best row by."""
+    metric = "r2_val" if "r2_val" in scores[0] else "acc_val"
+    return np.array([score[metric] for score in scores], dtype=np.float64)
+
+
+def rank_scores(scores: List[Dict[str, Any]]) -> np.ndarray:
+    """Indices of score rows from the best to the worst validation metric."""
+    return np.argsort(-np.nan_to_num(validation_scores(scores), nan=-np.inf), kind="stable")
+
+
+def _grid_position(values: List[Any], value: Any) -> int:
+    """Index of the grid value closest to a value, e.g. one read back from a score file."""
+    return int(np.argmin(np.abs(np.asarray(values, dtype=np.float64) - float(value))))
+
+
+def transfer_windows(grid: Dict[str, List[Any]], center: Dict[str, Any], radius: int) -> Dict[str, Tuple[int, int]]:
+    """
+    Neighbourhood of a hyperparameter combination in a grid.
+
+    Args:
+        grid (Dict[str, List[Any]]): Hyperparameter grid of the model.
+        center (Dict[str, Any]): The hyperparameter combination, e.g. the best one at a smaller sample size.
+        radius (int): Number of grid steps along each hyperparameter.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: First and last index of the neighbourhood in the sorted values of each hyperparameter.
+    """
+    windows = {}
+    for name, values in grid.items():
+        i = _grid_position(sorted(values), center[name])
+        windows[name] = (max(i - radius, 0), min(i + radius, len(values) - 1))
+    return windows
+
+
+def expand_windows(
+    grid: Dict[str, List[Any]], windows: Dict[str, Tuple[int, int]], best: Dict[str, Any], radius: int
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Expand a neighbourhood beyond every edge that its best combination lies on, unless the edge is the grid's.
+
+    Args:
+        grid (Dict[str, List[Any]]): Hyperparameter grid of the model.
+        windows (Dict[str, Tuple[int, int]]): The neighbourhood, see `transfer_windows`.
+        best (Dict[str, Any]): The best hyperparameter combination of the searched neighbourhoods.
+        radius (int): Number of grid steps to expand by.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The expanded neighbourhood, equal to `windows` if the best is in its interior
+            or outside of it.
+    """
+    positions = {name: _grid_position(sorted(grid[name]), best[name]) for name in windows}
+    if any(not first <= positions[name] <= last for name, (first, last) in windows.items()):
+        return windows
+    expanded = {}
+    for name, (first, last) in windows.items():
+        values = sorted(grid[name])
+        i = positions[name]
+        if i == first:
+            first = max(first - radius, 0)
+        if i == last:
+            last = min(last + radius, len(values) - 1)
+        expanded[name] = (first, last)
+    return expanded
+
+
+def window_grid(grid: Dict[str, List[Any]], windows: Dict[str, Tuple[int, int]]) -> Dict[str, List[Any]]:
+    """Sub-grid of the values within a neighbourhood, see `transfer_windows`."""
+    return {name: sorted(grid[name])[first:last + 1] for name, (first, last) in windows.items()}
+
+
+def halving_rungs(
+    n_candidates: int, n_train: int, factor: int = HALVING_FACTOR, min_train: int = HALVING_MIN_TRAIN
+) -> List[Tuple[int, int]]:
+    """
+    Schedule of successive halving below the full training set.
+
+    Each rung evaluates the remaining candidates on a subset of the training set and promotes the best
+    1/factor of them to the next rung, whose subset is factor times larger. The subset of the last rung
+    is 1/factor of the full training set, on which the promoted candidates are finally scored. Rungs
+    with fewer than `min_train` samples are skipped, so small training sets are searched exhaustively.
+
+    Args:
+        n_candidates (int): Number of hyperparameter combinations.
+        n_train (int): Size of the full training set.
+        factor (int): Reduction factor of the candidates per rung.
+        min_train (int): Smallest training subset.
+
+    Returns:
+        List[Tuple[int, int]]: Training subset size and number of promoted candidates of each rung,
+            starting with the smallest subset.
+    """
+    n_rungs, remaining = 0, n_candidates
+    while remaining > 1:
+        remaining = math.ceil(remaining / factor)
+        n_rungs += 1
+    rungs = []
+    remaining = n_candidates
+    for size in (n_train // factor ** (n_rungs - i) for i in range(n_rungs)):
+        if size >= min_train:
+            remaining = math.ceil(remaining / factor)
+            rungs.append((size, remaining))
+    return rungs
+
+
+def score_candidates(
+    model: BaseModel,
+    x: np.ndarray,
+    y: np.ndarray,
+    cni: np.ndarray,
+    split: Dict[str, Any],
+    mode: str,
+    candidates: List[Dict[str, Any]],
+    existing_scores: Dict[str, Dict[str, Any]],
+    profile: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Score hyperparameter combinations on a split, reusing existing scores.
+
+    Args:
+        model (BaseModel): The model to fit.
+        x (np.ndarray): Features.
+        y (np.ndarray): Targets of shape (samples, 1).
+        cni (np.ndarray): Covariates of no interest.
+        split (Dict[str, Any]): Split with the keys `idx_train`, `idx_val` and `idx_test`.
+        mode (str): Mode of feature inclusion, see `BaseModel.score`.
+        candidates (List[Dict[str, Any]]): Hyperparameter combinations to score.
+        existing_scores (Dict[str, Dict[str, Any]]): Existing score rows by canonicalized hyperparameters.
+        profile (bool): Whether to record the timings and number of features of new score rows, and to flag
+            reused score rows as `reused`.
+
+    Returns:
+        List[Dict[str, Any]]: One score row per hyperparameter combination.
+    """
+    scores = []
+    for params in candidates:
+        logging.debug(f"Evaluating hyperparameters: {params}")
+
+        # Check if we already have scores for this parameter combination
+        existing_score = existing_scores.get(canonical_params(params))
+
+        if existing_score is not None:
+            logging.info("Using existing scores for current parameter combination")
+            # the recorded costs were spent by the job that computed the scores, not by this one
+            score = {k: v for k, v in existing_score.items() if not is_profile_column(k)}
+            if profile:
+                score["reused"] = True
+        else:
+            logging.info("Computing new scores for current parameter combination")
+            timings = {} if profile else None
+            score = model.score(
+                x, y, cni,
+                idx_train=split["idx_train"],
+                idx_val=split["idx_val"],
+                idx_test=split["idx_test"],
+                mode=mode,
+                timings=timings,
+                **params,
+            )
+            if profile:
+                score.update(timings)
+                score["n_features"] = x.shape[1]
+                score["reused"] = False
+            score.update(params)
+        scores.append(score)
+    return scores
+
+
+def save_scores(
+    scores_path: str,
+    df_scores: pd.DataFrame,
+    results_store_path: Optional[str] = None,
+    results_key: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Save scores to a CSV file and, if configured, to the results store.
+
+    An empty DataFrame results in an empty file (indicating insufficient samples)
+    and removes previously stored rows of the same fit job.
+
+    Args:
+        scores_path (str): Path to save the computed scores.
+        df_scores (pd.DataFrame): Scores to save.
+        results_store_path (Optional[str]): Path to the results store.
+        results_key (Optional[Dict[str, str]]): Wildcards of the fit job.
+    """
+    if df_scores.empty:
+        Path(scores_path).touch()
+    else:
+        df_scores.to_csv(scores_path, index=None)
+    logging.info(f"Saved scores to {scores_path}")
+
+    if results_store_path:
+        with ResultsStore(results_store_path) as store:
+            store.write_scores(results_key, df_scores)
+        logging.info(f"Saved scores to results store {results_store_path}")
+
+
 def fit(
     features_path: str,
     targets_path: str,
@@ -434,12 +707,31 @@ def fit(
     existing_scores_path_list: List[str],
     confound_correction_method: str,
     cni_path: str,
+    results_store_path: Optional[str] = None,
+    results_key: Optional[Dict[str, str]] = None,
+    load_data: Optional[Callable[[str], np.ndarray]] = None,
+    score_index_path: Optional[str] = None,
+    profile: bool = False,
+    search: str = "grid",
+    hp_transfer: int = 0,
+    hp_transfer_path: Optional[str] = None,
+    hp_transfer_top: int = 3,
 ) -> pd.DataFrame:
     """
     Fit a specified model to the data and record its performance metrics.
 
     This function loads data, performs model fitting, and saves the results.
 
+    With the `halving` search strategy, the hyperparameter combinations are first evaluated on growing,
+    nested subsets of the training set, and only the best are scored on the full training set (see
+    `halving_rungs`). Only the score rows of these combinations are saved.
+
+    With `hp_transfer`, only the union of the neighbourhoods of the `hp_transfer_top` best hyperparameter
+    combinations of the fit at the next smaller sample size (`hp_transfer_path`) is evaluated. A neighbourhood
+    is expanded while the best combination lies on one of its edges. If no combination of that fit has a finite
+    validation score, the grid is searched as without `hp_transfer`. The sample size the hyperparameters were
+    transferred from is recorded in the `hp_transferred_from` column, 0 if the whole grid was searched.
+
     Args:
         features_path (str): Path to the features HDF5 file.
         targets_path (str): Path to the targets HDF5 file.
@@ -450,6 +742,24 @@ def fit(
         existing_scores_path_list (List[str]): List of paths to existing score files.
         confound_correction_method (str): Method for confound correction.
         cni_path (str): Path to the confounding variables (CNI) HDF5 file.
+        results_store_path (Optional[str]): Path to the results store, scores are additionally written there if given.
+        results_key (Optional[Dict[str, str]]): Wildcards of the fit job, required if a results store is given.
+        load_data (Optional[Callable[[str], np.ndarray]]): Function returning the data array of an HDF5 file,
+            e.g. to reuse arrays kept in memory across fits. By default, the files are opened with h5py.
+        score_index_path (Optional[str]): Path to the score index. If given, existing scores are only looked up
+            there, by the contents of the job's inputs rather than by paths, and new scores are added to it.
+        profile (bool): Whether to record the wall and CPU time of each phase, the peak RSS of the job and
+            the number of features in every newly computed score row, see `BaseModel.score`. Reused score rows
+            are flagged as `reused` instead. Their recorded costs are dropped whether profiling or not. The peak
+            RSS is that of the process, so profiled jobs must run in a fresh process rather than in the fit worker.
+        search (str): Strategy of searching the grid, one of `SEARCH_STRATEGIES`. Not used if the best
+            hyperparameters are transferred from a smaller sample size. Grids declaring distributions or
+            trials (see `search_space.py`) require `random` or `bayesian`.
+        hp_transfer (int): Radius of the neighbourhood in grid steps, 0 to search the whole grid.
+        hp_transfer_path (Optional[str]): Score file of the fit of the same seed at the largest smaller sample size,
+            None if the seed was not fitted at a smaller sample size.
+        hp_transfer_top (int): Number of the best hyperparameter combinations of that fit whose neighbourhoods
+            are searched.
     """
     logging.info(f"Starting model fitting for {model_name}")
 
@@ -458,7 +768,7 @@ def fit(
         split = json.load(f)
     if "error" in split:
         logging.warning(f"Error found in split file: {split['error']}")
-        Path(scores_path).touch()
+        save_scores(scores_path, pd.DataFrame(), results_store_path, results_key)
         return
 
     # Check if the model is valid
@@ -470,15 +780,35 @@ def fit(
     model = MODELS[model_name]
     logging.info(f"Using model: {model.model_name}")
 
-    df_existing_scores = get_existing_scores(existing_scores_path_list)
-    logging.debug(f"Loaded {len(df_existing_scores)} existing scores")
+    if search not in SEARCH_STRATEGIES:
+        error_msg = f"Invalid search strategy: {search}"
+        logging.error(error_msg)
+        raise ValueError(error_msg)
+    if is_sampled(grid[model_name]) and search not in SAMPLED_SEARCHES:
+        error_msg = f"The grid of {model_name} declares distributions or trials, which require one of the search strategies {SAMPLED_SEARCHES}"
+        logging.error(error_msg)
+        raise ValueError(error_msg)
+
+    space = SearchSpace(grid[model_name])
+    param_names = list(space.specs)
+    mode = confound_correction_method if confound_correction_method in ['with-cni', 'only-cni'] else 'normal'
+    if score_index_path:
+        with ScoreIndex(score_index_path) as index:
+            job = index.job_key(features_path, targets_path, cni_path, split, model_name, mode, CODE_VERSION)
+            existing_scores = index.lookup(job)
+    else:
+        df_existing_scores = get_existing_scores(existing_scores_path_list, results_store_path, results_key)
+        existing_scores = index_existing_scores(df_existing_scores, param_names)
+    logging.debug(f"Loaded {len(existing_scores)} existing scores")
+
+    with ExitStack() as stack:
+        if load_data is None:
+            x, y, cni = [stack.enter_context(h5py.File(path, "r"))["data"] for path in (features_path, targets_path, cni_path)]
+        else:
+            x, y, cni = [load_data(path) for path in (features_path, targets_path, cni_path)]
 
-    scores: List[Dict[str, Any]] = []
-    with h5py.File(features_path, "r") as fx, h5py.File(targets_path, "r") as fy, h5py.File(cni_path, "r") as fc:
-        x, cni = fx["data"], fc["data"]
-        
         # Load target data
-        y = fy["data"][:]
+        y = y[:]
         
         # Ensure y is 2-dimensional
         y = y.reshape(-1, 1) if y.ndim == 1 else y
@@ -486,40 +816,95 @@ def fit(
         # Check for insufficient samples
         if len(split["idx_train"]) < 2 or len(split["idx_val"]) < 2 or len(split["idx_test"]) < 2:
             logging.warning("Insufficient samples for train/val/test split")
-            Path(scores_path).touch()
+            save_scores(scores_path, pd.DataFrame(), results_store_path, results_key)
             return
 
-        # Iterate over all combinations of hyperparameters
-        for params in ParameterGrid(grid[model_name]):
-            logging.debug(f"Evaluating hyperparameters: {params}")
-            
-            # Check if we already have scores for this parameter combination
-            df_existing_scores_filtered = df_existing_scores.loc[
-                (df_existing_scores[list(params)] == pd.Series(params)).all(axis=1)
-            ] if not df_existing_scores.empty else pd.DataFrame()
-
-            if not df_existing_scores_filtered.empty:
-                logging.info("Using existing scores for current parameter combination")
-                score = dict(df_existing_scores_filtered.iloc[0])
+        # Best hyperparameters at the next smaller sample size, to search their neighbourhoods
+        centers = []
+        if hp_transfer and hp_transfer_path and param_names and search not in SAMPLED_SEARCHES and os.path.getsize(hp_transfer_path) > 0:
+            previous_scores = pd.read_csv(hp_transfer_path).to_dict(orient="records")
+            finite = np.isfinite(validation_scores(previous_scores))
+            centers = [previous_scores[i] for i in rank_scores(previous_scores)[:hp_transfer_top] if finite[i]]
+            if centers:
+                logging.info(f"Transferring hyperparameters {centers} from sample size {centers[0]['n']}")
             else:
-                logging.info("Computing new scores for current parameter combination")
-                score = model.score(
-                    x, y, cni,
-                    idx_train=split["idx_train"],
-                    idx_val=split["idx_val"],
-                    idx_test=split["idx_test"],
-                    mode=confound_correction_method if confound_correction_method in ['with-cni', 'only-cni'] else 'normal',
-                    **params,
-                )
-                score.update(params)
-                score.update({"n": split["samplesize"], "s": split["seed"]})
-
-            scores.append(score)
+                logging.warning(f"No finite validation scores in {hp_transfer_path}, searching the whole grid")
+
+        scores = None
+        if search in SAMPLED_SEARCHES:
+            candidates = []
+        else:
+            candidates = list(ParameterGrid(space.specs))
+
+        if centers:
+            windows = [transfer_windows(space.specs, center, hp_transfer) for center in centers]
+            scores = []
+            evaluated = set()
+            while True:
+                candidates = []
+                for params in (p for w in windows for p in ParameterGrid(window_grid(space.specs, w))):
+                    if canonical_params(params) not in evaluated:
+                        evaluated.add(canonical_params(params))
+                        candidates.append(params)
+                scores += score_candidates(model, x, y, cni, split, mode, candidates, existing_scores, profile)
+                best = scores[rank_scores(scores)[0]]
+                expanded = [expand_windows(space.specs, w, best, hp_transfer) for w in windows]
+                if expanded == windows:
+                    break
+                logging.info(f"Best hyperparameters on the edge of a neighbourhood, expanding them to {expanded}")
+                windows = expanded
+        elif search == "halving":
+            # nested subsets of the training set, drawn in the same order for all rungs
+            idx_train = np.random.default_rng(split["seed"]).permutation(split["idx_train"])
+            for size, promoted in halving_rungs(len(candidates), len(idx_train)):
+                rung_split = {**split, "idx_train": sorted(idx_train[:size].tolist())}
+                rung_existing_scores = {}
+                if score_index_path:
+                    with ScoreIndex(score_index_path) as index:
+                        rung_job = index.job_key(features_path, targets_path, cni_path, rung_split, model_name, mode, CODE_VERSION)
+                        rung_existing_scores = index.lookup(rung_job)
+                rung_scores = score_candidates(model, x, y, cni, rung_split, mode, candidates, rung_existing_scores, profile)
+                if score_index_path:
+                    with ScoreIndex(score_index_path) as index:
+                        index.add(rung_job, param_names, rung_scores)
+
+                candidates = [candidates[i] for i in sorted(rank_scores(rung_scores)[:promoted])]
+                logging.info(f"Promoted {len(candidates)} hyperparameter combinations from {size} training samples")
+
+        elif search == "random":
+            candidates = random_candidates(space, split["seed"])
+            logging.info(f"Drew {len(candidates)} random hyperparameter combinations")
+        elif search == "bayesian":
+            # each combination is proposed based on the scores of the previous ones
+            rng = np.random.default_rng(split["seed"])
+            scores = []
+            for _ in range(space.trials):
+                values = validation_scores(scores) if scores else []
+                params = propose_candidate(space, [{k: score[k] for k in param_names} for score in scores], values, rng)
+                if params is None:
+                    break
+                scores += score_candidates(model, x, y, cni, split, mode, [params], existing_scores, profile)
+
+        if scores is None:
+            scores = score_candidates(model, x, y, cni, split, mode, candidates, existing_scores, profile)
+        for score in scores:
+            score.update({"n": split["samplesize"], "s": split["seed"]})
+            if hp_transfer:
+                score["hp_transferred_from"] = int(centers[0]["n"]) if centers else 0
+
+    if profile:
+        # one peak for the whole job, as the process is not reset between hyperparameter combinations
+        peak = peak_rss_mb()
+        for score in scores:
+            if not score["reused"]:
+                score["peak_rss_mb"] = peak
 
     # Save all scores to a CSV file
     df_scores = pd.DataFrame(scores)
-    df_scores.to_csv(scores_path, index=None)
-    logging.info(f"Saved scores to {scores_path}")
+    save_scores(scores_path, df_scores, results_store_path, results_key)
+    if score_index_path:
+        with ScoreIndex(score_index_path) as index:
+            index.add(job, param_names, scores)
     return df_scores
 
 
@@ -538,6 +923,15 @@ if __name__ == "__main__":
         existing_scores_path_list=snakemake.params.existing_scores,
         confound_correction_method=snakemake.wildcards.confound_correction_method,
         cni_path=snakemake.input.covariates,
+        results_store_path=snakemake.params.results_store,
+        results_key=dict(snakemake.wildcards.items()),
+        load_data=SharedDataCache() if snakemake.params.shared_data else None,
+        score_index_path=snakemake.params.score_index,
+        profile=snakemake.params.profile,
+        search=snakemake.params.search,
+        hp_transfer=snakemake.params.hp_transfer or 0,
+        hp_transfer_path=snakemake.input.previous[0] if snakemake.input.previous else None,
+        hp_transfer_top=snakemake.params.hp_transfer_top,
     )
     
     logging.info("Completed fit_model.py script")
\ No newline at end of file
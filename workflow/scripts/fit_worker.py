@@ -0,0 +1,363 @@
+"""
+fit_worker.py
+====================================
+This module provides a long-running local worker for the `fit` rule.
+
+Fitting a cheap model on a single split takes milliseconds, while a fresh fit
+job spends most of its time importing scikit-learn and opening HDF5 files. With
+`fit_worker` enabled in the config, fit jobs only submit their split, model and
+grid over a local Unix socket to a worker that keeps its imports warm and the
+recently used datasets in memory, and wait for the scores.
+
+The first fit job starts the worker, which serves jobs with a pool of processes
+and exits once it was idle for `IDLE_TIMEOUT` seconds. If the worker cannot be
+reached, the job fits the model in-process instead.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import Client, Connection
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+# Fit jobs only import what they need to reach the worker, heavier modules are
+# imported by the worker processes
+if TYPE_CHECKING:
+    import numpy as np
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Seconds without any fit job after which the worker exits
+IDLE_TIMEOUT = 120.0
+
+# Seconds a fit job waits for the worker to start before fitting in-process
+CONNECT_TIMEOUT = 60.0
+
+# Bytes of datasets kept in memory by each worker process
+DATASET_CACHE_BYTES = 2 * 1024**3
+
+
+def _import_fit():
+    """Import the fit function, which imports scikit-learn."""
+    try:
+        from .fit_model import fit
+    except ImportError:
+        from fit_model import fit
+    return fit
+
+
+def default_address() -> str:
+    """
+    Socket path of the worker serving the current working directory.
+
+    The path also depends on the Python interpreter and the version of the fitting
+    code, so that a worker started with outdated code is not reused.
+
+    Returns:
+        str: Path to the Unix socket of the worker.
+    """
+    fit_model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fit_model.py")
+    versions = [os.stat(path).st_mtime_ns for path in (__file__, fit_model_path) if os.path.exists(path)]
+    key = repr((os.getcwd(), sys.executable, versions))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"esce-fit-worker-{os.getuid()}-{digest}.sock")
+
+
+class DatasetCache:
+    """
+    Least recently used cache of the data arrays of HDF5 files.
+
+    Arrays are read completely, marked read-only, and read again if the file's
+    modification time or size changed. Instances can be passed as `load_data` to
+    `fit_model.fit`.
+    """
+
+    def __init__(self, max_bytes: int = DATASET_CACHE_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Maximum number of bytes of the cached arrays.
+        """
+        self.max_bytes = max_bytes
+        self._arrays: "OrderedDict[str, Tuple[Tuple[int, int], np.ndarray]]" = OrderedDict()
+
+    def __call__(self, path: str) -> "np.ndarray":
+        """
+        Return the data array of an HDF5 file.
+
+        Args:
+            path (str): Path to the HDF5 file.
+
+        Returns:
+            np.ndarray: The read-only `data` array of the file.
+        """
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._arrays.get(path)
+        if cached is not None and cached[0] == version:
+            self._arrays.move_to_end(path)
+            return cached[1]
+
+        import h5py
+
+        with h5py.File(path, "r") as f:
+            array = f["data"][:]
+        array.flags.writeable = False
+        logging.debug(f"Loaded {path} into the dataset cache")
+
+        self._arrays[path] = (version, array)
+        self._arrays.move_to_end(path)
+        while len(self._arrays) > 1 and sum(a.nbytes for _, a in self._arrays.values()) > self.max_bytes:
+            self._arrays.popitem(last=False)
+        return array
+
+
+# Dataset cache of a worker process
+_datasets: Optional[DatasetCache] = None
+
+
+def _init_process(cache_bytes: int) -> None:
+    """Import the fitting code and set up the dataset cache of a worker process."""
+    global _datasets
+    _import_fit()
+    _datasets = DatasetCache(cache_bytes)
+
+
+def _ping() -> None:
+    """Do nothing, used to start the worker processes."""
+
+
+def _as_records(scores: Any) -> List[Dict[str, Any]]:
+    """Convert the scores returned by `fit_model.fit` to built-in types, which fit jobs can unpickle without pandas."""
+    return [] if scores is None else scores.to_dict("records")
+
+
+def _run_fit(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run a fit job in a worker process."""
+    return _as_records(_import_fit()(**request, load_data=_datasets))
+
+
+def serve(
+    address: str,
+    processes: int = 1,
+    idle_timeout: float = IDLE_TIMEOUT,
+    cache_bytes: int = DATASET_CACHE_BYTES,
+) -> None:
+    """
+    Serve fit jobs on a Unix socket until the worker is idle or shut down.
+
+    Returns immediately if another worker already serves the address.
+
+    Args:
+        address (str): Path to the Unix socket.
+        processes (int): Number of worker processes fitting models in parallel.
+        idle_timeout (float): Seconds without any fit job after which the worker exits.
+        cache_bytes (int): Bytes of datasets kept in memory by each worker process.
+    """
+    if os.path.exists(address):
+        try:
+            Client(address, family="AF_UNIX").close()
+            logging.info(f"A fit worker already serves {address}")
+            return
+        except ConnectionRefusedError:
+            # left over by a worker that did not exit cleanly
+            os.unlink(address)
+
+    executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_process, initargs=(cache_bytes,))
+    # start (and fork) the worker processes before any thread is started
+    wait([executor.submit(_ping) for _ in range(processes)])
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(address)
+    except OSError:
+        logging.info(f"Another fit worker started serving {address}")
+        listener.close()
+        executor.shutdown()
+        return
+    finally:
+        os.umask(old_umask)
+    listener.listen(128)
+    listener.settimeout(1.0)
+    logging.info(f"Fit worker serving {address} with {processes} processes")
+
+    lock = threading.Lock()
+    activity = {"active": 0, "last": time.monotonic(), "stop": False}
+
+    def handle(conn: Connection) -> None:
+        try:
+            kind, request = conn.recv()
+            if kind == "shutdown":
+                activity["stop"] = True
+                conn.send(("ok", None))
+                return
+            try:
+                conn.send(("ok", executor.submit(_run_fit, request).result()))
+            except BrokenProcessPool:
+                activity["stop"] = True
+                conn.send(("error", traceback.format_exc()))
+            except Exception:
+                conn.send(("error", traceback.format_exc()))
+        except (EOFError, OSError) as e:
+            logging.warning(f"Lost connection to fit job: {e}")
+        finally:
+            conn.close()
+            with lock:
+                activity["active"] -= 1
+                activity["last"] = time.monotonic()
+
+    try:
+        while not activity["stop"]:
+            try:
+                client, _ = listener.accept()
+            except socket.timeout:
+                with lock:
+                    if activity["active"] == 0 and time.monotonic() - activity["last"] > idle_timeout:
+                        logging.info("Fit worker idle, shutting down")
+                        break
+                continue
+            client.setblocking(True)
+            with lock:
+                activity["active"] += 1
+            threading.Thread(target=handle, args=(Connection(client.detach()),), daemon=True).start()
+    finally:
+        listener.close()
+        if os.path.exists(address):
+            os.unlink(address)
+        # let accepted fit jobs finish and receive their scores
+        while activity["active"] > 0:
+            time.sleep(0.1)
+        executor.shutdown()
+
+
+def start_worker(address: str, processes: int = 1, idle_timeout: float = IDLE_TIMEOUT) -> None:
+    """
+    Start a worker in the background, detached from the calling fit job.
+
+    Args:
+        address (str): Path to the Unix socket.
+        processes (int): Number of worker processes.
+        idle_timeout (float): Seconds without any fit job after which the worker exits.
+    """
+    logging.info(f"Starting fit worker on {address}")
+    with open(f"{address}.log", "ab") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), address, "--processes", str(processes), "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            start_new_session=True,
+        )
+
+
+def _connect(address: str, processes: int, timeout: float) -> Connection:
+    """Connect to the worker, starting it if no worker serves the address."""
+    deadline = time.monotonic() + timeout
+    started = False
+    while True:
+        try:
+            return Client(address, family="AF_UNIX")
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not started:
+                start_worker(address, processes)
+                started = True
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No fit worker serving {address} after {timeout} seconds")
+            time.sleep(0.1)
+
+
+def submit_fit(
+    request: Dict[str, Any],
+    address: Optional[str] = None,
+    processes: int = 1,
+    timeout: float = CONNECT_TIMEOUT,
+) -> List[Dict[str, Any]]:
+    """
+    Run a fit job on the worker, starting the worker if necessary.
+
+    Args:
+        request (Dict[str, Any]): Keyword arguments of `fit_model.fit`.
+        address (Optional[str]): Path to the Unix socket, by default `default_address()`.
+        processes (int): Number of worker processes if the worker has to be started.
+        timeout (float): Seconds to wait for the worker to start.
+
+    Returns:
+        List[Dict[str, Any]]: Score rows of the fit job, one per hyperparameter combination.
+
+    Raises:
+        TimeoutError: If no worker could be reached.
+        RuntimeError: If fitting failed in the worker.
+    """
+    address = address or default_address()
+    for attempt in range(2):
+        try:
+            with _connect(address, processes, timeout) as conn:
+                conn.send(("fit", request))
+                status, result = conn.recv()
+            break
+        except (EOFError, ConnectionError):
+            # the worker shut down while the job was connecting, try again with a new worker
+            if attempt == 1:
+                raise TimeoutError(f"Lost connection to the fit worker serving {address}")
+
+    if status == "error":
+        raise RuntimeError(f"Fitting failed in the fit worker:\n{result}")
+    return result
+
+
+def fit_in_worker(request: Dict[str, Any], processes: int = 1) -> List[Dict[str, Any]]:
+    """
+    Run a fit job on the worker, or in-process if the worker cannot be reached.
+
+    Args:
+        request (Dict[str, Any]): Keyword arguments of `fit_model.fit`.
+        processes (int): Number of worker processes if the worker has to be started.
+
+    Returns:
+        List[Dict[str, Any]]: Score rows of the fit job, one per hyperparameter combination.
+    """
+    try:
+        return submit_fit(request, processes=processes)
+    except TimeoutError as e:
+        logging.warning(f"{e} - fitting in-process")
+        return _as_records(_import_fit()(**request))
+
+
+def shutdown_worker(address: Optional[str] = None) -> None:
+    """
+    Ask a running worker to exit once its current fit jobs are done.
+
+    Args:
+        address (Optional[str]): Path to the Unix socket, by default `default_address()`.
+    """
+    address = address or default_address()
+    try:
+        with Client(address, family="AF_UNIX") as conn:
+            conn.send(("shutdown", None))
+            conn.recv()
+    except (FileNotFoundError, ConnectionRefusedError):
+        logging.info(f"No fit worker serving {address}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fit jobs of the ESCE workflow on a Unix socket.")
+    parser.add_argument("address", help="path to the Unix socket")
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, help="seconds without fit jobs after which the worker exits")
+    args = parser.parse_args()
+    serve(args.address, processes=args.processes, idle_timeout=args.idle_timeout)
@@ -4,7 +4,7 @@ including options for stratification, matching, and confound correction.
 """
 
 import json
-from typing import Optional, Tuple, Dict, Union, List
+from typing import Callable, Optional, Tuple, Dict, Union, List
 
 import h5py
 import numpy as np
@@ -12,6 +12,11 @@ from imblearn.under_sampling import RandomUnderSampler
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+try:
+    from .shared_data import SharedDataCache
+except ImportError:
+    from shared_data import SharedDataCache
+
 # Constants
 MIN_SAMPLES_PER_SET = 2
 MAX_CLASSES_FOR_STRATIFICATION = 10
@@ -206,6 +211,7 @@ def write_splitfile(
     seed: int,
     stratify: bool = False,
     balanced: bool = False,
+    load_data: Optional[Callable[[str, str], np.ndarray]] = None,
 ):
     """
     Generate a split file for a given dataset.
@@ -222,6 +228,8 @@ def write_splitfile(
         seed (int): Random seed for reproducibility.
         stratify (bool): Whether to use stratified splitting.
         balanced (bool): Whether to balance classes.
+        load_data (Optional[Callable[[str, str], np.ndarray]]): Function returning an array ("data" or "mask")
+            of an HDF5 file, e.g. a `SharedDataCache`. By default, the files are read with h5py.
     """
     logging.debug(f"Starting split generation with method: {confound_correction_method}")
 
@@ -233,16 +241,14 @@ def write_splitfile(
         raise ValueError(error_msg)
 
     # Load masks and data from HDF5 files
-    with h5py.File(features_path, "r") as f:
-        x_mask = f["mask"][:]
-
-    with h5py.File(targets_path, "r") as f:
-        y = f["data"][:]
-        y_mask = f["mask"][:]
+    if load_data is None:
+        def load_data(path: str, key: str) -> np.ndarray:
+            with h5py.File(path, "r") as f:
+                return f[key][:]
 
-    with h5py.File(confounds_path, "r") as f:
-        confounds = f["data"][:]
-        confounds_mask = f["mask"][:]
+    x_mask = load_data(features_path, "mask")
+    y, y_mask = load_data(targets_path, "data"), load_data(targets_path, "mask")
+    confounds, confounds_mask = load_data(confounds_path, "data"), load_data(confounds_path, "mask")
 
     # Check for empty confound variables
     if confound_correction_method != "none":
@@ -402,4 +408,5 @@ if __name__ == "__main__":
         seed=int(snakemake.wildcards.seed),
         stratify=snakemake.params.stratify,
         balanced=True if snakemake.wildcards.balanced == 'True' else False,
+        load_data=SharedDataCache() if snakemake.params.shared_data else None,
     )
\ No newline at end of file
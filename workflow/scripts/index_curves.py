@@ -0,0 +1,108 @@
+"""
+index_curves.py
+====================================
+This module collects learning curves into a columnar (Parquet) index.
+
+Every row of the index is one point of a learning curve: either an observed
+mean score (`kind="observed"`) or a point of the precomputed extrapolation and
+its bootstrap prediction interval (`kind="extrapolated"`). The curve wildcards
+are stored as dictionary-encoded columns and rows are sorted by them, so that
+readers can load only the columns they need and push filters on the curve
+wildcards down to the file.
+
+The workflow writes one index per dataset and model, so that a changed
+learning curve only rebuilds the index it belongs to.
+"""
+
+import logging
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    from .results_store import CURVE_KEYS, curve_key_from_path
+    from .stats_reader import read_result
+except ImportError:
+    from results_store import CURVE_KEYS, curve_key_from_path
+    from stats_reader import read_result
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Columns of the index
+INDEX_SCHEMA = pa.schema(
+    [(key, pa.dictionary(pa.int32(), pa.string())) for key in CURVE_KEYS]
+    + [
+        ("kind", pa.dictionary(pa.int32(), pa.string())),
+        ("n", pa.float64()),
+        ("y", pa.float64()),
+        ("y_std", pa.float64()),
+        ("y_lower", pa.float64()),
+        ("y_upper", pa.float64()),
+    ]
+)
+
+
+def curve_frame(stats_path: str) -> Optional[pd.DataFrame]:
+    """
+    Read the observed and extrapolated points of a learning curve.
+
+    Args:
+        stats_path (str): Path to the statistics file of the curve. The prediction
+            bands are read from the `.bands.npz` file next to it, if available.
+
+    Returns:
+        Optional[pd.DataFrame]: Points of the curve, or None if the statistics file is empty.
+    """
+    stats = read_result(stats_path)
+    if not stats:
+        logging.warning(f"{stats_path} is empty - skipping")
+        return None
+
+    frames = [pd.DataFrame({"kind": "observed", "n": stats["x"], "y": stats["y_mean"], "y_std": stats["y_std"]})]
+
+    bands_path = stats_path.replace(".stats.json", ".bands.npz")
+    if os.path.exists(bands_path) and os.path.getsize(bands_path) > 0:
+        with np.load(bands_path) as bands:
+            extrapolated = pd.DataFrame({
+                "kind": "extrapolated",
+                "n": bands["n"].astype(float),
+                "y": bands["fit"].astype(float),
+                "y_lower": bands["lower"].astype(float),
+                "y_upper": bands["upper"].astype(float),
+            })
+        frames.append(extrapolated.dropna(subset=["y"]))
+
+    df = pd.concat(frames, ignore_index=True)
+    for key, value in curve_key_from_path(stats_path).items():
+        df[key] = value
+    return df
+
+
+def index_curves(stats_paths: Sequence[str], index_path: str) -> None:
+    """
+    Write the index of the given learning curves.
+
+    Args:
+        stats_paths (Sequence[str]): Paths to the statistics files of the curves.
+        index_path (str): Path to the Parquet file to write.
+    """
+    frames: List[pd.DataFrame] = [df for df in map(curve_frame, stats_paths) if df is not None]
+    if frames:
+        df = pd.concat(frames, ignore_index=True).sort_values(CURVE_KEYS + ["kind", "n"], kind="stable")
+    else:
+        df = pd.DataFrame(columns=INDEX_SCHEMA.names)
+    df = df.reindex(columns=INDEX_SCHEMA.names)
+
+    table = pa.Table.from_pandas(df, schema=INDEX_SCHEMA, preserve_index=False)
+    pq.write_table(table, index_path)
+    logging.info(f"Indexed {len(frames)} learning curves ({len(df)} points) in {index_path}")
+
+
+if __name__ == "__main__":
+    index_curves(stats_paths=snakemake.input.stats, index_path=snakemake.output.index)
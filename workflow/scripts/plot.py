@@ -5,26 +5,15 @@ from typing import Optional
 
 import numpy as np
 import pandas as pd
-import yaml
 import json
 import re
-import altair as alt
 import traceback
 import logging
 
-# Configure YAML loader to correctly parse floating-point numbers
-loader = yaml.SafeLoader
-loader.add_implicit_resolver(
-    u'tag:yaml.org,2002:float',
-    re.compile(u'''^(?:
-     [-+]?(?:[0-9][0-9_]*)\\.[0-9_]*(?:[eE][-+]?[0-9]+)?
-    |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
-    |\\.[0-9_]+(?:[eE][-+][0-9]+)?
-    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\\.[0-9_]*
-    |[-+]?\\.(?:inf|Inf|INF)
-    |\\.(?:nan|NaN|NAN))$''', re.X),
-    list(u'-+0123456789.')
-)
+try:
+    from .stats_reader import read_result
+except ImportError:
+    from stats_reader import read_result
 
 # Set up logging
 log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
@@ -82,8 +71,7 @@ def process_results(available_results: list) -> pd.DataFrame:
     non_empty_files = []
     for file_path in df["full_path"]:
         try:
-            with open(file_path) as f:
-                content = yaml.load(f, Loader=yaml.SafeLoader)
+            content = read_result(file_path)
             if content:  # Check if the file has content
                 non_empty_files.append(file_path)
             else:
@@ -100,13 +88,30 @@ def process_results(available_results: list) -> pd.DataFrame:
     logger.debug(f"DataFrame: {df.T}")
     return df
 
+def read_bands(bands_file: str) -> Optional[pd.DataFrame]:
+    """
+    Read the prediction bands precomputed by the extrapolate step.
+
+    Args:
+        bands_file (str): Path to the `.bands.npz` file.
+
+    Returns:
+        Optional[pd.DataFrame]: Bands with columns n, fit, median, lower and upper,
+            or None if the file is missing or empty.
+    """
+    if not os.path.exists(bands_file) or os.path.getsize(bands_file) == 0:
+        return None
+    with np.load(bands_file) as bands:
+        return pd.DataFrame({key: bands[key].astype(float) for key in bands.files})
+
 def plot(
     stats_file_list: list, 
     output_filename: str, 
     color_variable: Optional[str], 
     linestyle_variable: Optional[str], 
     title: str, 
-    max_x: int = 6
+    max_x: int = 6,
+    max_bootstrap_lines: Optional[int] = None
 ):
     """
     Plot the results of a model using Altair.
@@ -118,6 +123,9 @@ def plot(
         linestyle_variable (Optional[str]): Variable to use for linestyle encoding.
         title (str): Title of the plot.
         max_x (int, optional): Maximum sample size in powers of 10 for exponential fit. Defaults to 6.
+            Only used for results without precomputed prediction bands.
+        max_bootstrap_lines (Optional[int], optional): Maximum number of bootstrap fit lines per result file.
+            Defaults to None, which draws all of them.
     """
     logger.info(f"Starting plot generation for {len(stats_file_list)} files")
     logger.debug(f"Output filename: {output_filename}")
@@ -131,8 +139,7 @@ def plot(
     # Iterate over each result file to extract scoring metrics
     for _, row in df.iterrows():
         try:
-            with open(row.full_path) as f:
-                score = yaml.load(f, Loader=loader)
+            score = read_result(row.full_path)
             if not score:
                 logger.warning(f"{row.full_path} is empty - skipping")
                 continue
@@ -158,6 +165,9 @@ def plot(
         Path(output_filename).touch()
         return
 
+    # Altair takes long to import and is not needed for empty figures
+    import altair as alt
+
     # Convert 'y_std' column to numeric, replacing 'NaN' strings with actual NaN values
     data['y_std'] = pd.to_numeric(data['y_std'], errors='coerce')
 
@@ -170,12 +180,28 @@ def plot(
     # Get the metric from the first row
     metric = data.iloc[0]["metric"]
 
+    logger.debug("Loading prediction bands")
+    # Use the prediction bands precomputed by extrapolate, if available
+    bands = []
+    for _, row in df.iterrows():
+        band_df = read_bands(row.full_path.replace("stats.json", "bands.npz"))
+        if band_df is None:
+            continue
+        band_df["curve"] = row.full_path
+        for variable in (color_variable, linestyle_variable):
+            if variable and variable in row.index:
+                band_df[variable] = row[variable]
+        bands.append(band_df)
+    bands = pd.concat(bands, ignore_index=True) if bands else pd.DataFrame(columns=["n", "curve"])
+    banded_curves = set(bands["curve"])
+    x_max = max(data['n'].max(), bands['n'].max()) if not bands.empty else data['n'].max()
+
     logger.debug("Creating main line chart")
     # Create the main line chart
     chart = alt.Chart(data).mark_line().encode(
         x=alt.X('n:Q', 
                 scale=alt.Scale(type='log', 
-                                domain=[data['n'].min() * 0.9, data['n'].max() * 1.1]),
+                                domain=[data['n'].min() * 0.9, x_max * 1.1]),
                 title='Sample Size'),
         y=alt.Y('y:Q', scale=alt.Scale(zero=False), title=f'Performance Metric [{metric}]'),
         color=alt.Color(f'{color_variable}:N', title=color_variable) if color_variable and color_variable in data.columns else alt.value('#1f77b4'),
@@ -194,49 +220,84 @@ def plot(
     # Combine the main chart with error bars
     combined_chart = chart + error_bars
 
+    if not bands.empty:
+        logger.debug("Adding prediction bands")
+        color = alt.Color(f'{color_variable}:N') if color_variable and color_variable in bands.columns else alt.value('#1f77b4')
+        # One area per curve for the 2.5% - 97.5% bootstrap interval
+        band_area = alt.Chart(bands.dropna(subset=["lower", "upper"])).mark_area(opacity=0.2).encode(
+            x='n:Q',
+            y='lower:Q',
+            y2='upper:Q',
+            color=color,
+            detail='curve:N'
+        )
+        # Point fit of each curve
+        fit_line = alt.Chart(bands.dropna(subset=["fit"])).mark_line(opacity=0.6).encode(
+            x='n:Q',
+            y='fit:Q',
+            color=color,
+            detail='curve:N',
+            strokeDash=alt.StrokeDash(f'{linestyle_variable}:N') if linestyle_variable and linestyle_variable in bands.columns else alt.value([1, 0])
+        )
+        combined_chart += band_area
+        combined_chart += fit_line
+
     logger.debug("Adding exponential fit lines")
-    # Add exponential fit lines from bootstrap data
+    # Add exponential fit lines from bootstrap data for results without prediction bands,
+    # collected in long format so that all of them are drawn as a single layer
+    x_exp = np.logspace(np.log10(128), max_x, num=100)
+    exp_lines = []
     for _, row in df.iterrows():
+        if row.full_path in banded_curves:
+            continue
         bootstrap_file = row.full_path.replace("stats.json", "bootstrap.json")
         logger.debug(f"Processing bootstrap file: {bootstrap_file}")
         if not os.path.exists(bootstrap_file):
             logger.warning(f"Bootstrap file not found: {bootstrap_file}")
             continue
         
-        with open(bootstrap_file) as f:
-            p = yaml.load(f, Loader=loader)
+        p = read_result(bootstrap_file)
 
         if not p:
             logger.warning(f"Empty bootstrap data in {bootstrap_file}")
             continue
 
-        for p_ in p:
-            logger.debug(f"Processing bootstrap parameters: {p_}")
-            try:
-                # Generate x-values for the exponential fit
-                x_exp = np.logspace(np.log10(128), np.log10(10**max_x), num=100)
-                # Compute y-values based on the fitted power law
-                y_exp = float(p_[0]) * np.power(x_exp, -float(p_[1])) + float(p_[2])
-            except Exception as e:
-                logger.error(f"Error in exponential fit calculation: {str(e)}")
-                logger.debug(f"Traceback: {traceback.format_exc()}")
-                continue  # Skip this iteration if an error occurs
-            
-            exp_df = pd.DataFrame({'n': x_exp, 'y': y_exp})
-            # Annotate with color and linestyle variables if provided
-            if color_variable and color_variable in row.index:
-                exp_df[color_variable] = row[color_variable]
-            if linestyle_variable and linestyle_variable in row.index:
-                exp_df[linestyle_variable] = row[linestyle_variable]
-
-            # Create the exponential fit line with reduced opacity
-            exp_line = alt.Chart(exp_df).mark_line(opacity=0.2).encode(
-                x='n:Q',
-                y='y:Q',
-                color=alt.Color(f'{color_variable}:N') if color_variable and color_variable in exp_df.columns else alt.value('#1f77b4'),
-                strokeDash=alt.StrokeDash(f'{linestyle_variable}:N') if linestyle_variable and linestyle_variable in exp_df.columns else alt.value([1, 0])
-            )
-            combined_chart += exp_line
+        try:
+            p = np.asarray(p, dtype=float).reshape(-1, 3)
+        except Exception as e:
+            logger.error(f"Error in exponential fit calculation: {str(e)}")
+            logger.debug(f"Traceback: {traceback.format_exc()}")
+            continue  # Skip this file if the parameters are invalid
+
+        # Thin out the bootstrap lines, keeping evenly spaced parameter sets
+        if max_bootstrap_lines is not None and len(p) > max_bootstrap_lines:
+            p = p[np.linspace(0, len(p) - 1, max_bootstrap_lines).astype(int)]
+
+        # Compute y-values based on the fitted power laws
+        y_exp = p[:, 0:1] * np.power(x_exp, -p[:, 1:2]) + p[:, 2:3]
+        exp_df = pd.DataFrame({
+            'n': np.tile(x_exp, len(p)),
+            'y': y_exp.ravel(),
+            'curve': np.repeat([f"{row.full_path}#{i}" for i in range(len(p))], len(x_exp)),
+        })
+        # Annotate with color and linestyle variables if provided
+        if color_variable and color_variable in row.index:
+            exp_df[color_variable] = row[color_variable]
+        if linestyle_variable and linestyle_variable in row.index:
+            exp_df[linestyle_variable] = row[linestyle_variable]
+        exp_lines.append(exp_df)
+
+    if exp_lines:
+        exp_df = pd.concat(exp_lines, ignore_index=True)
+        # Create the exponential fit lines with reduced opacity
+        exp_line = alt.Chart(exp_df).mark_line(opacity=0.2).encode(
+            x='n:Q',
+            y='y:Q',
+            detail='curve:N',
+            color=alt.Color(f'{color_variable}:N') if color_variable and color_variable in exp_df.columns else alt.value('#1f77b4'),
+            strokeDash=alt.StrokeDash(f'{linestyle_variable}:N') if linestyle_variable and linestyle_variable in exp_df.columns else alt.value([1, 0])
+        )
+        combined_chart += exp_line
 
     logger.debug("Configuring final chart appearance")
     # Configure the final chart's appearance
@@ -263,11 +324,12 @@ if __name__ == "__main__":
     """
     logger.info("Starting plot generation script")
     plot(
-        stats_file_list=snakemake.params.stats,
+        stats_file_list=list(snakemake.input.stats),
         output_filename=snakemake.output.plot,
         color_variable=snakemake.params.color_variable,
         linestyle_variable=snakemake.params.linestyle_variable,
         title=snakemake.params.title,
         max_x=snakemake.params.max_x,
+        max_bootstrap_lines=snakemake.params.max_bootstrap_lines,
     )
     logger.info("Plot generation script completed")
\ No newline at end of file
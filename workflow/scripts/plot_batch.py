@@ -0,0 +1,225 @@
+"""
+plot_batch.py
+====================================
+This module renders all figures of a dataset within a single process.
+
+Plotting one figure per job starts a fresh interpreter for every PNG, which
+re-imports Altair, re-parses the statistics files and starts the PNG converter
+from cold. Here, the figures to create are derived from their output paths, the
+statistics files are parsed once per worker (see `stats_reader.py`) and every
+worker keeps its converter warm across all of its figures.
+"""
+
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from . import plot as plot_curves
+    from . import plot_hps
+    from .curve_selection import select_curves
+    from .results_store import curve_key_from_path
+except ImportError:
+    import plot as plot_curves
+    import plot_hps
+    from curve_selection import select_curves
+    from results_store import curve_key_from_path
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Output path templates of the figures, their figure title and the variable distinguishing their curves
+PLOT_KINDS = {
+    "individual": (
+        "results/{dataset}/plots/individual/{features}_{targets}_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_{model}_{grid}.png",
+        "individual",
+        None,
+    ),
+    "features": (
+        "results/{dataset}/plots/features/all-features_{targets}_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_{model}_{grid}.png",
+        "features",
+        "features",
+    ),
+    "targets": (
+        "results/{dataset}/plots/targets/{features}_all-targets_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_{model}_{grid}.png",
+        "targets",
+        "target",
+    ),
+    "models": (
+        "results/{dataset}/plots/models/{features}_{targets}_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_all-models_{grid}.png",
+        "models",
+        "model",
+    ),
+    "cni": (
+        "results/{dataset}/plots/cni/{features}_{targets}_{confound_correction_method}_all-cni_{balanced}_{quantile_transform}_{model}_{grid}.png",
+        "cni",
+        "cni",
+    ),
+    "hps": (
+        "results/{dataset}/plots/hps/{model}/{features}_{targets}_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_{grid}.png",
+        "hyperparameters",
+        None,
+    ),
+}
+
+# Curve wildcards that vary between the curves of a figure
+AGGREGATED_KEYS = {
+    "individual": [],
+    "features": ["features"],
+    "targets": ["targets"],
+    "models": ["model"],
+    "cni": ["confound_correction_cni"],
+    "hps": [],
+}
+
+
+def _pattern_to_regex(pattern: str) -> "re.Pattern[str]":
+    """Convert an output path template into a regex with one named group per wildcard."""
+    parts = re.split(r"\{(\w+)\}", pattern)
+    regex = "".join(re.escape(part) if i % 2 == 0 else f"(?P<{part}>[^/_]+)" for i, part in enumerate(parts))
+    return re.compile(f"^{regex}$")
+
+
+PLOT_REGEXES = {kind: _pattern_to_regex(pattern) for kind, (pattern, _, _) in PLOT_KINDS.items()}
+
+
+def parse_plot_path(path: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Determine the kind of figure and its wildcards from an output path.
+
+    Args:
+        path (str): Output path of the figure.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: Kind of the figure (a key of `PLOT_KINDS`) and its wildcards.
+
+    Raises:
+        ValueError: If the path does not match any figure template.
+    """
+    for kind, regex in PLOT_REGEXES.items():
+        match = regex.match(path)
+        if match:
+            return kind, match.groupdict()
+    raise ValueError(f"Invalid filename structure: {path}")
+
+
+def select_stats(kind: str, wildcards: Dict[str, str], stats_paths: Sequence[str]) -> List[str]:
+    """
+    Select the statistics files drawn in a figure, as the plotting rules of the workflow do.
+
+    Args:
+        kind (str): Kind of the figure.
+        wildcards (Dict[str, str]): Wildcards of the figure.
+        stats_paths (Sequence[str]): Available statistics files.
+
+    Returns:
+        List[str]: Statistics files of the curves in the figure.
+    """
+    curve_keys = {path: curve_key_from_path(path) for path in stats_paths}
+    # confound correction figures also show the uncorrected curve
+    return select_curves(curve_keys, wildcards, AGGREGATED_KEYS[kind], include_uncorrected=kind == "cni")
+
+
+def plot_jobs(
+    plot_paths: Sequence[str],
+    stats_paths: Sequence[str],
+    figure_titles: Dict[str, str],
+    grids: Dict[str, Any],
+    hyperparameter_scales: Dict[str, str],
+    max_x: float,
+    max_bootstrap_lines: Optional[int] = None,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Derive the plotting function and its arguments for every figure.
+
+    Args:
+        plot_paths (Sequence[str]): Output paths of the figures.
+        stats_paths (Sequence[str]): Available statistics files.
+        figure_titles (Dict[str, str]): Figure title templates.
+        grids (Dict[str, Any]): Hyperparameter grids.
+        hyperparameter_scales (Dict[str, str]): Axis scales of the hyperparameters.
+        max_x (float): Maximum sample size in powers of 10 for exponential fits.
+        max_bootstrap_lines (Optional[int]): Maximum number of bootstrap fit lines per curve.
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: Kind of each figure and the arguments of its plotting function.
+    """
+    jobs = []
+    for path in plot_paths:
+        kind, wildcards = parse_plot_path(path)
+        _, title_key, color_variable = PLOT_KINDS[kind]
+        title = figure_titles[title_key].format(**wildcards)
+        if kind == "hps":
+            stats_path, = select_stats(kind, wildcards, stats_paths)
+            jobs.append((kind, {
+                "stats_filename": stats_path.replace("/statistics/", "/scores/").replace(".stats.json", ".csv"),
+                "output_filename": path,
+                "grid": grids[wildcards["grid"]],
+                "hyperparameter_scales": hyperparameter_scales,
+                "model_name": wildcards["model"],
+                "title": title,
+            }))
+        else:
+            jobs.append((kind, {
+                "stats_file_list": select_stats(kind, wildcards, stats_paths),
+                "output_filename": path,
+                "color_variable": color_variable,
+                "linestyle_variable": None,
+                "title": title,
+                "max_x": max_x,
+                "max_bootstrap_lines": max_bootstrap_lines,
+            }))
+    return jobs
+
+
+def run_plot_job(job: Tuple[str, Dict[str, Any]]) -> None:
+    """
+    Render a single figure.
+
+    Args:
+        job (Tuple[str, Dict[str, Any]]): Kind of the figure and the arguments of its plotting function.
+    """
+    kind, kwargs = job
+    if kind == "hps":
+        plot_hps.plot(**kwargs)
+    else:
+        plot_curves.plot(**kwargs)
+
+
+def plot_batch(plot_paths: Sequence[str], stats_paths: Sequence[str], workers: int = 1, **kwargs: Any) -> None:
+    """
+    Render many figures within a single process or a pool of worker processes.
+
+    Args:
+        plot_paths (Sequence[str]): Output paths of the figures.
+        stats_paths (Sequence[str]): Available statistics files.
+        workers (int): Number of worker processes.
+        **kwargs: Further arguments passed to `plot_jobs`.
+    """
+    jobs = plot_jobs(plot_paths, stats_paths, **kwargs)
+    logging.info(f"Rendering {len(jobs)} figures with {workers} workers")
+
+    if workers > 1 and len(jobs) > 1:
+        workers = min(workers, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Contiguous chunks keep figures of the same curves on the same worker
+            list(executor.map(run_plot_job, jobs, chunksize=-(-len(jobs) // workers)))
+    else:
+        for job in jobs:
+            run_plot_job(job)
+
+
+if __name__ == "__main__":
+    plot_batch(
+        plot_paths=snakemake.output.plots,
+        stats_paths=snakemake.input.stats,
+        workers=snakemake.threads,
+        figure_titles=snakemake.params.figure_titles,
+        grids=snakemake.params.grids,
+        hyperparameter_scales=snakemake.params.hyperparameter_scales,
+        max_x=snakemake.params.max_x,
+        max_bootstrap_lines=snakemake.params.max_bootstrap_lines,
+    )
@@ -1,12 +1,16 @@
 import os
 import textwrap
 from pathlib import Path
-import altair as alt
 import pandas as pd
 import yaml
 import logging
 import json
 
+try:
+    from .search_space import hyperparameters, value_range
+except ImportError:
+    from search_space import hyperparameters, value_range
+
 # Set up logging
 log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
 logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
@@ -32,8 +36,8 @@ def plot(
     """
     logging.info(f"Starting hyperparameter plot generation for {model_name}")
     
-    # Extract the hyperparameter grid for the specified model
-    grid = grid[model_name]
+    # Extract the hyperparameter grid for the specified model, without its budget of trials
+    grid = hyperparameters(grid[model_name])
 
     output_filename = Path(output_filename)
     # Check if the scores file is empty or if no hyperparameters are provided
@@ -51,6 +55,9 @@ def plot(
         output_filename.touch()
         return
 
+    # Altair takes long to import and is not needed for empty figures
+    import altair as alt
+
     # List of hyperparameters to plot
     hp_names = list(grid.keys())
     # Determine the metric to use based on available columns
@@ -62,9 +69,12 @@ def plot(
 
     logging.info(f"Using metric: {metric}")
 
+    # Hyperparameters transferred between sample sizes (see `fit_model.fit`) are connected per seed
+    trajectories = "hp_transferred_from" in scores.columns and "s" in scores.columns
+
     # Reshape the DataFrame for plotting
     df = scores.melt(
-        id_vars=["n", metric],
+        id_vars=["n", metric] + (["s"] if trajectories else []),
         value_vars=hp_names,
         var_name="hyperparameter",
         value_name="value"
@@ -89,8 +99,7 @@ def plot(
         )
 
         # Determine the minimum and maximum values for reference lines
-        min_value = min(grid[hp])
-        max_value = max(grid[hp])
+        min_value, max_value = value_range(grid[hp])
 
         # Create dashed lines to indicate the hyperparameter's range
         hline_min = alt.Chart(pd.DataFrame({'y': [min_value]})).mark_rule(
@@ -104,7 +113,17 @@ def plot(
         ).encode(y=alt.Y('y:Q', scale=alt.Scale(type=scale_type)))
 
         # Combine the scatter plot with the reference lines
-        chart = (base + hline_min + hline_max).properties(title=hp)
+        layers = [base, hline_min, hline_max]
+        if trajectories:
+            # Connect the selected values of each seed across sample sizes
+            trajectory = alt.Chart(df[df['hyperparameter'] == hp]).mark_line(color='gray', opacity=0.4).encode(
+                x=alt.X('n:Q', scale=alt.Scale(type='log')),
+                y=alt.Y('value:Q', scale=alt.Scale(type=scale_type)),
+                detail='s:N',
+                order='n:Q',
+            )
+            layers.insert(0, trajectory)
+        chart = alt.layer(*layers).properties(title=hp)
         charts.append(chart)
 
     # Concatenate all hyperparameter charts horizontally
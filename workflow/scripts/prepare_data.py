@@ -4,8 +4,6 @@ from pathlib import Path
 import h5py
 import numpy as np
 import pandas as pd
-from sklearn.datasets import fetch_openml
-from sklearn.preprocessing import QuantileTransformer
 import pyarrow.parquet as pq
 
 # Set up logging
@@ -18,23 +16,22 @@ FLOAT_PRECISION = np.float32
 # Define a constant for quantile transform unique values threshold
 QUANTILE_TRANSFORM_UNIQUE_VALUES_THRESHOLD = 20
 
+def fetch_mnist():
+    """Download MNIST, importing scikit-learn's dataset fetchers only when needed."""
+    from sklearn.datasets import fetch_openml
+
+    return fetch_openml("mnist_784", version=1, return_X_y=True, as_frame=False)
+
+
+# Loaders of the predefined datasets declared in `registry.py`
 predefined_datasets = {
     "mnist": {
         "features": {
-            "pixel": lambda: fetch_openml(
-                "mnist_784", version=1, return_X_y=True, as_frame=False
-            )[0]
+            "pixel": lambda: fetch_mnist()[0]
         },
         "targets": {
-            "ten-digits": lambda: fetch_openml(
-                "mnist_784", version=1, return_X_y=True, as_frame=False
-            )[1].astype(int),
-            "odd-even": lambda: (
-                fetch_openml("mnist_784", version=1, return_X_y=True, as_frame=False)[
-                    1
-                ].astype(int)
-                % 2
-            ).astype(int),
+            "ten-digits": lambda: fetch_mnist()[1].astype(int),
+            "odd-even": lambda: (fetch_mnist()[1].astype(int) % 2).astype(int),
         },
         "covariates": {},
     }
@@ -116,6 +113,8 @@ def prepare_data(
         logging.info("Data is empty, skipping quantile transform") 
 
     if quantile_transform:
+        from sklearn.preprocessing import QuantileTransformer
+
         logging.info("Applying quantile transform")
         if data.ndim == 1:
             data = data.reshape(-1, 1)
@@ -0,0 +1,144 @@
+"""
+registry.py
+====================================
+This module declares the available models and predefined datasets.
+
+The registry only consists of plain data, so that it can be read without
+importing scikit-learn, e.g. to validate the config. Estimators are referred to
+by their import path `"module:attribute"`, and `fit_model.py` only imports an
+estimator's module once a model is fitted. Pipelines list their steps by the
+prefix of their hyperparameters in the grids, e.g. `pca__n_components`.
+Parameter values that are themselves estimator specifications are created
+before being passed on.
+"""
+
+from typing import Any, Dict, List
+
+# Available models by name, along with their task and the estimators they consist of
+MODELS: Dict[str, Dict[str, Any]] = {
+    "majority-cls": {
+        "task": "classification",
+        "description": "majority classifier",
+        "estimator": "sklearn.dummy:DummyClassifier",
+        "params": {"strategy": "most_frequent"},
+    },
+    "logistic-regression-cls": {
+        "task": "classification",
+        "description": "logistic regression classifier",
+        "estimator": "sklearn.linear_model:LogisticRegression",
+    },
+    "ridge-cls": {
+        "task": "classification",
+        "description": "ridge classifier",
+        "estimator": "sklearn.linear_model:RidgeClassifier",
+    },
+    "poly-kernel-svm-cls": {
+        "task": "classification",
+        "description": "polynomial kernel svm classifier",
+        "estimator": "sklearn.svm:SVC",
+        "params": {"kernel": "poly"},
+    },
+    "rbf-kernel-svm-cls": {
+        "task": "classification",
+        "description": "rbf kernel svm classifier",
+        "estimator": "sklearn.svm:SVC",
+        "params": {"kernel": "rbf"},
+    },
+    "random-forest-cls": {
+        "task": "classification",
+        "description": "random forest classifier",
+        "estimator": "sklearn.ensemble:RandomForestClassifier",
+    },
+    "pca-ridge-cls": {
+        "task": "classification",
+        "description": "pca ridge classifier",
+        "pipeline": {
+            "pca": {"estimator": "sklearn.decomposition:PCA"},
+            "ridge": {"estimator": "sklearn.linear_model:RidgeClassifier"},
+        },
+    },
+    "rfe-ridge-cls": {
+        "task": "classification",
+        "description": "rfe ridge classifier",
+        "pipeline": {
+            "rfe": {
+                "estimator": "sklearn.feature_selection:RFE",
+                "params": {"estimator": {"estimator": "sklearn.linear_model:RidgeClassifierCV"}},
+            },
+            "ridge": {"estimator": "sklearn.linear_model:RidgeClassifier"},
+        },
+    },
+    "xgb-cls": {
+        "task": "classification",
+        "description": "xgboost classifier",
+        "estimator": "sklearn.ensemble:GradientBoostingClassifier",
+        "params": {"random_state": 42, "n_iter_no_change": 10},
+    },
+    "mean-reg": {
+        "task": "regression",
+        "description": "mean regressor",
+        "estimator": "sklearn.dummy:DummyRegressor",
+        "params": {"strategy": "mean"},
+    },
+    "ols-reg": {
+        "task": "regression",
+        "description": "ordinary least squares regressor",
+        "estimator": "sklearn.linear_model:LinearRegression",
+    },
+    "ridge-reg": {
+        "task": "regression",
+        "description": "ridge regressor",
+        "estimator": "sklearn.linear_model:Ridge",
+    },
+    "poly-kernel-svm-reg": {
+        "task": "regression",
+        "description": "polynomial kernel svm regressor",
+        "estimator": "sklearn.svm:SVR",
+        "params": {"kernel": "poly"},
+    },
+    "rbf-kernel-svm-reg": {
+        "task": "regression",
+        "description": "rbf kernel svm regressor",
+        "estimator": "sklearn.svm:SVR",
+        "params": {"kernel": "rbf"},
+    },
+    "random-forest-reg": {
+        "task": "regression",
+        "description": "random forest regressor",
+        "estimator": "sklearn.ensemble:RandomForestRegressor",
+    },
+    "pca-ridge-reg": {
+        "task": "regression",
+        "description": "pca ridge regressor",
+        "pipeline": {
+            "pca": {"estimator": "sklearn.decomposition:PCA"},
+            "ridge": {"estimator": "sklearn.linear_model:Ridge"},
+        },
+    },
+    "rfe-ridge-reg": {
+        "task": "regression",
+        "description": "rfe ridge regressor",
+        "pipeline": {
+            "rfe": {
+                "estimator": "sklearn.feature_selection:RFE",
+                "params": {"estimator": {"estimator": "sklearn.linear_model:RidgeCV"}},
+            },
+            "ridge": {"estimator": "sklearn.linear_model:Ridge"},
+        },
+    },
+    "xgb-reg": {
+        "task": "regression",
+        "description": "xgboost regressor",
+        "estimator": "sklearn.ensemble:GradientBoostingRegressor",
+        "params": {"random_state": 42, "n_iter_no_change": 10},
+    },
+}
+
+# Variants of the predefined datasets, their loaders are defined in `prepare_data.py`
+PREDEFINED_DATASETS: Dict[str, Dict[str, List[str]]] = {
+    "mnist": {
+        "features": ["pixel"],
+        "targets": ["ten-digits", "odd-even"],
+        "covariates": [],
+    },
+}
@@ -0,0 +1,323 @@
+"""
+results_store.py
+====================================
+This module provides an optional single-file results store backed by SQLite.
+
+Instead of one small CSV per fit job, score rows, aggregated best scores and
+extrapolation statistics can be collected in a single database file. The
+database runs in write-ahead-logging (WAL) mode, so concurrent fit jobs on one
+machine can append safely while `aggregate`, `extrapolate` and the interactive
+viewer query it without rescanning the results directories.
+
+Note that SQLite relies on POSIX file locks. Place the store on a local disk or
+a shared filesystem with working locking support.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Wildcards identifying a single learning curve
+CURVE_KEYS = [
+    "dataset",
+    "model",
+    "features",
+    "targets",
+    "confound_correction_method",
+    "confound_correction_cni",
+    "balanced",
+    "quantile_transform",
+    "grid",
+]
+
+# Additional wildcards identifying a single train/val/test split of a curve
+SPLIT_KEYS = ["samplesize", "seed"]
+
+# Seconds to wait for a competing writer before giving up
+LOCK_TIMEOUT = 600.0
+
+
+def _to_builtin(obj: Any) -> Union[int, float, bool, List]:
+    """
+    Convert NumPy data types to native Python types for JSON serialization.
+
+    Args:
+        obj: The object to be encoded.
+
+    Returns:
+        The encoded object as a native Python type.
+
+    Raises:
+        TypeError: If the object type is not supported.
+    """
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def curve_key_from_path(path: str) -> Dict[str, str]:
+    """
+    Extract the curve key from a scores, statistics or bootstrap file path.
+
+    Paths are expected to follow the workflow layout
+    `results/{dataset}/{kind}/{model}/{features}_{targets}_{confound_correction_method}_{confound_correction_cni}_{balanced}_{quantile_transform}_{grid}.{ext}`.
+
+    Args:
+        path (str): Path to the results file.
+
+    Returns:
+        Dict[str, str]: Mapping of the curve wildcards to their values.
+
+    Raises:
+        ValueError: If the path does not follow the workflow layout.
+    """
+    parts = Path(path).parts
+    name_parts = Path(path).name.split(".", 1)[0].split("_")
+    if len(parts) < 4 or len(name_parts) != len(CURVE_KEYS) - 2:
+        raise ValueError(f"Invalid filename structure: {path}")
+    return dict(zip(CURVE_KEYS, [parts[-4], parts[-2]] + name_parts))
+
+
+def curve_path_from_key(key: Dict[str, Any], kind: str, suffix: str, directory: str = "results") -> str:
+    """
+    Build the path of a results file of a learning curve, the inverse of `curve_key_from_path`.
+
+    Args:
+        key (Dict[str, Any]): Curve wildcards.
+        kind (str): Results subdirectory, e.g. "statistics" or "scores".
+        suffix (str): File suffix including the extension, e.g. ".bands.npz".
+        directory (str): Results directory.
+
+    Returns:
+        str: Path to the results file.
+    """
+    name = "_".join(str(key[k]) for k in CURVE_KEYS[2:])
+    return str(Path(directory, str(key["dataset"]), kind, str(key["model"]), name + suffix))
+
+
+class ResultsStore:
+    """
+    Single-file SQLite store for fit scores, best scores and statistics.
+
+    Rows are keyed by the workflow wildcards (see `CURVE_KEYS` and `SPLIT_KEYS`),
+    the row contents are stored as JSON since the columns differ between models
+    and hyperparameter grids.
+    """
+
+    def __init__(self, path: str, timeout: float = LOCK_TIMEOUT):
+        """
+        Open (and if necessary create) the results store.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            timeout (float): Seconds to wait for a competing writer.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def _create_tables(self) -> None:
+        """Create the tables and indices if they do not exist yet."""
+        curve_columns = ", ".join(f"{k} TEXT NOT NULL" for k in CURVE_KEYS)
+        split_columns = ", ".join(f"{k} INTEGER NOT NULL" for k in SPLIT_KEYS)
+        with self._transaction() as cursor:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS scores ({curve_columns}, {split_columns}, row TEXT NOT NULL)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS scores_by_split ON scores "
+                f"({', '.join(k for k in CURVE_KEYS if k != 'grid')}, {', '.join(SPLIT_KEYS)})"
+            )
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS best_scores ({curve_columns}, row TEXT NOT NULL)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS best_scores_by_curve ON best_scores ({', '.join(CURVE_KEYS)})")
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS statistics ({curve_columns}, stats TEXT NOT NULL, bootstrap TEXT NOT NULL, "
+                f"PRIMARY KEY ({', '.join(CURVE_KEYS)}))"
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Run the enclosed statements in a single write transaction.
+
+        `BEGIN IMMEDIATE` acquires the write lock up front, so concurrent writers
+        queue up instead of failing halfway through a transaction.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        else:
+            cursor.execute("COMMIT")
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _where(keys: Sequence[str], filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """
+        Build a WHERE clause from key filters. List values match any of their elements.
+
+        Args:
+            keys (Sequence[str]): Columns that may be filtered on.
+            filters (Dict[str, Any]): Column values to filter on; unknown keys are ignored.
+
+        Returns:
+            Tuple[str, List[Any]]: The WHERE clause and its parameters.
+        """
+        clauses, values = [], []
+        for key in keys:
+            if key not in filters or filters[key] is None:
+                continue
+            value = filters[key]
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                clauses.append(f"{key} IN ({', '.join('?' * len(value))})")
+                values.extend(str(v) if key in CURVE_KEYS else int(v) for v in value)
+            else:
+                clauses.append(f"{key} = ?")
+                values.append(str(value) if key in CURVE_KEYS else int(value))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+    @staticmethod
+    def _rows_to_frame(rows: List[Tuple[str]]) -> pd.DataFrame:
+        """Convert JSON-encoded rows to a DataFrame."""
+        return pd.DataFrame([json.loads(row) for row, in rows])
+
+    def write_scores(self, key: Dict[str, Any], scores: pd.DataFrame) -> None:
+        """
+        Replace the score rows of a single fit job.
+
+        Args:
+            key (Dict[str, Any]): Curve and split wildcards of the fit job.
+            scores (pd.DataFrame): Score rows, one per hyperparameter combination.
+        """
+        key_values = [str(key[k]) for k in CURVE_KEYS] + [int(key[k]) for k in SPLIT_KEYS]
+        where, values = self._where(CURVE_KEYS + SPLIT_KEYS, key)
+        rows = [json.dumps(row, default=_to_builtin) for row in scores.to_dict(orient="records")]
+        with self._transaction() as cursor:
+            cursor.execute(f"DELETE FROM scores{where}", values)
+            cursor.executemany(
+                f"INSERT INTO scores VALUES ({', '.join('?' * (len(key_values) + 1))})",
+                [key_values + [row] for row in rows],
+            )
+        logging.debug(f"Wrote {len(rows)} score rows to {self.path}")
+
+    def read_scores(self, **filters: Any) -> pd.DataFrame:
+        """
+        Read score rows matching the given wildcards.
+
+        Args:
+            **filters: Curve and split wildcards to filter on, omitted wildcards match anything.
+
+        Returns:
+            pd.DataFrame: Matching score rows.
+        """
+        where, values = self._where(CURVE_KEYS + SPLIT_KEYS, filters)
+        rows = self.connection.execute(f"SELECT row FROM scores{where}", values).fetchall()
+        return self._rows_to_frame(rows)
+
+    def write_best_scores(self, key: Dict[str, Any], scores: pd.DataFrame) -> None:
+        """
+        Replace the best-performing score rows of a learning curve.
+
+        Args:
+            key (Dict[str, Any]): Curve wildcards.
+            scores (pd.DataFrame): Best score rows, one per sample size and seed.
+        """
+        key_values = [str(key[k]) for k in CURVE_KEYS]
+        where, values = self._where(CURVE_KEYS, key)
+        rows = [json.dumps(row, default=_to_builtin) for row in scores.to_dict(orient="records")]
+        with self._transaction() as cursor:
+            cursor.execute(f"DELETE FROM best_scores{where}", values)
+            cursor.executemany(
+                f"INSERT INTO best_scores VALUES ({', '.join('?' * (len(key_values) + 1))})",
+                [key_values + [row] for row in rows],
+            )
+
+    def read_best_scores(self, **filters: Any) -> pd.DataFrame:
+        """
+        Read best score rows matching the given wildcards.
+
+        Args:
+            **filters: Curve wildcards to filter on, omitted wildcards match anything.
+
+        Returns:
+            pd.DataFrame: Matching best score rows.
+        """
+        where, values = self._where(CURVE_KEYS, filters)
+        rows = self.connection.execute(f"SELECT row FROM best_scores{where}", values).fetchall()
+        return self._rows_to_frame(rows)
+
+    def write_statistics(self, key: Dict[str, Any], stats: Dict[str, Any], bootstrap: List[List[float]]) -> None:
+        """
+        Insert or replace the extrapolation statistics of a learning curve.
+
+        Args:
+            key (Dict[str, Any]): Curve wildcards.
+            stats (Dict[str, Any]): Contents of the `.stats.json` file.
+            bootstrap (List[List[float]]): Contents of the `.bootstrap.json` file.
+        """
+        key_values = [str(key[k]) for k in CURVE_KEYS]
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO statistics VALUES ({', '.join('?' * (len(key_values) + 2))})",
+                key_values + [json.dumps(stats, default=_to_builtin), json.dumps(bootstrap, default=_to_builtin)],
+            )
+
+    def read_statistics(self, **filters: Any) -> List[Tuple[Dict[str, str], Dict[str, Any]]]:
+        """
+        Read extrapolation statistics matching the given wildcards.
+
+        Args:
+            **filters: Curve wildcards to filter on, omitted wildcards match anything.
+
+        Returns:
+            List[Tuple[Dict[str, str], Dict[str, Any]]]: Curve keys and their statistics.
+        """
+        where, values = self._where(CURVE_KEYS, filters)
+        rows = self.connection.execute(f"SELECT {', '.join(CURVE_KEYS)}, stats FROM statistics{where}", values).fetchall()
+        return [(dict(zip(CURVE_KEYS, row[:-1])), json.loads(row[-1])) for row in rows]
+
+
+def open_results_store(path: Optional[str]) -> Optional[ResultsStore]:
+    """
+    Open the results store if one is configured.
+
+    Args:
+        path (Optional[str]): Path to the store, or a false value if the store is disabled.
+
+    Returns:
+        Optional[ResultsStore]: The opened store, or None if disabled.
+    """
+    return ResultsStore(path) if path else None
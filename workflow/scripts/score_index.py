@@ -0,0 +1,262 @@
+"""
+score_index.py
+====================================
+This module provides a persistent, content-addressed index of fit scores.
+
+Before fitting a hyperparameter combination, a fit job checks whether the same
+combination has already been scored, e.g. by a job of another grid or of an
+experiment with a different name. Scores are kept in a single SQLite file, keyed
+by a hash of everything they depend on: the contents of the prepared features,
+targets and (if used) covariates, the split indices, the confound correction
+mode, the model name and the version of the scoring code (see `code_version`),
+along with the canonicalized hyperparameters. Renamed or moved input files
+therefore reuse their scores, while changed inputs or code never match stale
+ones.
+
+The content hash of a prepared dataset is computed once per file version and
+cached in the index. A fit job reads the scores of its job key with a single
+indexed query and looks up each grid point in a dictionary. The scores of a
+finished job are added in a single transaction, so the index never holds
+partial results of a job.
+
+As for the results store, place the index on a filesystem with working POSIX
+file locks.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+from contextlib import contextmanager
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+import h5py
+import numpy as np
+
+try:
+    from .results_store import LOCK_TIMEOUT, _to_builtin
+except ImportError:
+    from results_store import LOCK_TIMEOUT, _to_builtin
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Number of bytes of a dataset hashed at a time
+HASH_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _canonical_value(value: Any) -> Any:
+    """Convert a hyperparameter value to a native type, with integral floats as integers."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isfinite(value) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonical_params(params: Mapping[str, Any]) -> str:
+    """
+    Encode hyperparameters independently of their order and numeric type.
+
+    Args:
+        params (Mapping[str, Any]): Hyperparameter names and values.
+
+    Returns:
+        str: JSON encoding with sorted names, where e.g. `1.0` and `1` are equal.
+    """
+    return json.dumps({k: _canonical_value(v) for k, v in params.items()}, sort_keys=True, default=_to_builtin)
+
+
+def dataset_digest(path: str, key: str = "data") -> str:
+    """
+    Hash the contents of a dataset in an HDF5 file, independently of the file's name and layout.
+
+    Args:
+        path (str): Path to the HDF5 file.
+        key (str): Name of the dataset in the file.
+
+    Returns:
+        str: SHA-256 hex digest of the dataset's dtype, shape and values.
+    """
+    digest = hashlib.sha256()
+    with h5py.File(path, "r") as f:
+        data = f[key]
+        digest.update(repr((data.dtype.str, data.shape)).encode())
+        row_bytes = max(data.dtype.itemsize * int(np.prod(data.shape[1:])), 1)
+        block_rows = max(HASH_BLOCK_BYTES // row_bytes, 1)
+        for start in range(0, data.shape[0], block_rows):
+            digest.update(np.ascontiguousarray(data[start:start + block_rows]).tobytes())
+    return digest.hexdigest()
+
+
+def code_version(paths: Sequence[str], packages: Sequence[str] = ("numpy", "scikit-learn")) -> str:
+    """
+    Hash the source files and package versions that scores depend on.
+
+    Args:
+        paths (Sequence[str]): Source files of the scoring code.
+        packages (Sequence[str]): Distributions whose versions are included.
+
+    Returns:
+        str: SHA-256 hex digest of the sources and versions.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    for package in packages:
+        try:
+            digest.update(f"{package}=={metadata.version(package)}".encode())
+        except metadata.PackageNotFoundError:
+            digest.update(f"{package} missing".encode())
+    return digest.hexdigest()
+
+
+class ScoreIndex:
+    """
+    Single-file SQLite index of score rows by content-addressed job key and hyperparameters.
+    """
+
+    def __init__(self, path: str, timeout: float = LOCK_TIMEOUT):
+        """
+        Open (and if necessary create) the score index.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            timeout (float): Seconds to wait for a competing writer.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS digests (path TEXT PRIMARY KEY, version TEXT NOT NULL, digest TEXT NOT NULL)"
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS fit_scores (job TEXT NOT NULL, params TEXT NOT NULL, row TEXT NOT NULL, "
+                "PRIMARY KEY (job, params)) WITHOUT ROWID"
+            )
+
+    def __enter__(self) -> "ScoreIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run the enclosed statements in a single write transaction, see `ResultsStore._transaction`."""
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        else:
+            cursor.execute("COMMIT")
+        finally:
+            cursor.close()
+
+    def digest(self, path: str) -> str:
+        """
+        Content hash of a prepared dataset, computed once per version of the file.
+
+        Args:
+            path (str): Path to the HDF5 file.
+
+        Returns:
+            str: The digest, see `dataset_digest`.
+        """
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        version = f"{stat.st_mtime_ns}:{stat.st_size}"
+        query = "SELECT digest FROM digests WHERE path = ? AND version = ?"
+        row = self.connection.execute(query, (real_path, version)).fetchone()
+        if row is not None:
+            return row[0]
+        # hash while holding the write lock, so concurrent jobs wait for the digest instead of hashing as well
+        with self._transaction() as cursor:
+            row = cursor.execute(query, (real_path, version)).fetchone()
+            if row is not None:
+                return row[0]
+            digest = dataset_digest(real_path)
+            cursor.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?)", (real_path, version, digest))
+        logging.debug(f"Hashed {path}: {digest}")
+        return digest
+
+    def job_key(
+        self,
+        features_path: str,
+        targets_path: str,
+        cni_path: str,
+        split: Mapping[str, List[int]],
+        model_name: str,
+        mode: str,
+        code: str,
+    ) -> str:
+        """
+        Key of a fit job, identical for all jobs that compute identical scores.
+
+        Args:
+            features_path (str): Path to the features HDF5 file.
+            targets_path (str): Path to the targets HDF5 file.
+            cni_path (str): Path to the covariates HDF5 file, only hashed if the mode uses covariates.
+            split (Mapping[str, List[int]]): Split with the keys `idx_train`, `idx_val` and `idx_test`.
+            model_name (str): Name of the model.
+            mode (str): Mode of feature inclusion, see `BaseModel.score`.
+            code (str): Version of the scoring code, see `code_version`.
+
+        Returns:
+            str: SHA-256 hex digest of the job's inputs.
+        """
+        job = {
+            "features": self.digest(features_path),
+            "targets": self.digest(targets_path),
+            "covariates": self.digest(cni_path) if mode in ("with-cni", "only-cni") else None,
+            "split": [list(map(int, split[k])) for k in ("idx_train", "idx_val", "idx_test")],
+            "model": model_name,
+            "mode": mode,
+            "code": code,
+        }
+        return hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, job: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the indexed scores of a fit job.
+
+        Args:
+            job (str): Key of the fit job, see `job_key`.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Score rows by their canonicalized hyperparameters, see `canonical_params`.
+        """
+        rows = self.connection.execute("SELECT params, row FROM fit_scores WHERE job = ?", (job,)).fetchall()
+        return {params: json.loads(row) for params, row in rows}
+
+    def add(self, job: str, param_names: List[str], scores: List[Dict[str, Any]]) -> None:
+        """
+        Insert or replace the score rows of a fit job.
+
+        Args:
+            job (str): Key of the fit job, see `job_key`.
+            param_names (List[str]): Names of the hyperparameters contained in the score rows.
+            scores (List[Dict[str, Any]]): Score rows, one per hyperparameter combination.
+        """
+        rows = [
+            (job, canonical_params({k: row[k] for k in param_names}), json.dumps(row, default=_to_builtin))
+            for row in scores
+        ]
+        with self._transaction() as cursor:
+            cursor.executemany("INSERT OR REPLACE INTO fit_scores VALUES (?, ?, ?)", rows)
+        logging.debug(f"Indexed {len(rows)} score rows in {self.path}")
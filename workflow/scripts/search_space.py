@@ -0,0 +1,267 @@
+"""
+search_space.py
+====================================
+This module samples hyperparameters from search spaces declared in the grids.
+
+Besides a list of values, a hyperparameter of a model's grid in
+`config/grids.yaml` may declare a distribution, and the grid may declare a
+budget of trials:
+
+    rbf-kernel-svm-reg: {'C': {'log-uniform': [0.00001, 100000]}, 'gamma': {'log-uniform': [0.00000003, 32]}, 'trials': 30}
+
+Such grids are searched with the `random` or `bayesian` strategy (see `search`
+in the config). Random search draws `trials` combinations, where list-valued
+hyperparameters are drawn uniformly from their values. Bayesian search draws the
+first `BAYES_INITIAL_TRIALS` combinations at random and then proposes each
+further combination by maximizing the expected improvement of the validation
+score under a Gaussian process fitted to the scores so far.
+
+Combinations are drawn from a random number generator seeded by the split, so a
+repeated fit job draws the same combinations and reuses their scores.
+scikit-learn is only imported by Bayesian search and the score index only once
+combinations are drawn, so that the plotting scripts and the config validation
+can read the spaces quickly.
+"""
+
+import logging
+import math
+import os
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Distributions a hyperparameter can be drawn from, by their name in the grids
+DISTRIBUTIONS = ["uniform", "log-uniform", "int-uniform", "int-log-uniform"]
+
+# Key of a model's grid holding the number of combinations to draw
+TRIALS_KEY = "trials"
+
+# Number of combinations drawn if a grid declares no budget
+DEFAULT_TRIALS = 20
+
+# Number of random combinations Bayesian search starts with
+BAYES_INITIAL_TRIALS = 5
+
+# Number of random candidates among which Bayesian search maximizes the expected improvement
+BAYES_CANDIDATES = 1000
+
+# Significant digits of drawn continuous values, to keep the score files readable
+SIGNIFICANT_DIGITS = 4
+
+
+def _canonical_params(params: Dict[str, Any]) -> str:
+    """Encode a hyperparameter combination as the score index does, to tell combinations apart."""
+    try:
+        from .score_index import canonical_params
+    except ImportError:
+        from score_index import canonical_params
+    return canonical_params(params)
+
+
+def hyperparameters(model_grid: Dict[str, Any]) -> Dict[str, Any]:
+    """Hyperparameters of a model's grid, i.e. all entries except the budget of trials."""
+    return {name: spec for name, spec in model_grid.items() if name != TRIALS_KEY}
+
+
+def is_distribution(spec: Any) -> bool:
+    """Check whether a hyperparameter is declared by a distribution rather than a list of values."""
+    return isinstance(spec, dict)
+
+
+def is_sampled(model_grid: Dict[str, Any]) -> bool:
+    """Check whether a model's grid declares distributions or a budget of trials."""
+    return TRIALS_KEY in model_grid or any(is_distribution(spec) for spec in model_grid.values())
+
+
+def value_range(spec: Any) -> Tuple[float, float]:
+    """
+    Smallest and largest value of a hyperparameter.
+
+    Args:
+        spec (Any): List of values or distribution of the hyperparameter.
+
+    Returns:
+        Tuple[float, float]: The bounds of the distribution, or the extreme values of the list.
+    """
+    if is_distribution(spec):
+        (low, high), = spec.values()
+        return low, high
+    return min(spec), max(spec)
+
+
+class SearchSpace:
+    """
+    Hyperparameters of a model's grid, mapped to and from the unit hypercube.
+    """
+
+    def __init__(self, model_grid: Dict[str, Any]):
+        """
+        Initialize the search space.
+
+        Args:
+            model_grid (Dict[str, Any]): Grid of the model, with lists of values or distributions by hyperparameter,
+                and optionally the number of trials.
+
+        Raises:
+            ValueError: If a distribution is unknown or its bounds are invalid.
+        """
+        self.specs = hyperparameters(model_grid)
+        self.trials = int(model_grid.get(TRIALS_KEY, DEFAULT_TRIALS))
+        for name, spec in self.specs.items():
+            if not is_distribution(spec):
+                continue
+            if len(spec) != 1 or next(iter(spec)) not in DISTRIBUTIONS:
+                raise ValueError(f"Hyperparameter {name} must declare one of the distributions {DISTRIBUTIONS}")
+            (distribution, (low, high)), = spec.items()
+            if not low < high or ("log" in distribution and low <= 0):
+                raise ValueError(f"Invalid bounds of hyperparameter {name}: {low}, {high}")
+
+    def size(self) -> float:
+        """Number of distinct combinations, infinite if a hyperparameter is continuous."""
+        size = 1.0
+        for spec in self.specs.values():
+            if is_distribution(spec):
+                (distribution, (low, high)), = spec.items()
+                if not distribution.startswith("int"):
+                    return math.inf
+                size *= high - low + 1
+            else:
+                size *= len(spec)
+        return size
+
+    def decode(self, u: np.ndarray) -> Dict[str, Any]:
+        """
+        Hyperparameter combination of a point of the unit hypercube.
+
+        Args:
+            u (np.ndarray): Coordinates in [0, 1], one per hyperparameter.
+
+        Returns:
+            Dict[str, Any]: The combination.
+        """
+        params = {}
+        for (name, spec), ui in zip(self.specs.items(), u):
+            if not is_distribution(spec):
+                params[name] = spec[min(int(ui * len(spec)), len(spec) - 1)]
+                continue
+            (distribution, (low, high)), = spec.items()
+            if distribution.startswith("int"):
+                # widen the bounds by half a step, so that rounding reaches the bounds as often as other integers
+                low, high = low - 0.5, high + 0.5
+            if "log" in distribution:
+                value = math.exp(math.log(low) + ui * (math.log(high) - math.log(low)))
+            else:
+                value = low + ui * (high - low)
+            if distribution.startswith("int"):
+                params[name] = int(min(max(round(value), spec[distribution][0]), spec[distribution][1]))
+            else:
+                params[name] = float(f"{value:.{SIGNIFICANT_DIGITS}g}")
+        return params
+
+    def encode(self, params: Dict[str, Any]) -> np.ndarray:
+        """
+        Point of the unit hypercube of a hyperparameter combination, see `decode`.
+
+        Args:
+            params (Dict[str, Any]): The combination.
+
+        Returns:
+            np.ndarray: Coordinates in [0, 1], one per hyperparameter.
+        """
+        u = []
+        for name, spec in self.specs.items():
+            value = params[name]
+            if not is_distribution(spec):
+                i = int(np.argmin(np.abs(np.asarray(spec, dtype=np.float64) - float(value))))
+                u.append((i + 0.5) / len(spec))
+                continue
+            (distribution, (low, high)), = spec.items()
+            if distribution.startswith("int"):
+                low, high = low - 0.5, high + 0.5
+            if "log" in distribution:
+                u.append((math.log(value) - math.log(low)) / (math.log(high) - math.log(low)))
+            else:
+                u.append((value - low) / (high - low))
+        return np.clip(np.array(u, dtype=np.float64), 0.0, 1.0)
+
+    def sample(self, rng: np.random.Generator) -> Dict[str, Any]:
+        """Draw a hyperparameter combination uniformly from the unit hypercube."""
+        return self.decode(rng.random(len(self.specs)))
+
+
+def random_candidates(space: SearchSpace, seed: int) -> List[Dict[str, Any]]:
+    """
+    Draw distinct hyperparameter combinations at random.
+
+    Args:
+        space (SearchSpace): The search space.
+        seed (int): Seed of the random number generator, e.g. the seed of the split.
+
+    Returns:
+        List[Dict[str, Any]]: `space.trials` combinations, fewer if the space is smaller.
+    """
+    rng = np.random.default_rng(seed)
+    n_trials = int(min(space.trials, space.size()))
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for _ in range(100 * n_trials):
+        if len(candidates) == n_trials:
+            break
+        params = space.sample(rng)
+        candidates.setdefault(_canonical_params(params), params)
+    return list(candidates.values())
+
+
+def propose_candidate(
+    space: SearchSpace,
+    observed: Sequence[Dict[str, Any]],
+    values: Sequence[float],
+    rng: np.random.Generator,
+) -> Optional[Dict[str, Any]]:
+    """
+    Propose the next hyperparameter combination of a Bayesian search.
+
+    Args:
+        space (SearchSpace): The search space.
+        observed (Sequence[Dict[str, Any]]): Combinations evaluated so far.
+        values (Sequence[float]): Their validation scores, higher is better.
+        rng (np.random.Generator): Random number generator, seeded by the split.
+
+    Returns:
+        Optional[Dict[str, Any]]: A combination not evaluated yet, None if all combinations were evaluated.
+    """
+    seen = {_canonical_params(params) for params in observed}
+    if len(seen) >= space.size():
+        return None
+    pool = [space.sample(rng) for _ in range(BAYES_CANDIDATES if len(observed) >= BAYES_INITIAL_TRIALS else 100)]
+    pool = [params for params in pool if _canonical_params(params) not in seen]
+    if not pool:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    if len(observed) < BAYES_INITIAL_TRIALS or not np.isfinite(values).any():
+        return pool[0]
+
+    from scipy.stats import norm
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+
+    # failed fits count as the worst observed score
+    values = np.where(np.isfinite(values), values, np.nanmin(values))
+    gp = GaussianProcessRegressor(
+        kernel=Matern(nu=2.5) + WhiteKernel(noise_level=1e-3),
+        normalize_y=True,
+        random_state=int(rng.integers(2**31)),
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)  # kernel bounds are often reached with few trials
+        gp.fit(np.array([space.encode(params) for params in observed]), values)
+    mean, std = gp.predict(np.array([space.encode(params) for params in pool]), return_std=True)
+    std = np.maximum(std, 1e-9)
+    z = (mean - values.max()) / std
+    expected_improvement = (mean - values.max()) * norm.cdf(z) + std * norm.pdf(z)
+    return pool[int(np.argmax(expected_improvement))]
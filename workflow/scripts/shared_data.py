@@ -0,0 +1,180 @@
+"""
+shared_data.py
+====================================
+This module provides an opt-in node-local cache of prepared datasets.
+
+When many fit and split jobs on a node read the same prepared HDF5 file, every
+job reads and copies the rows it needs. With `shared_data` enabled in the
+config, the first job copies a dataset's array into a `.npy` file in shared
+memory (`/dev/shm`, or the directory in the `ESCE_SHARED_DATA_DIR` environment
+variable), and all jobs memory-map that file read-only, so the rows are read
+zero-copy from pages shared between all processes.
+
+Every process attaching to an array leaves a reference file, which is removed
+when the process releases its arrays (at the latest when it exits). An array is
+deleted once no live process references it. References of processes that were
+killed are detected by their process id and cleaned up by the next release,
+together with arrays they left partially written.
+"""
+
+import atexit
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import h5py
+import numpy as np
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def default_directory() -> str:
+    """
+    Directory of the shared arrays of the current user.
+
+    Returns:
+        str: `ESCE_SHARED_DATA_DIR` if set, else a directory in `/dev/shm` or the temporary directory.
+    """
+    base = os.environ.get("ESCE_SHARED_DATA_DIR")
+    if base is None:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"esce-shared-data-{os.getuid()}")
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with the given id is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedDataCache:
+    """
+    Read-only arrays of HDF5 files, shared between the processes of a node.
+
+    Instances can be passed as `load_data` to `fit_model.fit` and
+    `generate_splits.write_splitfile`.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (Optional[str]): Directory of the shared arrays, by default `default_directory()`.
+        """
+        self.directory = directory or default_directory()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._token = f"{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self._references: Dict[str, str] = {}
+        atexit.register(self.release)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock of the cache directory, which guards creating, referencing and deleting arrays."""
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _array_name(self, path: str, key: str) -> str:
+        """Name of the shared array of a dataset, which changes with the file's modification time or size."""
+        stat = os.stat(path)
+        version = repr((os.path.realpath(path), key, stat.st_mtime_ns, stat.st_size))
+        return hashlib.sha1(version.encode()).hexdigest()
+
+    def __call__(self, path: str, key: str = "data") -> np.ndarray:
+        """
+        Return a read-only array of an HDF5 file, creating the shared copy if necessary.
+
+        Falls back to reading the array into process memory if the shared copy cannot be created.
+
+        Args:
+            path (str): Path to the HDF5 file.
+            key (str): Name of the dataset in the file, e.g. "data" or "mask".
+
+        Returns:
+            np.ndarray: The array, memory-mapped from the shared copy.
+        """
+        name = self._array_name(path, key)
+        array_path = os.path.join(self.directory, f"{name}.npy")
+        try:
+            with self._locked():
+                if not os.path.exists(array_path):
+                    with h5py.File(path, "r") as f:
+                        array = f[key][:]
+                    tmp_path = os.path.join(self.directory, f".{name}.{self._token}.npy")
+                    try:
+                        np.save(tmp_path, array)
+                        os.replace(tmp_path, array_path)
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                        raise
+                    logging.info(f"Shared {key} of {path} as {array_path}")
+                if name not in self._references:
+                    reference = os.path.join(self.directory, f"{name}.{self._token}.ref")
+                    open(reference, "w").close()
+                    self._references[name] = reference
+        except OSError as e:
+            logging.warning(f"Could not share {key} of {path}: {e} - reading it into process memory")
+            with h5py.File(path, "r") as f:
+                return f[key][:]
+        return np.load(array_path, mmap_mode="r")
+
+    def release(self) -> None:
+        """Drop the references of this cache and delete all arrays that are no longer referenced."""
+        if not os.path.isdir(self.directory):
+            return
+        with self._locked():
+            for reference in self._references.values():
+                if os.path.exists(reference):
+                    os.unlink(reference)
+            self._references.clear()
+            sweep(self.directory)
+
+
+def sweep(directory: Optional[str] = None) -> None:
+    """
+    Delete the shared arrays that are not referenced by any running process, and
+    partially written arrays of processes that were killed.
+
+    The caller must hold the lock of the directory, see `SharedDataCache.release`.
+
+    Args:
+        directory (Optional[str]): Directory of the shared arrays, by default `default_directory()`.
+    """
+    directory = directory or default_directory()
+    files = os.listdir(directory)
+    referenced = set()
+    for file in files:
+        if file.endswith(".ref"):
+            name, pid, _, _ = file.split(".")
+            if _pid_alive(int(pid)):
+                referenced.add(name)
+            else:
+                os.unlink(os.path.join(directory, file))
+    for file in files:
+        if not file.endswith(".npy"):
+            continue
+        if file.startswith("."):
+            _, _, pid, _, _ = file.split(".")
+            if not _pid_alive(int(pid)):
+                os.unlink(os.path.join(directory, file))
+                logging.info(f"Deleted partially written shared array {file}")
+        elif file[:-len(".npy")] not in referenced:
+            os.unlink(os.path.join(directory, file))
+            logging.info(f"Deleted unreferenced shared array {file}")
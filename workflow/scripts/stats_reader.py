@@ -0,0 +1,66 @@
+"""
+stats_reader.py
+====================================
+This module provides a shared reader for the JSON result files of the workflow.
+
+Statistics (`.stats.json`) and bootstrap (`.bootstrap.json`) files are parsed
+once with a JSON parser, which also accepts the `NaN` values written by the
+extrapolate step. Parsed results are cached per path and invalidated when the
+file's modification time or size changes, so that several figures or viewer
+reruns can share them.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+# Set up logging
+log_level = os.environ.get('ESCE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Parsed results by path, along with the (mtime, size) they were parsed at
+_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_lock = threading.Lock()
+
+
+def read_result(path: str) -> Any:
+    """
+    Parse a JSON result file, reusing the cached result if the file is unchanged.
+
+    The returned object is shared between callers and must not be modified.
+
+    Args:
+        path (str): Path to the statistics or bootstrap file.
+
+    Returns:
+        Any: The parsed file contents, or None if the file is empty.
+
+    Raises:
+        OSError: If the file cannot be read.
+        json.JSONDecodeError: If the file is not valid JSON.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    if stat.st_size == 0:
+        result = None
+    else:
+        with open(path) as f:
+            result = json.load(f)
+    logging.debug(f"Parsed {path}")
+
+    with _lock:
+        _cache[path] = (version, result)
+    return result
+
+
+def clear_cache() -> None:
+    """Remove all cached results."""
+    with _lock:
+        _cache.clear()
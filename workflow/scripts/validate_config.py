@@ -1,9 +1,14 @@
 import os
 
-import yaml
+try:
+    from .registry import MODELS, PREDEFINED_DATASETS
+    from .search_space import is_sampled
+except ImportError:
+    from registry import MODELS, PREDEFINED_DATASETS
+    from search_space import is_sampled
 
 
-def validate_details(config: dict, MODELS: dict, PREDEFINED_DATASETS: dict, RegressionModel: type) -> list:
+def validate_details(config: dict, MODELS: dict = MODELS, PREDEFINED_DATASETS: dict = PREDEFINED_DATASETS) -> list:
     """
     Validate the details of the configuration file to ensure consistency and correctness.
 
@@ -13,9 +18,8 @@ def validate_details(config: dict, MODELS: dict, PREDEFINED_DATASETS: dict, Regr
 
     Args:
         config (dict): Parsed configuration dictionary.
-        MODELS (dict): Dictionary of available models.
-        PREDEFINED_DATASETS (dict): Dictionary of predefined datasets.
-        RegressionModel (type): Class reference for regression models.
+        MODELS (dict): Specifications of the available models, by default those of the registry.
+        PREDEFINED_DATASETS (dict): Variants of the predefined datasets, by default those of the registry.
     
     Returns:
         list: List of error messages indicating validation failures.
@@ -90,11 +94,31 @@ def validate_details(config: dict, MODELS: dict, PREDEFINED_DATASETS: dict, Regr
         # Ensure regression models are used appropriately with confound corrections
         if exp["confound_correction_method"] in ["correct-y", "correct-both"]:
             for model in exp["models"]:
-                if not isinstance(MODELS[model], RegressionModel):
+                if model in MODELS and MODELS[model]["task"] != "regression":
                     errors.append(
                         f"Experiment '{exp_name}': model '{model}' must be a regression model when confound_correction_method is '{exp['confound_correction_method']}'."
                     )
     
+    # Validate the search strategies of hyperparameter grids
+    for grid_name in config.get("search", {}):
+        if grid_name not in config['grids']:
+            errors.append(
+                f"Search strategy: grid '{grid_name}' should be one of {list(config['grids'].keys())}."
+            )
+    for grid_name, grid in config['grids'].items():
+        search = config.get("search", {}).get(grid_name, "grid")
+        for model, model_grid in grid.items():
+            if is_sampled(model_grid) and search not in ["random", "bayesian"]:
+                errors.append(
+                    f"Grid '{grid_name}': model '{model}' declares distributions or trials, which require the search strategy 'random' or 'bayesian'."
+                )
+
+    # The peak memory of profiled fits is that of the process, which the fit worker keeps across jobs
+    if config.get("profile_fits") and config.get("fit_worker"):
+        errors.append(
+            "profile_fits: the peak memory of fits cannot be profiled with fit_worker, disable one of them."
+        )
+
     # Validate the existence of custom dataset files
     for dataset_name, dataset in config["custom_datasets"].items():
         for feature, feature_path in dataset["features"].items():
@@ -112,23 +136,8 @@ def validate_details(config: dict, MODELS: dict, PREDEFINED_DATASETS: dict, Regr
 
 
 if __name__ == "__main__":
-    import importlib.util  
-    
-    # Dynamically import the 'fit_model' module
-    spec = importlib.util.spec_from_file_location('fit_model', snakemake.input.fit_model)
-    module_fit_model = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module_fit_model)
-    
-    # Dynamically import the 'prepare_data' module
-    spec = importlib.util.spec_from_file_location('prepare_data', snakemake.input.prepare_data)
-    module_prepare_data = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module_prepare_data)
-    
-    from fit_model import MODELS, RegressionModel
-    from prepare_data import predefined_datasets as PREDEFINED_DATASETS
-    
     # Validate the configuration details
-    errors = validate_details(snakemake.params.config, MODELS, PREDEFINED_DATASETS, RegressionModel)
+    errors = validate_details(snakemake.params.config)
     
     # Print all encountered errors
     for error in errors:
@@ -136,4 +145,4 @@ if __name__ == "__main__":
     
     # Raise an error if any validation checks failed
     if len(errors) > 0:
-        raise ValueError("Configuration file has errors.")
\ No newline at end of file
+        raise ValueError("Configuration file has errors.")